@@ -5,11 +5,15 @@ Configura la conexión a la base de datos.
 """
 
 import os
+import sys
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import create_client, acreate_client, Client, AsyncClient
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.startup_trace import StartupTrace
 
 # Cargar variables de entorno
-load_dotenv()
+with StartupTrace.phase('load_dotenv'):
+    load_dotenv()
 
 class SupabaseClient:
     """
@@ -18,6 +22,7 @@ class SupabaseClient:
     """
     _instance = None
     _client: Client = None
+    _async_client: AsyncClient = None
 
     def __new__(cls):
         if cls._instance is None:
@@ -29,13 +34,14 @@ class SupabaseClient:
         """
         Inicializa el cliente de Supabase con las credenciales del .env
         """
-        supabase_url = os.getenv('VITE_SUPABASE_URL')
-        supabase_key = os.getenv('VITE_SUPABASE_SUPABASE_ANON_KEY')
+        self._url = os.getenv('VITE_SUPABASE_URL')
+        self._key = os.getenv('VITE_SUPABASE_SUPABASE_ANON_KEY')
 
-        if not supabase_url or not supabase_key:
+        if not self._url or not self._key:
             raise ValueError("Credenciales de Supabase no encontradas en .env")
 
-        self._client = create_client(supabase_url, supabase_key)
+        with StartupTrace.phase('supabase_client'):
+            self._client = create_client(self._url, self._key)
 
     @property
     def client(self) -> Client:
@@ -44,8 +50,24 @@ class SupabaseClient:
         """
         return self._client
 
+    async def async_client(self) -> AsyncClient:
+        """
+        Retorna el cliente asíncrono de Supabase, creándolo la primera vez.
+        Queda ligado al loop de asyncio donde se crea, por eso solo debe
+        usarse desde corrutinas ejecutadas con utils.async_bridge.
+        """
+        if self._async_client is None:
+            self._async_client = await acreate_client(self._url, self._key)
+        return self._async_client
+
 def get_supabase_client() -> Client:
     """
     Función helper para obtener el cliente de Supabase.
     """
     return SupabaseClient().client
+
+async def get_async_supabase_client() -> AsyncClient:
+    """
+    Función helper para obtener el cliente asíncrono de Supabase.
+    """
+    return await SupabaseClient().async_client()
@@ -3,19 +3,21 @@ Archivo principal de la aplicación Sombras de Chile.
 Aplicación de historias paranormales con diseño moderno basado en Figma.
 Contiene la definición de la app, carga de pantallas y layouts, y el ciclo principal.
 """
-from kivy.lang import Builder
-from kivymd.app import MDApp
-from kivymd.uix.screenmanager import MDScreenManager
-from kivymd.uix.screen import MDScreen
-from kivymd.uix.bottomnavigation import MDBottomNavigation, MDBottomNavigationItem
-from kivymd.uix.boxlayout import MDBoxLayout
-from screens.register import RegisterScreen
-from screens.login import LoginScreen
-from screens.home import HomeScreen
-from screens.explore import ExploreScreen
-from screens.profile import ProfileScreen
-from screens.story_detail import StoryDetailScreen
-from screens.story_form import StoryFormScreen
+from utils.startup_trace import StartupTrace
+
+# Medición del arranque (solo si SOMBRAS_STARTUP_TRACE está definida)
+StartupTrace.start()
+
+with StartupTrace.phase('imports'):
+    from kivy.lang import Builder
+    from kivymd.app import MDApp
+    from kivymd.uix.screen import MDScreen
+    from kivymd.uix.bottomnavigation import MDBottomNavigation, MDBottomNavigationItem
+    from kivymd.uix.boxlayout import MDBoxLayout
+    from models.story_sync import StorySync
+    from models.user import SessionManager, AsyncSessionManager
+    from utils.async_bridge import AsyncBridge, run_async
+    from utils.lazy_screens import LazyScreenManager, import_screen, after_first_paint
 
 class MenuScreen(MDScreen):
     """
@@ -28,11 +30,27 @@ class MainNavigationScreen(MDScreen):
     """
     Pantalla principal con navegación inferior.
     Contiene las pestañas principales de la aplicación.
+    Solo la pestaña de inicio se construye de inmediato; Explorar y Perfil
+    se construyen la primera vez que se presiona su pestaña.
     """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.build_navigation()
     
+    def add_lazy_tab(self, bottom_nav, name, text, icon, build_content):
+        """
+        Agrega una pestaña cuyo contenido se construye al presionarla.
+        """
+        item = MDBottomNavigationItem(name=name, text=text, icon=icon)
+        
+        def on_tab_press(*args):
+            item.unbind(on_tab_press=on_tab_press)
+            with StartupTrace.phase(f'tab:{name}'):
+                item.add_widget(build_content())
+        
+        item.bind(on_tab_press=on_tab_press)
+        bottom_nav.add_widget(item)
+    
     def build_navigation(self):
         """
         Construye la navegación inferior con las pestañas principales.
@@ -53,26 +71,17 @@ class MainNavigationScreen(MDScreen):
             text='Inicio',
             icon='home'
         )
-        home_item.add_widget(HomeScreen())
+        with StartupTrace.phase('tab:home'):
+            home_item.add_widget(import_screen('screens.home', 'HomeScreen')())
         bottom_nav.add_widget(home_item)
         
-        # Pestaña Explorar
-        explore_item = MDBottomNavigationItem(
-            name='explore',
-            text='Explorar',
-            icon='compass'
-        )
-        explore_item.add_widget(ExploreScreen())
-        bottom_nav.add_widget(explore_item)
-        
-        # Pestaña Perfil
-        profile_item = MDBottomNavigationItem(
-            name='profile',
-            text='Perfil',
-            icon='account'
-        )
-        profile_item.add_widget(ProfileScreen())
-        bottom_nav.add_widget(profile_item)
+        # Pestaña Explorar (se construye al abrirla)
+        self.add_lazy_tab(bottom_nav, 'explore', 'Explorar', 'compass',
+                          import_screen('screens.explore', 'ExploreScreen'))
+        
+        # Pestaña Perfil (se construye al abrirla)
+        self.add_lazy_tab(bottom_nav, 'profile', 'Perfil', 'account',
+                          import_screen('screens.profile', 'ProfileScreen'))
         
         main_layout.add_widget(bottom_nav)
         self.add_widget(main_layout)
@@ -86,6 +95,8 @@ class HistoryParanormalApp(MDApp):
         """
         Construye la aplicación con tema personalizado y configuración responsiva.
         """
+        StartupTrace.mark('build_start')
+        
         # Configurar tema personalizado
         self.theme_cls.theme_style = "Dark"  # Tema oscuro
         self.theme_cls.primary_palette = "Red"  # Color primario rojo
@@ -108,23 +119,78 @@ class HistoryParanormalApp(MDApp):
         # Título de la aplicación
         self.title = "SOMBRAS DE CHILE"
         
+        # Cargar el archivo KV principal (antes de construir las pantallas
+        # para que sus reglas se apliquen al crearlas)
+        with StartupTrace.phase('kv_load'):
+            Builder.load_file("kv/main.kv")
+        
         # Crear el gestor de pantallas
-        self.screen_manager = MDScreenManager()
+        self.screen_manager = LazyScreenManager()
+        
+        # Solo el menú se construye al iniciar; el resto se registra y se
+        # construye la primera vez que se navega a cada pantalla
+        with StartupTrace.phase('screen:menu'):
+            self.screen_manager.add_widget(MenuScreen(name='menu'))
+        self.screen_manager.register_screen('register', import_screen('screens.register', 'RegisterScreen'))
+        self.screen_manager.register_screen('login', import_screen('screens.login', 'LoginScreen'))
+        self.screen_manager.register_screen('main', MainNavigationScreen)
+        self.screen_manager.register_screen('story_detail', import_screen('screens.story_detail', 'StoryDetailScreen'))
+        self.screen_manager.register_screen('story_form', import_screen('screens.story_form', 'StoryFormScreen'))
+        
+        # Retomar la sesión guardada: se valida localmente y se entra directo
+        # a la pantalla principal; la revocación se comprueba en segundo plano
+        if SessionManager.restore_session():
+            self.screen_manager.current = 'main'
+            after_first_paint(self.verify_session)
         
-        # Agregar todas las pantallas
-        self.screen_manager.add_widget(MenuScreen(name='menu'))
-        self.screen_manager.add_widget(RegisterScreen(name='register'))
-        self.screen_manager.add_widget(LoginScreen(name='login'))
-        self.screen_manager.add_widget(MainNavigationScreen(name='main'))
-        self.screen_manager.add_widget(StoryDetailScreen(name='story_detail'))
-        self.screen_manager.add_widget(StoryFormScreen(name='story_form'))
+        # Mantener la réplica local sincronizada, sin retrasar el primer frame
+        after_first_paint(StorySync.start)
+        after_first_paint(self.start_realtime)
         
-        # Cargar el archivo KV principal
-        Builder.load_file("kv/main.kv")
+        StartupTrace.mark('build_end')
+        StartupTrace.watch_first_frame(Window)
         
         # Retorna el gestor de pantallas como raíz de la app
         return self.screen_manager
 
+    def start_realtime(self):
+        """
+        Se suscribe a los cambios de historias en tiempo real.
+        Se importa aquí para no sumar el módulo al arranque.
+        """
+        from models.story_realtime import StoryRealtime
+        run_async(StoryRealtime.start())
+    
+    def verify_session(self):
+        """
+        Comprueba con el servidor la sesión retomada al iniciar.
+        """
+        run_async(AsyncSessionManager.verify_session(), on_success=self.on_session_verified)
+    
+    def on_session_verified(self, valid):
+        """
+        Si la sesión fue revocada, vuelve a la pantalla de login.
+        """
+        if not valid:
+            self.screen_manager.current = 'login'
+    
+    def on_stop(self):
+        """
+        Detiene las tareas en segundo plano al cerrar la aplicación.
+        """
+        StorySync.stop()
+        
+        # Cerrar la suscripción antes de detener el loop (sin colgar el cierre)
+        from models.story_realtime import StoryRealtime
+        try:
+            run_async(StoryRealtime.stop()).result(timeout=1)
+        except Exception as e:
+            print(f"Error al cerrar la suscripción en tiempo real: {e}")
+        AsyncBridge.stop()
+        
+        # Reescribir el reporte para incluir las pantallas construidas después
+        StartupTrace.write_report()
+
 if __name__ == "__main__":
     # Punto de entrada principal. Inicia la app.
     HistoryParanormalApp().run()
\ No newline at end of file
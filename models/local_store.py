@@ -0,0 +1,328 @@
+"""
+local_store.py
+Réplica local en SQLite de las historias y de los nombres de sus autores.
+Permite leer historias sin conexión; se mantiene al día con StorySync.
+También guarda la sesión iniciada para retomarla al abrir la app
+(reemplaza al antiguo models/session.json).
+"""
+
+import os
+import sqlite3
+import threading
+
+# Ruta de la base local (configurable para pruebas o múltiples perfiles)
+LOCAL_DB_PATH = os.getenv(
+    'SOMBRAS_LOCAL_DB',
+    os.path.join(os.path.expanduser('~'), '.sombras_de_chile', 'stories.db')
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    excerpt TEXT,
+    word_count INTEGER,
+    category TEXT NOT NULL,
+    author_id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_local_stories_feed ON stories(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_local_stories_category_feed ON stories(category, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_local_stories_author_feed ON stories(author_id, created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_local_stories_category;
+DROP INDEX IF EXISTS idx_local_stories_author;
+
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS local_session (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    expires_at TEXT NOT NULL,
+    username TEXT,
+    email TEXT,
+    user_created_at TEXT
+);
+"""
+
+# Columnas de la proyección de listas (sin el contenido completo)
+SUMMARY_SELECT = """
+SELECT s.id, s.title, s.category, s.author_id, s.excerpt, s.word_count,
+       s.created_at, s.updated_at, u.username AS author
+FROM stories s LEFT JOIN users u ON u.id = s.author_id
+"""
+
+class LocalStoryStore:
+    """
+    Acceso a la base SQLite local.
+    Una sola conexión compartida entre hilos y protegida por un lock,
+    ya que la sincronización corre en segundo plano.
+    Las fechas se guardan como texto ISO 8601 en UTC tal como las entrega
+    Supabase, por lo que el orden lexicográfico coincide con el cronológico.
+    """
+    def __init__(self, db_path=LOCAL_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._listeners = []
+
+    def _connection(self):
+        """
+        Abre la conexión y crea el esquema la primera vez que se usa.
+        """
+        if self._conn is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def _query(self, sql, params=()):
+        """
+        Ejecuta una consulta de lectura y retorna las filas como diccionarios.
+        """
+        with self._lock:
+            rows = self._connection().execute(sql, params).fetchall()
+            return [dict(row) for row in rows]
+
+    def add_listener(self, listener):
+        """
+        Registra una función listener(filas, ids_eliminados) que se llama
+        cada vez que se aplican cambios a la réplica.
+        """
+        self._listeners.append(listener)
+
+    # --- Estado de sincronización ---
+
+    def get_state(self, key):
+        """
+        Retorna un valor del estado de sincronización o None.
+        """
+        rows = self._query('SELECT value FROM sync_state WHERE key = ?', (key,))
+        return rows[0]['value'] if rows else None
+
+    def set_state(self, key, value):
+        """
+        Guarda un valor del estado de sincronización.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    'INSERT INTO sync_state (key, value) VALUES (?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+                    (key, value)
+                )
+
+    def is_ready(self):
+        """
+        Indica si la réplica completó al menos una sincronización completa.
+        La marca de cada lote solo sirve para retomar: una primera
+        sincronización a medias tiene solo las historias más antiguas.
+        """
+        return self.get_state('initial_sync_done') == '1'
+
+    # --- Sesión local ---
+
+    def save_session(self, session, user=None):
+        """
+        Guarda la sesión actual (fila de la tabla sessions) y el perfil del usuario.
+        Solo se conserva una sesión: la anterior se reemplaza.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM local_session')
+                conn.execute(
+                    'INSERT INTO local_session (id, user_id, expires_at, username, email, user_created_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (
+                        session['id'], session['user_id'], session['expires_at'],
+                        user.username if user else None,
+                        user.email if user else None,
+                        user.created_at if user else None
+                    )
+                )
+
+    def load_session(self):
+        """
+        Retorna la sesión guardada como diccionario o None.
+        """
+        rows = self._query('SELECT * FROM local_session LIMIT 1')
+        return rows[0] if rows else None
+
+    def delete_session(self):
+        """
+        Elimina la sesión guardada.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM local_session')
+
+    # --- Escritura ---
+
+    def apply_changes(self, rows, deleted_ids=()):
+        """
+        Aplica en una transacción las filas nuevas o modificadas de Supabase
+        (con el join users(username)) y elimina las historias borradas.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                for row in rows:
+                    conn.execute(
+                        'INSERT INTO stories (id, title, content, excerpt, word_count, category, '
+                        'author_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                        'ON CONFLICT(id) DO UPDATE SET title = excluded.title, '
+                        'content = excluded.content, excerpt = excluded.excerpt, '
+                        'word_count = excluded.word_count, category = excluded.category, '
+                        'author_id = excluded.author_id, created_at = excluded.created_at, '
+                        'updated_at = excluded.updated_at',
+                        (
+                            row['id'], row['title'], row['content'], row.get('excerpt'),
+                            row.get('word_count'), row['category'], row['author_id'],
+                            row['created_at'], row['updated_at']
+                        )
+                    )
+                    author = row.get('users') or {}
+                    if author.get('username'):
+                        conn.execute(
+                            'INSERT INTO users (id, username) VALUES (?, ?) '
+                            'ON CONFLICT(id) DO UPDATE SET username = excluded.username',
+                            (row['author_id'], author['username'])
+                        )
+                conn.executemany(
+                    'DELETE FROM stories WHERE id = ?',
+                    [(story_id,) for story_id in deleted_ids]
+                )
+
+        for listener in self._listeners:
+            listener(rows, deleted_ids)
+
+    # --- Lectura ---
+
+    @staticmethod
+    def stories_sql(category=None, author_username=None, author_id=None):
+        """
+        Arma la consulta de get_stories. Retorna (sql, parámetros).
+        """
+        sql = SUMMARY_SELECT
+        params = []
+        if category:
+            sql += ' WHERE s.category = ?'
+            params.append(category)
+        elif author_username:
+            sql += ' WHERE u.username = ?'
+            params.append(author_username)
+        elif author_id:
+            sql += ' WHERE s.author_id = ?'
+            params.append(author_id)
+        sql += ' ORDER BY s.created_at DESC, s.id DESC'
+        return sql, params
+
+    @staticmethod
+    def page_sql(cursor, page_size, category=None):
+        """
+        Arma la consulta de get_page. Retorna (sql, parámetros).
+        """
+        conditions = []
+        params = []
+        if category:
+            conditions.append('s.category = ?')
+            params.append(category)
+        if cursor:
+            created_at, story_id = cursor
+            conditions.append('(s.created_at < ? OR (s.created_at = ? AND s.id < ?))')
+            params.extend([created_at, created_at, story_id])
+
+        sql = SUMMARY_SELECT
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY s.created_at DESC, s.id DESC LIMIT ?'
+        params.append(page_size)
+        return sql, params
+
+    def get_stories(self, category=None, author_username=None, author_id=None):
+        """
+        Retorna todas las historias (proyección de lista), opcionalmente filtradas.
+        """
+        return self._query(*self.stories_sql(category, author_username, author_id))
+
+    def get_page(self, cursor, page_size, category=None):
+        """
+        Retorna una página de historias con el mismo cursor (created_at, id)
+        que usa la paginación en Supabase.
+        """
+        return self._query(*self.page_sql(cursor, page_size, category))
+
+    def explain(self, sql, params=()):
+        """
+        Retorna el plan de SQLite (EXPLAIN QUERY PLAN) de una consulta,
+        una línea por paso. Lo usa tools/check_query_plans.py.
+        """
+        return [row['detail'] for row in self._query('EXPLAIN QUERY PLAN ' + sql, params)]
+
+    def get_story(self, story_id):
+        """
+        Retorna una historia completa (con contenido) o None.
+        """
+        rows = self._query(
+            'SELECT s.*, u.username AS author FROM stories s '
+            'LEFT JOIN users u ON u.id = s.author_id WHERE s.id = ?',
+            (story_id,)
+        )
+        return rows[0] if rows else None
+
+    def get_username(self, author_id):
+        """
+        Retorna el nombre de un autor conocido por la réplica o None.
+        """
+        rows = self._query('SELECT username FROM users WHERE id = ?', (author_id,))
+        return rows[0]['username'] if rows else None
+
+    def get_stories_by_ids(self, story_ids):
+        """
+        Retorna las historias (proyección de lista) en el mismo orden de los IDs.
+        """
+        if not story_ids:
+            return []
+        placeholders = ', '.join('?' for _ in story_ids)
+        rows = self._query(SUMMARY_SELECT + f' WHERE s.id IN ({placeholders})', list(story_ids))
+        rows_by_id = {row['id']: row for row in rows}
+        return [rows_by_id[story_id] for story_id in story_ids if story_id in rows_by_id]
+
+    def get_story_versions(self):
+        """
+        Retorna {id: updated_at} de todas las historias, para reconciliar
+        la réplica con el servidor.
+        """
+        return {row['id']: row['updated_at'] for row in self._query('SELECT id, updated_at FROM stories')}
+
+    def get_search_documents(self):
+        """
+        Retorna id, título y contenido de todas las historias para indexarlas.
+        """
+        return self._query('SELECT id, title, content FROM stories')
+
+_local_store = None
+
+def get_local_store():
+    """
+    Función helper para obtener la réplica local compartida.
+    """
+    global _local_store
+    if _local_store is None:
+        _local_store = LocalStoryStore()
+    return _local_store
@@ -0,0 +1,77 @@
+"""
+password_hasher.py
+Hash de contraseñas con bcrypt fuera del hilo de la interfaz.
+El costo (rounds) lo fija el servidor: login_user verifica la contraseña en
+Postgres con pgcrypto, así que cada round adicional duplica el CPU del
+servidor por login. Los hashes con otro costo se rehashean al iniciar sesión.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+
+# Mínimo seguro del costo de bcrypt
+MIN_ROUNDS = 10
+
+# Costo de todos los hashes: lo paga el servidor en cada login
+# (~100 ms de un núcleo con pgcrypto), no el dispositivo que hashea
+SERVER_ROUNDS = 11
+
+# Hilos del pool (bcrypt libera el GIL, así que los hashes corren en paralelo)
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+
+def hash_rounds(password_hash):
+    """
+    Retorna el costo con que se generó un hash bcrypt ($2b$12$...) o None.
+    """
+    try:
+        return int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+class PasswordHasher:
+    """
+    Clase estática que ejecuta bcrypt en un pool de hilos.
+    Las funciones *_sync bloquean el hilo que las llama y se usan dentro
+    del pool; submit_hash entrega un Future para no bloquear.
+    """
+    _executor = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def executor():
+        """
+        Retorna el pool de hilos compartido, creándolo la primera vez.
+        """
+        with PasswordHasher._lock:
+            if PasswordHasher._executor is None:
+                PasswordHasher._executor = ThreadPoolExecutor(
+                    max_workers=MAX_WORKERS,
+                    thread_name_prefix='bcrypt'
+                )
+            return PasswordHasher._executor
+
+    @staticmethod
+    def hash_sync(password):
+        """
+        Genera el hash de la contraseña con el costo del servidor (bloqueante).
+        """
+        salt = bcrypt.gensalt(rounds=SERVER_ROUNDS)
+        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+
+    @staticmethod
+    def submit_hash(password):
+        """
+        Genera el hash en el pool. Retorna un concurrent.futures.Future.
+        """
+        return PasswordHasher.executor().submit(PasswordHasher.hash_sync, password)
+
+    @staticmethod
+    def needs_rehash(rounds):
+        """
+        Indica si un hash tiene un costo distinto al del servidor: los más
+        bajos se suben, y los más altos (calibrados antes en cada
+        dispositivo) se bajan para no cargar el servidor en cada login.
+        """
+        return rounds is not None and rounds != SERVER_ROUNDS
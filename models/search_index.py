@@ -0,0 +1,153 @@
+"""
+search_index.py
+Índice invertido local para buscar historias sin conexión.
+Tokeniza en español (minúsculas, sin acentos, sin stopwords) y ordena con BM25.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+# Parámetros estándar de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Palabras vacías del español (ya sin acentos)
+STOPWORDS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes aqui asi aun bajo bien
+cada casi como con contra cual cuales cuando de del desde donde dos el ella ellas
+ello ellos en entre era eran eres es esa esas ese eso esos esta estaba estaban
+estar estas este esto estos fue fueron ha habia habian han hasta hay la las le
+les lo los mas me mi mis mucho muy nada ni no nos nosotros o otra otras otro otros
+para pero poco por porque que quien se sea ser si sido sin sobre solo son su sus
+tambien tan tanto te tenia tiene tu tus un una uno unos unas y ya yo
+""".split())
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def fold_accents(text):
+    """
+    Pasa el texto a minúsculas y elimina los acentos ("Aparición" -> "aparicion").
+    """
+    decomposed = unicodedata.normalize('NFD', text.lower())
+    return ''.join(char for char in decomposed if unicodedata.category(char) != 'Mn')
+
+def stem(token):
+    """
+    Reducción mínima de plurales para que "apariciones" coincida con "aparicion".
+    """
+    if len(token) > 4 and token.endswith('es') and token[-3] not in 'aeiou':
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s'):
+        return token[:-1]
+    return token
+
+def tokenize(text):
+    """
+    Convierte un texto en la lista de términos indexables.
+    """
+    return [
+        stem(token)
+        for token in TOKEN_PATTERN.findall(fold_accents(text or ''))
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+class StorySearchIndex:
+    """
+    Índice invertido BM25 sobre título y contenido de las historias.
+    Se actualiza de forma incremental al agregar, editar o eliminar historias.
+    """
+    def __init__(self):
+        self._postings = {}       # término -> {id_historia: frecuencia}
+        self._doc_terms = {}      # id_historia -> Counter de términos
+        self._doc_lengths = {}    # id_historia -> cantidad de términos
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def _remove_locked(self, story_id):
+        terms = self._doc_terms.pop(story_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(story_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[story_id]
+            if not postings:
+                del self._postings[term]
+
+    def add(self, story_id, title, content):
+        """
+        Indexa una historia, reemplazando su versión anterior si existía.
+        El título cuenta dos veces para darle más peso que al contenido.
+        """
+        terms = Counter(tokenize(title) * 2 + tokenize(content))
+        with self._lock:
+            self._remove_locked(story_id)
+            self._doc_terms[story_id] = terms
+            self._doc_lengths[story_id] = sum(terms.values())
+            self._total_length += self._doc_lengths[story_id]
+            for term, frequency in terms.items():
+                self._postings.setdefault(term, {})[story_id] = frequency
+
+    def remove(self, story_id):
+        """
+        Quita una historia del índice.
+        """
+        with self._lock:
+            self._remove_locked(story_id)
+
+    def apply_changes(self, rows, deleted_ids=()):
+        """
+        Aplica filas nuevas o modificadas y eliminaciones de la réplica local.
+        """
+        for row in rows:
+            self.add(row['id'], row.get('title'), row.get('content'))
+        for story_id in deleted_ids:
+            self.remove(story_id)
+
+    def search(self, query, limit=50):
+        """
+        Retorna los IDs de las historias más relevantes, de mayor a menor puntaje.
+        """
+        query_terms = set(tokenize(query))
+        with self._lock:
+            total_docs = len(self._doc_terms)
+            if not query_terms or not total_docs:
+                return []
+
+            average_length = self._total_length / total_docs
+            scores = Counter()
+            for term in query_terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (total_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for story_id, frequency in postings.items():
+                    length = self._doc_lengths[story_id]
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                    scores[story_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+
+        return [story_id for story_id, _ in scores.most_common(limit)]
+
+_search_index = None
+_search_index_lock = threading.Lock()
+
+def get_search_index(store):
+    """
+    Retorna el índice compartido, construyéndolo desde la réplica local
+    la primera vez y suscribiéndolo a sus cambios posteriores.
+    """
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            index = StorySearchIndex()
+            # Suscribirse antes de leer para no perder cambios concurrentes
+            store.add_listener(index.apply_changes)
+            index.apply_changes(store.get_search_documents())
+            _search_index = index
+        return _search_index
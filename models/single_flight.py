@@ -0,0 +1,114 @@
+"""
+single_flight.py
+Agrupa consultas idénticas que están en curso al mismo tiempo.
+Si una consulta con la misma clave ya se está ejecutando, los siguientes
+llamadores esperan su resultado en vez de enviar otra petición.
+Funciona con hilos (do) y con corrutinas de asyncio (do_async).
+"""
+
+import asyncio
+import threading
+
+class _Call:
+    """
+    Consulta en curso ejecutada en un hilo: los demás hilos esperan el evento.
+    """
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalescencia de consultas por clave (las mismas tuplas de StoryCache).
+    Solo agrupa mientras la consulta está en curso; el resultado no se
+    guarda después (de eso se encarga la caché).
+    """
+    def __init__(self):
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        Ejecuta fn() o, si ya hay una llamada con la misma clave en otro
+        hilo, espera y retorna su resultado (o relanza su excepción).
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, coroutine_factory):
+        """
+        Igual que do, para corrutinas. coroutine_factory() crea la corrutina
+        solo si no hay otra en curso con la misma clave. Cancelar a un
+        llamador no cancela la consulta compartida.
+        """
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is not None and not task.done():
+                self.shared += 1
+            else:
+                task = asyncio.ensure_future(coroutine_factory())
+                self._tasks[key] = task
+                task.add_done_callback(lambda finished: self._forget_task(key, finished))
+                self.executed += 1
+        return await asyncio.shield(task)
+
+    def _forget_task(self, key, task):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        # Marca la excepción como leída si nadie esperaba la tarea
+        if not task.cancelled():
+            task.exception()
+
+    def forget(self):
+        """
+        Suelta las consultas en curso: los llamadores que lleguen después
+        envían una consulta nueva. Se usa al escribir, para que nadie reciba
+        un resultado pedido antes del cambio.
+        """
+        with self._lock:
+            self._calls.clear()
+            self._tasks.clear()
+
+    def stats(self):
+        """
+        Retorna los contadores: consultas ejecutadas y llamadas que
+        reutilizaron una consulta en curso.
+        """
+        with self._lock:
+            total = self.executed + self.shared
+            return {
+                'in_flight': len(self._calls) + len(self._tasks),
+                'executed': self.executed,
+                'shared': self.shared,
+                'shared_rate': self.shared / total if total else 0.0
+            }
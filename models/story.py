@@ -7,13 +7,43 @@ Incluye clases y funciones para crear, cargar, actualizar y eliminar historias.
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.supabase_client import get_supabase_client
+from config.supabase_client import get_supabase_client, get_async_supabase_client
+from models.story_cache import StoryCache, MISSING
+from models.single_flight import SingleFlight
+from models.local_store import get_local_store
+from models.search_index import get_search_index
+from models.story_sync import StorySync
+
+# Cantidad de historias por página en el feed paginado
+PAGE_SIZE = 10
+
+# Proyección liviana para listas: sin el contenido completo de la historia.
+# El extracto y el conteo de palabras los calcula un trigger en el servidor.
+SUMMARY_COLUMNS = 'id, title, category, author_id, excerpt, word_count, created_at, updated_at'
+
+# Proyección completa para el detalle (excluye la columna search_vector)
+DETAIL_COLUMNS = f'{SUMMARY_COLUMNS}, content'
+
+# Máximo de resultados que retorna una búsqueda
+SEARCH_LIMIT = 50
+
+# Similitud mínima (0 a 1) de la búsqueda difusa por trigramas
+FUZZY_THRESHOLD = 0.3
+
+# Las búsquedas tienen su propia caché, pequeña, para que buscar mientras
+# se escribe no desaloje de la caché principal las páginas del feed
+SEARCH_KINDS = ('search', 'fuzzy')
+SEARCH_CACHE_ENTRIES = 32
+
+# Segundos durante los que se reutiliza el token de cambios leído
+# (las consultas de un mismo cambio de pestaña comparten una sola lectura)
+VERSION_TTL = 2
 
 class Story:
     """
     Representa una historia publicada por un usuario.
     """
-    def __init__(self, id, title, content, category, author_id, author_username=None, created_at=None, updated_at=None):
+    def __init__(self, id, title, content, category, author_id, author_username=None, created_at=None, updated_at=None, excerpt=None, word_count=None):
         self.id = id
         self.title = title
         self.content = content
@@ -22,6 +52,8 @@ class Story:
         self.author = author_username
         self.created_at = created_at
         self.updated_at = updated_at
+        self.excerpt = excerpt
+        self.word_count = word_count
 
     @staticmethod
     def from_dict(data):
@@ -42,58 +74,440 @@ class Story:
             author_id=data.get('author_id'),
             author_username=author_username,
             created_at=data.get('created_at'),
-            updated_at=data.get('updated_at')
+            updated_at=data.get('updated_at'),
+            excerpt=data.get('excerpt'),
+            word_count=data.get('word_count')
         )
 
     def to_dict(self):
         """
         Convierte la historia a un diccionario.
+        En las listas 'content' es None: solo se descarga al abrir el detalle.
         """
         return {
             'id': self.id,
             'title': self.title,
             'content': self.content,
+            'excerpt': self.excerpt,
+            'word_count': self.word_count,
             'category': self.category,
-            'author': self.author
+            'author_id': self.author_id,
+            'author': self.author,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
+class StoryQuery:
+    """
+    Describe una consulta de lectura de historias: su clave de caché, cómo
+    resolverla en la réplica local, cómo construirla en Supabase y cómo
+    convertir el resultado. La comparten StoryManager y AsyncStoryManager,
+    que solo difieren en cómo ejecutan la consulta remota.
+    """
+    def __init__(self, key, remote, local=None, finish=None, stories_of=None):
+        self.key = key
+        self.remote = remote
+        self.local = local
+        self.finish = finish or StoryManager._to_dicts
+        self.stories_of = stories_of or (lambda value: value)
+
 class StoryManager:
     """
     Clase estática para gestionar historias con Supabase.
+    Las lecturas usan la réplica local SQLite cuando ya fue sincronizada
+    (y Supabase mientras tanto), detrás de una caché en memoria (TTL + LRU)
+    que las operaciones de escritura invalidan de forma selectiva.
+    Las consultas idénticas simultáneas se agrupan en una sola petición.
     """
+    _cache = StoryCache()
+    _search_cache = StoryCache(max_entries=SEARCH_CACHE_ENTRIES)
+    _flights = SingleFlight()
+    # Aumenta con cada invalidación: una consulta que empezó antes no
+    # guarda su resultado (pudo leer datos anteriores a la escritura)
+    _generation = 0
+
     @staticmethod
-    def load_stories():
+    def _to_dicts(rows):
         """
-        Carga todas las historias desde Supabase con información del autor.
+        Convierte filas de Supabase en diccionarios de historia.
+        """
+        return [Story.from_dict(story_data).to_dict() for story_data in rows]
+
+    @staticmethod
+    def _cache_for(key):
+        """
+        Retorna la caché que guarda la consulta con esa clave.
+        """
+        return StoryManager._search_cache if key[0] in SEARCH_KINDS else StoryManager._cache
+
+    @staticmethod
+    def _run(query):
+        """
+        Resuelve una StoryQuery: caché, luego réplica local y luego Supabase.
+        Si la misma consulta ya está en curso en otro hilo, espera su resultado.
+        """
+        value = StoryManager._cache_for(query.key).get(query.key)
+        if value is MISSING:
+            value = StoryManager._flights.do(query.key, lambda: StoryManager._fetch(query))
+        return value
+
+    @staticmethod
+    def _fetch(query):
+        """
+        Ejecuta una StoryQuery en la réplica local o en Supabase y guarda el
+        resultado en caché. Si la consulta falla no se guarda nada, así los
+        errores de red no quedan en caché.
+        Antes de ir a Supabase consulta el token de cambios: si no cambió
+        desde que se leyó el resultado vencido, lo renueva sin descargarlo.
+        """
+        generation = StoryManager._generation
+        token = None
+        store = StoryManager._local_store() if query.local else None
+        if store:
+            rows = query.local(store)
+        else:
+            token = StoryManager._change_token()
+            value = StoryManager._renew(query.key, token)
+            if value is not MISSING:
+                return value
+            response = query.remote(get_supabase_client()).execute()
+            rows = response.data if response else None
+        value = query.finish(rows)
+        StoryManager._store(query, value, token, generation)
+        return value
+
+    @staticmethod
+    def _store(query, value, token, generation):
+        """
+        Guarda el resultado en caché, salvo que hubo una invalidación
+        desde que empezó la consulta: forget() solo evita que nuevos
+        llamadores se sumen a ella, y guardarlo traería de vuelta datos
+        anteriores a la escritura por todo el TTL.
+        """
+        if generation != StoryManager._generation:
+            return
+        StoryManager._cache_for(query.key).set(query.key, value, query.stories_of(value), token=token)
+
+    @staticmethod
+    def _invalidate(is_stale=None):
+        """
+        Invalida las entradas para las que is_stale(clave, entrada) es
+        verdadero (todas si no se indica) y descarta las consultas en curso.
+        """
+        StoryManager._generation += 1
+        StoryManager._flights.forget()
+        if is_stale is None:
+            StoryManager._cache.clear()
+            StoryManager._search_cache.clear()
+        else:
+            StoryManager._cache.invalidate(is_stale)
+            StoryManager._search_cache.invalidate(is_stale)
+
+    @staticmethod
+    def _version_query(supabase):
+        """
+        Consulta del token de cambios (el contador de stories_version).
+        """
+        return supabase.table('stories_version').select('version').eq('id', 1).maybe_single()
+
+    @staticmethod
+    def _version_of(response, error=None):
+        """
+        Extrae el token de la respuesta. Sin token (error o migración sin
+        aplicar) las consultas simplemente se descargan como antes.
+        """
+        if error is not None:
+            print(f"Error al consultar el token de cambios: {error}")
+            return None
+        return response.data['version'] if response and response.data else None
+
+    @staticmethod
+    def _change_token():
+        """
+        Retorna el token de cambios de stories, compartido por unos segundos
+        entre las consultas que vencen juntas.
+        """
+        token = StoryManager._cache.get(('version',))
+        if token is MISSING:
+            token = StoryManager._flights.do(('version',), StoryManager._fetch_change_token)
+        return token
+
+    @staticmethod
+    def _fetch_change_token():
+        """
+        Lee el token de cambios de Supabase y lo guarda por VERSION_TTL segundos.
         """
         try:
-            supabase = get_supabase_client()
-            response = supabase.table('stories').select('*, users(username)').order('created_at', desc=True).execute()
+            token = StoryManager._version_of(StoryManager._version_query(get_supabase_client()).execute())
+        except Exception as e:
+            token = StoryManager._version_of(None, e)
+        if token is not None:
+            StoryManager._cache.set(('version',), token, ttl=VERSION_TTL)
+        return token
+
+    @staticmethod
+    def _renew(key, token):
+        """
+        Si la caché tiene un resultado vencido de la consulta leído con el
+        mismo token, lo renueva y lo retorna. Si no, retorna MISSING.
+        """
+        if token is None:
+            return MISSING
+        cache = StoryManager._cache_for(key)
+        value, cached_token = cache.get_stale(key)
+        if value is MISSING or cached_token != token:
+            return MISSING
+        return value if cache.renew(key) else MISSING
+
+    @staticmethod
+    def _local_store():
+        """
+        Retorna la réplica local si ya fue sincronizada, o None para leer de Supabase.
+        """
+        try:
+            store = get_local_store()
+            return store if store.is_ready() else None
+        except Exception as e:
+            print(f"Error al abrir la réplica local: {e}")
+            return None
+
+    @staticmethod
+    def _apply_local(rows, deleted_ids=()):
+        """
+        Refleja una escritura propia en la réplica local sin esperar a la sincronización.
+        """
+        try:
+            store = StoryManager._local_store()
+            if store:
+                store.apply_changes(rows, deleted_ids)
+        except Exception as e:
+            print(f"Error al actualizar la réplica local: {e}")
+
+    @staticmethod
+    def _on_sync_changes(rows, deleted_ids):
+        """
+        Vacía la caché cuando la sincronización trae cambios de otros usuarios.
+        """
+        StoryManager._invalidate()
+
+    @staticmethod
+    def cache_stats():
+        """
+        Retorna los contadores de aciertos y fallos de la caché de historias
+        (los de la caché de búsquedas van en 'search').
+        """
+        stats = StoryManager._cache.stats()
+        stats['search'] = StoryManager._search_cache.stats()
+        return stats
+
+    @staticmethod
+    def flight_stats():
+        """
+        Retorna cuántas consultas se enviaron y cuántas llamadas reutilizaron
+        una consulta idéntica que ya estaba en curso.
+        """
+        return StoryManager._flights.stats()
+
+    @staticmethod
+    def _apply_cursor(query, cursor):
+        """
+        Aplica el orden (created_at, id) descendente y, si hay cursor,
+        filtra las filas posteriores a él. El id desempata historias
+        publicadas en el mismo instante.
+        """
+        if cursor:
+            created_at, story_id = cursor
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt.{story_id})'
+            )
+        return query.order('created_at', desc=True).order('id', desc=True)
+
+    @staticmethod
+    def _next_cursor(stories, page_size):
+        """
+        Calcula el cursor de la siguiente página a partir de la última historia.
+        Retorna None si la página vino incompleta (no quedan más historias).
+        """
+        if len(stories) < page_size:
+            return None
+        last_story = stories[-1]
+        return (last_story['created_at'], last_story['id'])
+
+    # --- Consultas de lectura (compartidas con AsyncStoryManager) ---
+
+    @staticmethod
+    def _all_query():
+        """
+        Consulta de todas las historias (proyección de lista).
+        """
+        return StoryQuery(
+            key=('all',),
+            local=lambda store: store.get_stories(),
+            remote=lambda supabase: supabase.table('stories').select(f'{SUMMARY_COLUMNS}, users(username)').order('created_at', desc=True)
+        )
+
+    @staticmethod
+    def _page_query(cursor, page_size, category):
+        """
+        Consulta de una página del feed por cursor (created_at, id).
+        """
+        def remote(supabase):
+            query = supabase.table('stories').select(f'{SUMMARY_COLUMNS}, users(username)')
+            if category:
+                query = query.eq('category', category)
+            return StoryManager._apply_cursor(query, cursor).limit(page_size)
+
+        def finish(rows):
+            stories = StoryManager._to_dicts(rows)
+            return stories, StoryManager._next_cursor(stories, page_size)
+
+        return StoryQuery(
+            key=('page', category, cursor, page_size),
+            local=lambda store: store.get_page(cursor, page_size, category),
+            remote=remote,
+            finish=finish,
+            stories_of=lambda page: page[0]
+        )
+
+    @staticmethod
+    def _story_query(story_id):
+        """
+        Consulta de una historia completa por su ID.
+        """
+        return StoryQuery(
+            key=('story', story_id),
+            local=lambda store: store.get_story(story_id),
+            remote=lambda supabase: supabase.table('stories').select(f'{DETAIL_COLUMNS}, users(username)').eq('id', story_id).maybe_single(),
+            finish=lambda data: Story.from_dict(data) if data else None,
+            stories_of=lambda story: [story.to_dict()] if story else []
+        )
+
+    @staticmethod
+    def _author_query(author_username):
+        """
+        Consulta de las historias de un autor.
+        """
+        return StoryQuery(
+            key=('author', author_username),
+            local=lambda store: store.get_stories(author_username=author_username),
+            remote=lambda supabase: supabase.table('stories').select(f'{SUMMARY_COLUMNS}, users!inner(username)').eq('users.username', author_username).order('created_at', desc=True)
+        )
 
-            stories = []
-            for story_data in response.data:
-                story = Story.from_dict(story_data)
-                stories.append(story.to_dict())
+    @staticmethod
+    def _author_id_query(author_id):
+        """
+        Consulta de las historias de un autor por su ID (filtrada en el servidor).
+        """
+        return StoryQuery(
+            key=('author_id', author_id),
+            local=lambda store: store.get_stories(author_id=author_id),
+            remote=lambda supabase: supabase.table('stories').select(f'{SUMMARY_COLUMNS}, users(username)').eq('author_id', author_id).order('created_at', desc=True)
+        )
 
-            return stories
+    @staticmethod
+    def _author_stats_from_row(row):
+        """
+        Convierte una fila de author_stats en el diccionario de estadísticas.
+        Un autor sin historias no tiene fila: sus estadísticas son cero.
+        """
+        row = row or {}
+        return {
+            'story_count': row.get('story_count', 0),
+            'last_published_at': row.get('last_published_at'),
+            'category_counts': row.get('category_counts') or {}
+        }
+
+    @staticmethod
+    def _author_stats_query(author_id):
+        """
+        Consulta de las estadísticas de un autor (tabla author_stats).
+        """
+        return StoryQuery(
+            key=('stats', author_id),
+            remote=lambda supabase: supabase.table('author_stats').select('story_count, last_published_at, category_counts').eq('author_id', author_id).maybe_single(),
+            finish=StoryManager._author_stats_from_row,
+            stories_of=lambda stats: []
+        )
+
+    @staticmethod
+    def _category_query(category):
+        """
+        Consulta de las historias de una categoría.
+        """
+        return StoryQuery(
+            key=('category', category),
+            local=lambda store: store.get_stories(category=category),
+            remote=lambda supabase: supabase.table('stories').select(f'{SUMMARY_COLUMNS}, users(username)').eq('category', category).order('created_at', desc=True)
+        )
+
+    @staticmethod
+    def _search_query(query, limit):
+        """
+        Búsqueda por relevancia: BM25 local o texto completo en Supabase.
+        """
+        return StoryQuery(
+            key=('search', query, limit),
+            local=lambda store: store.get_stories_by_ids(get_search_index(store).search(query, limit)),
+            remote=lambda supabase: supabase.rpc('search_stories', {
+                'search_query': query,
+                'max_results': limit
+            })
+        )
+
+    @staticmethod
+    def _fuzzy_query(query, threshold, limit):
+        """
+        Búsqueda difusa por trigramas (solo en Supabase).
+        """
+        return StoryQuery(
+            key=('fuzzy', query, threshold, limit),
+            remote=lambda supabase: supabase.rpc('fuzzy_search_stories', {
+                'search_query': query,
+                'min_similarity': threshold,
+                'max_results': limit
+            })
+        )
+
+    # --- API pública ---
+
+    @staticmethod
+    def load_stories():
+        """
+        Carga todas las historias desde Supabase con información del autor.
+        """
+        try:
+            return StoryManager._run(StoryManager._all_query())
 
         except Exception as e:
             print(f"Error al cargar historias: {e}")
             return []
 
     @staticmethod
-    def get_story_by_id(story_id):
+    def get_stories_page(cursor=None, page_size=PAGE_SIZE, category=None):
         """
-        Obtiene una historia específica por su ID.
+        Obtiene una página de historias, de la más reciente a la más antigua.
+        Usa paginación por cursor (created_at, id), por lo que cada página
+        cuesta lo mismo sin importar el tamaño de la tabla.
+        Retorna una tupla (historias, siguiente_cursor); el cursor es None
+        cuando no quedan más páginas. Si la consulta falla retorna None, así
+        quien llama conserva su cursor y puede reintentar.
         """
         try:
-            supabase = get_supabase_client()
-            response = supabase.table('stories').select('*, users(username)').eq('id', story_id).maybeSingle().execute()
+            return StoryManager._run(StoryManager._page_query(cursor, page_size, category))
 
-            if response.data:
-                return Story.from_dict(response.data)
+        except Exception as e:
+            print(f"Error al cargar página de historias: {e}")
             return None
 
+    @staticmethod
+    def get_story_by_id(story_id):
+        """
+        Obtiene una historia específica por su ID, con su contenido completo.
+        """
+        try:
+            return StoryManager._run(StoryManager._story_query(story_id))
+
         except Exception as e:
             print(f"Error al obtener historia: {e}")
             return None
@@ -104,60 +518,155 @@ class StoryManager:
         Obtiene todas las historias de un autor específico.
         """
         try:
-            supabase = get_supabase_client()
-            response = supabase.table('stories').select('*, users!inner(username)').eq('users.username', author_username).order('created_at', desc=True).execute()
+            return StoryManager._run(StoryManager._author_query(author_username))
 
-            stories = []
-            for story_data in response.data:
-                story = Story.from_dict(story_data)
-                stories.append(story.to_dict())
+        except Exception as e:
+            print(f"Error al obtener historias del autor: {e}")
+            return []
 
-            return stories
+    @staticmethod
+    def get_stories_by_author_id(author_id):
+        """
+        Obtiene las historias de un autor por su ID, más recientes primero.
+        Retorna None si la consulta falla (distinto de un autor sin historias).
+        """
+        try:
+            return StoryManager._run(StoryManager._author_id_query(author_id))
 
         except Exception as e:
             print(f"Error al obtener historias del autor: {e}")
-            return []
+            return None
 
     @staticmethod
-    def get_stories_by_category(category):
+    def get_author_stats(author_id):
         """
-        Obtiene todas las historias de una categoría específica.
+        Obtiene las estadísticas de un autor: story_count, last_published_at
+        y category_counts. Las mantiene un trigger en el servidor, así que
+        no depende de la cantidad de historias.
         """
         try:
-            supabase = get_supabase_client()
-            response = supabase.table('stories').select('*, users(username)').eq('category', category).order('created_at', desc=True).execute()
+            return StoryManager._run(StoryManager._author_stats_query(author_id))
 
-            stories = []
-            for story_data in response.data:
-                story = Story.from_dict(story_data)
-                stories.append(story.to_dict())
+        except Exception as e:
+            print(f"Error al obtener estadísticas del autor: {e}")
+            return StoryManager._author_stats_from_row(None)
 
-            return stories
+    @staticmethod
+    def get_stories_by_category(category):
+        """
+        Obtiene todas las historias de una categoría específica.
+        """
+        try:
+            return StoryManager._run(StoryManager._category_query(category))
 
         except Exception as e:
             print(f"Error al obtener historias por categoría: {e}")
             return []
 
     @staticmethod
-    def search_stories(query):
+    def search_stories(query, limit=SEARCH_LIMIT):
         """
-        Busca historias por título o contenido.
+        Busca historias por título o contenido, ordenadas por relevancia.
+        Con la réplica local sincronizada responde sin red usando un índice
+        BM25 en memoria; si no, usa la búsqueda de texto completo de Supabase
+        (sin acentos y con stemming) sobre un índice GIN.
         """
         try:
-            supabase = get_supabase_client()
-            response = supabase.table('stories').select('*, users(username)').or_(f'title.ilike.%{query}%,content.ilike.%{query}%').order('created_at', desc=True).execute()
+            return StoryManager._run(StoryManager._search_query(query, limit))
 
-            stories = []
-            for story_data in response.data:
-                story = Story.from_dict(story_data)
-                stories.append(story.to_dict())
+        except Exception as e:
+            print(f"Error al buscar historias: {e}")
+            return []
 
-            return stories
+    @staticmethod
+    def fuzzy_search_stories(query, threshold=FUZZY_THRESHOLD, limit=SEARCH_LIMIT):
+        """
+        Busca historias cuyo título o autor se parezca a la búsqueda,
+        tolerando errores de ortografía ("yorona" encuentra "La Llorona").
+        Usa índices de trigramas en Supabase y ordena por similitud.
+        """
+        try:
+            return StoryManager._run(StoryManager._fuzzy_query(query, threshold, limit))
 
         except Exception as e:
-            print(f"Error al buscar historias: {e}")
+            print(f"Error en búsqueda difusa: {e}")
             return []
 
+    @staticmethod
+    def _invalidate_new_story(category, author_id):
+        """
+        Invalida las consultas en las que aparece una historia recién creada:
+        las primeras páginas y listas completas del feed, de su categoría,
+        de su autor y todas las búsquedas. Las páginas siguientes del feed
+        siguen siendo válidas porque el cursor es estable.
+        """
+        def is_stale(key, entry):
+            kind = key[0]
+            if kind in ('all', 'search', 'fuzzy'):
+                return True
+            if kind == 'page':
+                return key[2] is None and key[1] in (None, category)
+            if kind == 'category':
+                return key[1] == category
+            if kind == 'author':
+                # Una lista vacía pudo ser de este autor antes de publicar
+                return not entry.stories or any(s.get('author_id') == author_id for s in entry.stories)
+            if kind in ('author_id', 'stats'):
+                return key[1] == author_id
+            return False
+
+        StoryManager._invalidate(is_stale)
+
+    @staticmethod
+    def _invalidate_changed_story(story_id, category=None):
+        """
+        Invalida las consultas que contienen la historia modificada o eliminada.
+        Si cambió de categoría, también las listas de la categoría nueva
+        y las búsquedas, ya que su texto pudo cambiar.
+        """
+        def is_stale(key, entry):
+            if entry.contains_story(story_id):
+                return True
+            kind = key[0]
+            # Las estadísticas no guardan historias: cualquier cambio puede afectarlas
+            if kind == 'stats':
+                return True
+            if category is None:
+                return False
+            if kind in ('search', 'fuzzy'):
+                return True
+            if kind == 'page':
+                return key[1] == category
+            if kind == 'category':
+                return key[1] == category
+            return False
+
+        StoryManager._invalidate(is_stale)
+
+    @staticmethod
+    def _after_add(rows, category, author_id):
+        """
+        Aplica una historia recién publicada a la réplica y a la caché.
+        """
+        StoryManager._apply_local(rows)
+        StoryManager._invalidate_new_story(category, author_id)
+
+    @staticmethod
+    def _after_update(rows, story_id, category):
+        """
+        Aplica una historia modificada a la réplica y a la caché.
+        """
+        StoryManager._apply_local(rows)
+        StoryManager._invalidate_changed_story(story_id, category)
+
+    @staticmethod
+    def _after_delete(story_id):
+        """
+        Quita una historia eliminada de la réplica y de la caché.
+        """
+        StoryManager._apply_local([], [story_id])
+        StoryManager._invalidate_changed_story(story_id)
+
     @staticmethod
     def add_story(title, content, category, author_id):
         """
@@ -176,6 +685,7 @@ class StoryManager:
             response = supabase.table('stories').insert(new_story).execute()
 
             if response.data:
+                StoryManager._after_add(response.data, category, author_id)
                 return True, 'Historia publicada exitosamente.'
             return False, 'Error al publicar historia.'
 
@@ -200,6 +710,7 @@ class StoryManager:
             response = supabase.table('stories').update(updated_story).eq('id', story_id).execute()
 
             if response.data:
+                StoryManager._after_update(response.data, story_id, category)
                 return True, 'Historia actualizada exitosamente.'
             return False, 'Error al actualizar historia.'
 
@@ -217,9 +728,276 @@ class StoryManager:
             response = supabase.table('stories').delete().eq('id', story_id).execute()
 
             if response.data:
+                StoryManager._after_delete(story_id)
+                return True, 'Historia eliminada exitosamente.'
+            return False, 'Error al eliminar historia.'
+
+        except Exception as e:
+            print(f"Error al eliminar historia: {e}")
+            return False, f'Error al eliminar historia: {str(e)}'
+
+class AsyncStoryManager:
+    """
+    Variante asíncrona de StoryManager sobre el cliente asíncrono de Supabase.
+    Comparte la caché, la réplica local y las consultas de StoryManager;
+    sus métodos se ejecutan con utils.async_bridge para no bloquear la interfaz.
+    """
+    @staticmethod
+    async def _run(query):
+        """
+        Igual que StoryManager._run, pero esperando la consulta remota.
+        Las corrutinas que piden la misma consulta a la vez comparten una sola.
+        """
+        value = StoryManager._cache_for(query.key).get(query.key)
+        if value is MISSING:
+            value = await StoryManager._flights.do_async(query.key, lambda: AsyncStoryManager._fetch(query))
+        return value
+
+    @staticmethod
+    async def _fetch(query):
+        """
+        Igual que StoryManager._fetch, pero esperando la consulta remota.
+        """
+        generation = StoryManager._generation
+        token = None
+        store = StoryManager._local_store() if query.local else None
+        if store:
+            rows = query.local(store)
+        else:
+            token = await AsyncStoryManager._change_token()
+            value = StoryManager._renew(query.key, token)
+            if value is not MISSING:
+                return value
+            supabase = await get_async_supabase_client()
+            response = await query.remote(supabase).execute()
+            rows = response.data if response else None
+        value = query.finish(rows)
+        StoryManager._store(query, value, token, generation)
+        return value
+
+    @staticmethod
+    async def _change_token():
+        """
+        Igual que StoryManager._change_token, pero esperando la consulta.
+        """
+        token = StoryManager._cache.get(('version',))
+        if token is MISSING:
+            token = await StoryManager._flights.do_async(('version',), AsyncStoryManager._fetch_change_token)
+        return token
+
+    @staticmethod
+    async def _fetch_change_token():
+        """
+        Igual que StoryManager._fetch_change_token, con el cliente asíncrono.
+        """
+        try:
+            supabase = await get_async_supabase_client()
+            token = StoryManager._version_of(await StoryManager._version_query(supabase).execute())
+        except Exception as e:
+            token = StoryManager._version_of(None, e)
+        if token is not None:
+            StoryManager._cache.set(('version',), token, ttl=VERSION_TTL)
+        return token
+
+    @staticmethod
+    async def load_stories():
+        """
+        Carga todas las historias con información del autor.
+        """
+        try:
+            return await AsyncStoryManager._run(StoryManager._all_query())
+
+        except Exception as e:
+            print(f"Error al cargar historias: {e}")
+            return []
+
+    @staticmethod
+    async def get_stories_page(cursor=None, page_size=PAGE_SIZE, category=None):
+        """
+        Obtiene una página del feed. Retorna (historias, siguiente_cursor),
+        o None si la consulta falla.
+        """
+        try:
+            return await AsyncStoryManager._run(StoryManager._page_query(cursor, page_size, category))
+
+        except Exception as e:
+            print(f"Error al cargar página de historias: {e}")
+            return None
+
+    @staticmethod
+    async def get_story_by_id(story_id):
+        """
+        Obtiene una historia específica por su ID, con su contenido completo.
+        """
+        try:
+            return await AsyncStoryManager._run(StoryManager._story_query(story_id))
+
+        except Exception as e:
+            print(f"Error al obtener historia: {e}")
+            return None
+
+    @staticmethod
+    async def get_full_stories(story_ids):
+        """
+        Obtiene varias historias con su contenido completo en una consulta.
+        No pasa por la caché: la usa StoryPrefetcher, que guarda el
+        contenido con su propio presupuesto de memoria.
+        """
+        try:
+            store = StoryManager._local_store()
+            if store:
+                rows = [row for row in (store.get_story(story_id) for story_id in story_ids) if row]
+            else:
+                supabase = await get_async_supabase_client()
+                response = await supabase.table('stories').select(f'{DETAIL_COLUMNS}, users(username)').in_('id', list(story_ids)).execute()
+                rows = response.data if response else []
+            return StoryManager._to_dicts(rows or [])
+
+        except Exception as e:
+            print(f"Error al obtener historias completas: {e}")
+            return []
+
+    @staticmethod
+    async def get_stories_by_author_id(author_id):
+        """
+        Obtiene las historias de un autor por su ID, más recientes primero.
+        Retorna None si la consulta falla (distinto de un autor sin historias).
+        """
+        try:
+            return await AsyncStoryManager._run(StoryManager._author_id_query(author_id))
+
+        except Exception as e:
+            print(f"Error al obtener historias del autor: {e}")
+            return None
+
+    @staticmethod
+    async def get_author_stats(author_id):
+        """
+        Obtiene las estadísticas de un autor (tabla author_stats).
+        """
+        try:
+            return await AsyncStoryManager._run(StoryManager._author_stats_query(author_id))
+
+        except Exception as e:
+            print(f"Error al obtener estadísticas del autor: {e}")
+            return StoryManager._author_stats_from_row(None)
+
+    @staticmethod
+    async def get_stories_by_author(author_username):
+        """
+        Obtiene todas las historias de un autor específico.
+        """
+        try:
+            return await AsyncStoryManager._run(StoryManager._author_query(author_username))
+
+        except Exception as e:
+            print(f"Error al obtener historias del autor: {e}")
+            return []
+
+    @staticmethod
+    async def get_stories_by_category(category):
+        """
+        Obtiene todas las historias de una categoría específica.
+        """
+        try:
+            return await AsyncStoryManager._run(StoryManager._category_query(category))
+
+        except Exception as e:
+            print(f"Error al obtener historias por categoría: {e}")
+            return []
+
+    @staticmethod
+    async def search_stories(query, limit=SEARCH_LIMIT):
+        """
+        Busca historias por título o contenido, ordenadas por relevancia.
+        """
+        try:
+            return await AsyncStoryManager._run(StoryManager._search_query(query, limit))
+
+        except Exception as e:
+            print(f"Error al buscar historias: {e}")
+            return []
+
+    @staticmethod
+    async def fuzzy_search_stories(query, threshold=FUZZY_THRESHOLD, limit=SEARCH_LIMIT):
+        """
+        Búsqueda difusa por similitud de trigramas en título y autor.
+        """
+        try:
+            return await AsyncStoryManager._run(StoryManager._fuzzy_query(query, threshold, limit))
+
+        except Exception as e:
+            print(f"Error en búsqueda difusa: {e}")
+            return []
+
+    @staticmethod
+    async def add_story(title, content, category, author_id):
+        """
+        Agrega una nueva historia a Supabase.
+        """
+        try:
+            supabase = await get_async_supabase_client()
+
+            new_story = {
+                'title': title,
+                'content': content,
+                'category': category,
+                'author_id': author_id
+            }
+
+            response = await supabase.table('stories').insert(new_story).execute()
+
+            if response.data:
+                StoryManager._after_add(response.data, category, author_id)
+                return True, 'Historia publicada exitosamente.'
+            return False, 'Error al publicar historia.'
+
+        except Exception as e:
+            print(f"Error al agregar historia: {e}")
+            return False, f'Error al publicar historia: {str(e)}'
+
+    @staticmethod
+    async def update_story(story_id, title, content, category):
+        """
+        Actualiza una historia existente.
+        """
+        try:
+            supabase = await get_async_supabase_client()
+
+            updated_story = {
+                'title': title,
+                'content': content,
+                'category': category
+            }
+
+            response = await supabase.table('stories').update(updated_story).eq('id', story_id).execute()
+
+            if response.data:
+                StoryManager._after_update(response.data, story_id, category)
+                return True, 'Historia actualizada exitosamente.'
+            return False, 'Error al actualizar historia.'
+
+        except Exception as e:
+            print(f"Error al actualizar historia: {e}")
+            return False, f'Error al actualizar historia: {str(e)}'
+
+    @staticmethod
+    async def delete_story(story_id):
+        """
+        Elimina una historia.
+        """
+        try:
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('stories').delete().eq('id', story_id).execute()
+
+            if response.data:
+                StoryManager._after_delete(story_id)
                 return True, 'Historia eliminada exitosamente.'
             return False, 'Error al eliminar historia.'
 
         except Exception as e:
             print(f"Error al eliminar historia: {e}")
             return False, f'Error al eliminar historia: {str(e)}'
+
+# Las sincronizaciones con cambios invalidan la caché de consultas
+StorySync.add_listener(StoryManager._on_sync_changes)
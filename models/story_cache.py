@@ -0,0 +1,138 @@
+"""
+story_cache.py
+Caché en memoria para las consultas de historias.
+Combina expiración por TTL, desalojo LRU acotado e invalidación selectiva.
+Las entradas vencidas se conservan (hasta que el LRU las desaloje) para
+poder renovarlas si el token de cambios del servidor sigue igual.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Marcador para distinguir "no está en caché" de un valor vacío
+MISSING = object()
+
+class CacheEntry:
+    """
+    Valor almacenado en la caché junto a su expiración, las historias que
+    contiene y el token de cambios con que se leyó (o None).
+    """
+    def __init__(self, value, expires_at, stories, token=None):
+        self.value = value
+        self.expires_at = expires_at
+        self.stories = stories
+        self.token = token
+
+    def contains_story(self, story_id):
+        """
+        Indica si la entrada incluye la historia con el ID dado.
+        """
+        return any(story.get('id') == story_id for story in self.stories)
+
+class StoryCache:
+    """
+    Caché LRU con TTL para resultados de consultas de historias.
+    Las claves son tuplas que describen la consulta, por ejemplo
+    ('category', 'Apariciones') o ('search', 'llorona').
+    """
+    def __init__(self, max_entries=128, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.renewals = 0
+
+    def get(self, key):
+        """
+        Retorna el valor asociado a la clave o MISSING si no existe o expiró.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= time.monotonic():
+                self.misses += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.value
+
+    def get_stale(self, key):
+        """
+        Retorna (valor, token) de la entrada aunque haya expirado,
+        o (MISSING, None) si no existe.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING, None
+            return entry.value, entry.token
+
+    def renew(self, key):
+        """
+        Vuelve a dar un TTL completo a una entrada que sigue vigente según
+        el servidor. Retorna False si la entrada ya no existe.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            entry.expires_at = time.monotonic() + self.ttl
+            self._entries.move_to_end(key)
+            self.renewals += 1
+            return True
+
+    def set(self, key, value, stories=(), token=None, ttl=None):
+        """
+        Guarda un valor. 'stories' son los diccionarios de historias que
+        contiene, usados para invalidar la entrada cuando alguna cambia;
+        'token' es el token de cambios leído antes de la consulta.
+        """
+        with self._lock:
+            expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._entries[key] = CacheEntry(value, expires_at, list(stories), token)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, predicate):
+        """
+        Elimina las entradas para las que predicate(clave, entrada) es verdadero.
+        Retorna la cantidad de entradas eliminadas.
+        """
+        with self._lock:
+            stale_keys = [key for key, entry in self._entries.items() if predicate(key, entry)]
+            for key in stale_keys:
+                del self._entries[key]
+            self.invalidations += len(stale_keys)
+            return len(stale_keys)
+
+    def clear(self):
+        """
+        Vacía la caché completa.
+        """
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Retorna los contadores de la caché para verificar su efectividad.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'renewals': self.renewals
+            }
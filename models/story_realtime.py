@@ -0,0 +1,305 @@
+"""
+story_realtime.py
+Suscripción a los cambios de la tabla stories por Supabase Realtime.
+Cada INSERT, UPDATE o DELETE se aplica a la réplica local, a la caché y al
+índice de búsqueda, y se avisa a las pantallas para que actualicen solo las
+cards afectadas. Al reconectarse se recupera lo perdido con una
+sincronización incremental (StorySync).
+El transporte es intercambiable: por defecto usa el Realtime de Supabase,
+o el servidor indicado en SOMBRAS_REALTIME_URL (p. ej. tools/realtime_standin.py).
+"""
+
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.supabase_client import get_async_supabase_client
+from models.local_store import get_local_store
+from models.story import Story, StoryManager
+from models.story_sync import StorySync, SYNC_COLUMNS
+
+# Canal de Realtime de la app
+CHANNEL_NAME = 'stories-changes'
+
+# Servidor Realtime alternativo, p. ej. ws://localhost:4000/realtime/v1
+REALTIME_URL = os.getenv('SOMBRAS_REALTIME_URL')
+
+# Columnas que debe traer un registro para aplicarlo sin consultar el servidor
+STORY_COLUMNS = ('id', 'title', 'content', 'excerpt', 'word_count', 'category', 'author_id', 'created_at', 'updated_at')
+
+# Segundos de espera para agrupar en una consulta los registros incompletos
+FETCH_DELAY = 0.2
+
+def parse_change(payload):
+    """
+    Normaliza un mensaje postgres_changes.
+    Retorna (tipo, registro, registro_anterior). Acepta el formato del
+    protocolo ('type', 'record', 'old_record' dentro de 'data') y el que
+    entregan las versiones nuevas del cliente ('eventType', 'new', 'old').
+    """
+    data = payload.get('data', payload)
+    kind = data.get('type') or data.get('eventType')
+    record = data.get('record') or data.get('new') or {}
+    old_record = data.get('old_record') or data.get('old') or {}
+    return kind, record, old_record
+
+class SupabaseRealtimeTransport:
+    """
+    Transporte sobre el cliente Realtime de Supabase.
+    Con 'url' se conecta directo a ese servidor en vez del del proyecto.
+    """
+    def __init__(self, url=REALTIME_URL, key=None):
+        self.url = url
+        self.key = key or os.getenv('VITE_SUPABASE_SUPABASE_ANON_KEY', '')
+        self._client = None
+        self._channel = None
+
+    async def _realtime_client(self):
+        """
+        Retorna el cliente Realtime conectado.
+        """
+        if self.url:
+            from realtime import AsyncRealtimeClient
+            client = AsyncRealtimeClient(self.url, self.key)
+        else:
+            supabase = await get_async_supabase_client()
+            client = supabase.realtime
+        if not client.is_connected:
+            await client.connect()
+        return client
+
+    async def subscribe(self, on_change, on_status):
+        """
+        Se suscribe a los cambios de stories.
+        on_change(mensaje) recibe cada cambio y on_status(estado, error)
+        cada cambio de estado del canal ('SUBSCRIBED', 'CLOSED', ...).
+        """
+        self._client = await self._realtime_client()
+        self._channel = self._client.channel(CHANNEL_NAME)
+        self._channel.on_postgres_changes('*', schema='public', table='stories', callback=on_change)
+        await self._channel.subscribe(
+            lambda status, error=None: on_status(getattr(status, 'value', status), error)
+        )
+
+    async def close(self):
+        """
+        Cierra el canal (y la conexión, si es propia).
+        """
+        if self._channel is not None:
+            await self._channel.unsubscribe()
+            self._channel = None
+        if self.url and self._client is not None:
+            await self._client.close()
+        self._client = None
+
+class StoryRealtime:
+    """
+    Clase estática que aplica los cambios en tiempo real de stories.
+    Corre en el loop de utils.async_bridge; los listeners se llaman en ese
+    hilo, así que las pantallas deben pasar al hilo de Kivy para tocar widgets.
+    """
+    _transport = None
+    _listeners = []
+    _pending = {}
+    _deleted = set()
+    _fetch_task = None
+    _live = False
+    _subscribed_before = False
+
+    @staticmethod
+    def add_listener(listener):
+        """
+        Registra una función listener(tipo, historia).
+        'tipo' es 'insert', 'update' o 'delete' (la historia solo trae 'id'),
+        o 'resync' (historia None) tras reconectarse: la pantalla debe
+        recargar porque pudo perder cambios.
+        """
+        StoryRealtime._listeners.append(listener)
+
+    @staticmethod
+    def is_live():
+        """
+        Indica si la suscripción está activa (los cambios llegan solos).
+        """
+        return StoryRealtime._live
+
+    @staticmethod
+    async def start(transport=None):
+        """
+        Inicia la suscripción. Retorna True si se pudo suscribir.
+        """
+        if StoryRealtime._transport is not None:
+            return True
+
+        StoryRealtime._transport = transport or SupabaseRealtimeTransport()
+        try:
+            await StoryRealtime._transport.subscribe(StoryRealtime._on_change, StoryRealtime._on_status)
+            return True
+
+        except Exception as e:
+            print(f"Error al suscribirse a los cambios de historias: {e}")
+            StoryRealtime._transport = None
+            return False
+
+    @staticmethod
+    async def stop():
+        """
+        Termina la suscripción.
+        """
+        transport = StoryRealtime._transport
+        StoryRealtime._transport = None
+        StoryRealtime._live = False
+        StoryRealtime._subscribed_before = False
+        if transport is None:
+            return
+        try:
+            await transport.close()
+        except Exception as e:
+            print(f"Error al cerrar la suscripción de historias: {e}")
+
+    @staticmethod
+    def _notify(kind, story):
+        for listener in StoryRealtime._listeners:
+            try:
+                listener(kind, story)
+            except Exception as e:
+                print(f"Error al notificar un cambio de historia: {e}")
+
+    @staticmethod
+    def _on_status(status, error=None):
+        """
+        Sigue el estado del canal. Cada suscripción después de la primera
+        es una reconexión: se recupera lo perdido con una sincronización.
+        """
+        if status != 'SUBSCRIBED':
+            StoryRealtime._live = False
+            if error:
+                print(f"Canal de historias {status}: {error}")
+            return
+
+        StoryRealtime._live = True
+        if StoryRealtime._subscribed_before:
+            asyncio.ensure_future(StoryRealtime._resync())
+        StoryRealtime._subscribed_before = True
+
+    @staticmethod
+    async def _resync():
+        """
+        Descarga los cambios perdidos mientras el canal estuvo caído y pide
+        a las pantallas que recarguen.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, StorySync.sync)
+        # Lo consultado a Supabase durante la caída pudo quedar desactualizado
+        StoryManager._on_sync_changes([], [])
+        StoryRealtime._notify('resync', None)
+
+    @staticmethod
+    def _on_change(payload):
+        """
+        Aplica un cambio recibido por el canal.
+        """
+        try:
+            kind, record, old_record = parse_change(payload)
+
+            if kind == 'DELETE':
+                story_id = old_record.get('id')
+                if story_id:
+                    StoryRealtime._forget_pending(story_id)
+                    StoryManager._after_delete(story_id)
+                    StoryRealtime._notify('delete', {'id': story_id})
+                return
+
+            if kind not in ('INSERT', 'UPDATE') or not record.get('id'):
+                return
+
+            row = StoryRealtime._complete_row(record)
+            if row:
+                StoryRealtime._apply(kind, row)
+            else:
+                StoryRealtime._queue_fetch(record['id'], kind)
+
+        except Exception as e:
+            print(f"Error al aplicar un cambio de historia: {e}")
+
+    @staticmethod
+    def _complete_row(record):
+        """
+        Convierte el registro en una fila como las de Supabase (con
+        users(username)). Retorna None si le faltan columnas (Realtime omite
+        los valores grandes) o si el autor no está en la réplica local.
+        """
+        if not all(column in record for column in STORY_COLUMNS):
+            return None
+        try:
+            username = get_local_store().get_username(record['author_id'])
+        except Exception as e:
+            print(f"Error al leer el autor de la réplica local: {e}")
+            return None
+        if not username:
+            return None
+
+        row = {column: record[column] for column in STORY_COLUMNS}
+        row['users'] = {'username': username}
+        return row
+
+    @staticmethod
+    def _apply(kind, row):
+        """
+        Aplica la fila a la réplica y la caché y avisa a las pantallas.
+        """
+        if kind == 'INSERT':
+            StoryManager._after_add([row], row['category'], row['author_id'])
+        else:
+            StoryManager._after_update([row], row['id'], row['category'])
+        StoryRealtime._notify(kind.lower(), Story.from_dict(row).to_dict())
+
+    @staticmethod
+    def _queue_fetch(story_id, kind):
+        """
+        Encola una historia para consultarla completa. Los cambios que
+        llegan seguidos se piden juntos en una sola consulta.
+        """
+        # Si la historia se creó y modificó antes de consultarla, sigue siendo nueva
+        if StoryRealtime._pending.get(story_id) != 'INSERT':
+            StoryRealtime._pending[story_id] = kind
+        if StoryRealtime._fetch_task is None or StoryRealtime._fetch_task.done():
+            StoryRealtime._fetch_task = asyncio.ensure_future(StoryRealtime._fetch_pending())
+
+    @staticmethod
+    def _forget_pending(story_id):
+        """
+        Descarta la consulta pendiente de una historia eliminada. Si hay una
+        consulta en curso, su respuesta pudo leerse antes del borrado: se
+        recuerda el ID para no devolver la historia a la réplica.
+        """
+        StoryRealtime._pending.pop(story_id, None)
+        if StoryRealtime._fetch_task is not None and not StoryRealtime._fetch_task.done():
+            StoryRealtime._deleted.add(story_id)
+
+    @staticmethod
+    async def _fetch_pending():
+        """
+        Consulta las historias encoladas y las aplica. Sigue mientras haya
+        pendientes: los que llegan durante una consulta no inician otra
+        tarea, así que se piden en la siguiente vuelta.
+        """
+        while StoryRealtime._pending:
+            await asyncio.sleep(FETCH_DELAY)
+            pending = StoryRealtime._pending
+            StoryRealtime._pending = {}
+            StoryRealtime._deleted = set()
+            try:
+                supabase = await get_async_supabase_client()
+                response = await supabase.table('stories').select(SYNC_COLUMNS).in_('id', list(pending)).execute()
+
+            except Exception as e:
+                # La sincronización periódica recupera estos cambios
+                print(f"Error al consultar historias modificadas: {e}")
+                continue
+
+            for row in (response.data if response else None) or []:
+                # Eliminada mientras se consultaba
+                if row['id'] in StoryRealtime._deleted:
+                    continue
+                StoryRealtime._apply(pending[row['id']], row)
@@ -0,0 +1,196 @@
+"""
+story_sync.py
+Sincronización incremental de la réplica local de historias.
+Solo descarga las filas con updated_at posterior a la última marca
+y las eliminaciones registradas en story_tombstones. Cada cierto tiempo
+reconcilia además los ids con el servidor, para recuperar filas que la
+marca dejó atrás.
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.supabase_client import get_supabase_client
+from models.local_store import get_local_store
+
+# Filas por solicitud durante la sincronización
+SYNC_BATCH_SIZE = 200
+
+# Segundos entre sincronizaciones en segundo plano
+SYNC_INTERVAL = 60
+
+# Segundos entre reconciliaciones (comparar todos los ids con el servidor)
+RECONCILE_INTERVAL = 30 * 60
+
+# Filas por solicitud al listar los ids (el máximo que entrega PostgREST)
+RECONCILE_BATCH_SIZE = 1000
+
+# Columnas replicadas (las columnas derivadas del servidor, como search_vector, no se copian)
+SYNC_COLUMNS = 'id, title, content, excerpt, word_count, category, author_id, created_at, updated_at, users(username)'
+
+class StorySync:
+    """
+    Clase estática que mantiene la réplica local al día con Supabase.
+    Cada tabla se lee por un cursor (fecha, id) ascendente que se guarda
+    tras cada lote, así una sincronización interrumpida se retoma donde quedó.
+    La réplica solo se marca lista ('initial_sync_done') cuando termina una
+    sincronización completa.
+    updated_at es la hora de inicio de la transacción, así que una fila que
+    se confirma tarde puede quedar detrás de la marca; la reconciliación
+    periódica la recupera.
+    """
+    _listeners = []
+    _sync_lock = threading.Lock()
+    _stop_event = threading.Event()
+    _thread = None
+
+    @staticmethod
+    def add_listener(listener):
+        """
+        Registra una función listener(filas, ids_eliminados) que se llama
+        después de cada sincronización que trae cambios.
+        """
+        StorySync._listeners.append(listener)
+
+    @staticmethod
+    def _pull(supabase, store, table, columns, ts_column, id_column, state_key, apply):
+        """
+        Descarga por lotes las filas de 'table' posteriores a la marca guardada
+        en 'state_key' y las entrega a apply(lote). Retorna todas las filas.
+        """
+        watermark = store.get_state(state_key)
+        watermark_id = store.get_state(f'{state_key}_id')
+        pulled = []
+
+        while True:
+            query = supabase.table(table).select(columns)
+            if watermark:
+                query = query.or_(
+                    f'{ts_column}.gt."{watermark}",'
+                    f'and({ts_column}.eq."{watermark}",{id_column}.gt.{watermark_id})'
+                )
+            response = query.order(ts_column).order(id_column).limit(SYNC_BATCH_SIZE).execute()
+            batch = response.data
+
+            if batch:
+                apply(batch)
+                watermark = batch[-1][ts_column]
+                watermark_id = batch[-1][id_column]
+                store.set_state(f'{state_key}_id', watermark_id)
+                store.set_state(state_key, watermark)
+                pulled.extend(batch)
+
+            if len(batch) < SYNC_BATCH_SIZE:
+                break
+
+        # Una tabla vacía también cuenta como sincronizada
+        if watermark is None:
+            store.set_state(state_key, '')
+        return pulled
+
+    @staticmethod
+    def _reconcile(supabase, store):
+        """
+        Compara id y updated_at de todas las historias del servidor con la
+        réplica. Descarga las que faltan o difieren y borra las que ya no
+        existen. Retorna (filas, ids_eliminados).
+        """
+        # La réplica se lee antes que el servidor: lo que llegue después
+        # (Realtime) no se toma por eliminado
+        local = store.get_story_versions()
+
+        remote = {}
+        last_id = None
+        while True:
+            query = supabase.table('stories').select('id, updated_at')
+            if last_id:
+                query = query.gt('id', last_id)
+            batch = query.order('id').limit(RECONCILE_BATCH_SIZE).execute().data
+            for row in batch:
+                remote[row['id']] = row['updated_at']
+            if len(batch) < RECONCILE_BATCH_SIZE:
+                break
+            last_id = batch[-1]['id']
+
+        stale_ids = [story_id for story_id, updated_at in remote.items() if local.get(story_id) != updated_at]
+        deleted_ids = [story_id for story_id in local if story_id not in remote]
+
+        rows = []
+        for start in range(0, len(stale_ids), SYNC_BATCH_SIZE):
+            chunk = stale_ids[start:start + SYNC_BATCH_SIZE]
+            rows.extend(supabase.table('stories').select(SYNC_COLUMNS).in_('id', chunk).execute().data)
+
+        if rows or deleted_ids:
+            store.apply_changes(rows, deleted_ids)
+        return rows, deleted_ids
+
+    @staticmethod
+    def sync():
+        """
+        Ejecuta una sincronización incremental.
+        Retorna True si terminó correctamente (aunque no hubiera cambios).
+        """
+        with StorySync._sync_lock:
+            try:
+                supabase = get_supabase_client()
+                store = get_local_store()
+
+                rows = StorySync._pull(
+                    supabase, store, 'stories', SYNC_COLUMNS,
+                    'updated_at', 'id', 'stories_watermark',
+                    lambda batch: store.apply_changes(batch)
+                )
+                tombstones = StorySync._pull(
+                    supabase, store, 'story_tombstones', 'story_id, deleted_at',
+                    'deleted_at', 'story_id', 'tombstones_watermark',
+                    lambda batch: store.apply_changes([], [t['story_id'] for t in batch])
+                )
+                deleted_ids = [tombstone['story_id'] for tombstone in tombstones]
+
+                if not store.is_ready():
+                    store.set_state('initial_sync_done', '1')
+                # La primera vez también se reconcilia (réplicas de versiones
+                # anteriores pudieron quedar con filas saltadas)
+                if time.time() - float(store.get_state('reconciled_at') or 0) >= RECONCILE_INTERVAL:
+                    reconciled_rows, reconciled_ids = StorySync._reconcile(supabase, store)
+                    rows.extend(reconciled_rows)
+                    deleted_ids.extend(reconciled_ids)
+                    store.set_state('reconciled_at', str(time.time()))
+
+            except Exception as e:
+                print(f"Error al sincronizar historias: {e}")
+                return False
+
+        if rows or deleted_ids:
+            for listener in StorySync._listeners:
+                listener(rows, deleted_ids)
+        return True
+
+    @staticmethod
+    def _run(interval):
+        """
+        Ciclo del hilo en segundo plano.
+        """
+        while not StorySync._stop_event.is_set():
+            StorySync.sync()
+            StorySync._stop_event.wait(interval)
+
+    @staticmethod
+    def start(interval=SYNC_INTERVAL):
+        """
+        Inicia la sincronización periódica en un hilo en segundo plano.
+        """
+        if StorySync._thread and StorySync._thread.is_alive():
+            return
+        StorySync._stop_event.clear()
+        StorySync._thread = threading.Thread(target=StorySync._run, args=(interval,), daemon=True)
+        StorySync._thread.start()
+
+    @staticmethod
+    def stop():
+        """
+        Detiene la sincronización en segundo plano.
+        """
+        StorySync._stop_event.set()
@@ -4,12 +4,59 @@ Modelo de datos para usuario y gestión de sesión con Supabase.
 Incluye clases y funciones para registrar, autenticar usuarios y gestionar sesiones.
 """
 
-import bcrypt
+import asyncio
+import re
 import sys
 import os
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config.supabase_client import get_supabase_client
-from datetime import datetime, timedelta
+from config.supabase_client import get_supabase_client, get_async_supabase_client
+from models.local_store import get_local_store
+from models.password_hasher import PasswordHasher
+from datetime import datetime, timezone
+
+# Columnas públicas del usuario (nunca se descarga el hash de la contraseña)
+USER_COLUMNS = 'id, username, email, created_at'
+
+# Segundos que el usuario de la sesión se reutiliza antes de volver a consultarlo
+CURRENT_USER_TTL = 15 * 60
+
+# Restricciones UNIQUE de la tabla users y el mensaje que ve el usuario
+UNIQUE_VIOLATION_MESSAGES = {
+    'users_username_key': 'El usuario ya existe.',
+    'users_email_key': 'El email ya está registrado.'
+}
+
+def unique_violation_message(error):
+    """
+    Traduce una violación de UNIQUE de Postgres (código 23505) al mensaje
+    para el usuario. Retorna None si el error es de otro tipo.
+    """
+    if getattr(error, 'code', None) != '23505':
+        return None
+    text = f"{getattr(error, 'message', '')} {getattr(error, 'details', '')}"
+    for constraint, message in UNIQUE_VIOLATION_MESSAGES.items():
+        if constraint in text:
+            return message
+    return 'El usuario o el email ya están registrados.'
+
+def session_expired(expires_at):
+    """
+    Indica si una fecha de expiración ISO 8601 (como la entrega Supabase) ya pasó.
+    Una fecha ilegible se considera expirada.
+    """
+    try:
+        value = expires_at.replace('Z', '+00:00')
+        # fromisoformat solo acepta fracciones de 3 o 6 dígitos en Python < 3.11
+        match = re.match(r'^(.*\.)(\d+)(.*)$', value)
+        if match:
+            value = match.group(1) + match.group(2)[:6].ljust(6, '0') + match.group(3)
+        expires = datetime.fromisoformat(value)
+    except (AttributeError, ValueError):
+        return True
+
+    now = datetime.now(timezone.utc) if expires.tzinfo else datetime.now()
+    return expires <= now
 
 class User:
     """
@@ -40,17 +87,35 @@ class UserManager:
     @staticmethod
     def _hash_password(password):
         """
-        Genera un hash seguro de la contraseña usando bcrypt.
+        Genera un hash seguro de la contraseña usando bcrypt (en el pool de hilos).
         """
-        salt = bcrypt.gensalt()
-        return bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
+        return PasswordHasher.submit_hash(password).result()
 
     @staticmethod
-    def _verify_password(password, password_hash):
+    def _rehash_password(user_id, password, old_rounds, old_hash):
         """
-        Verifica si una contraseña coincide con su hash.
+        Reemplaza un hash con costo desactualizado por uno con el costo del servidor.
+        Solo actualiza si el hash sigue siendo el verificado (old_hash), así
+        no pisa un cambio de contraseña hecho mientras tanto; sin él no hace nada.
+        Se ejecuta en el pool de hilos después de un login exitoso.
         """
-        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+        try:
+            if not old_hash or not PasswordHasher.needs_rehash(old_rounds):
+                return
+            new_hash = PasswordHasher.hash_sync(password)
+            supabase = get_supabase_client()
+            supabase.table('users').update({'password_hash': new_hash}).eq('id', user_id).eq('password_hash', old_hash).execute()
+        except Exception as e:
+            print(f"Error al actualizar el hash de la contraseña: {e}")
+
+    @staticmethod
+    def _schedule_rehash(user_id, password, old_rounds, old_hash):
+        """
+        Programa en el pool el rehash por si el costo del hash no es el del servidor.
+        """
+        PasswordHasher.executor().submit(
+            UserManager._rehash_password, user_id, password, old_rounds, old_hash
+        )
 
     @staticmethod
     def get_user_by_username(username):
@@ -59,8 +124,8 @@ class UserManager:
         """
         try:
             supabase = get_supabase_client()
-            response = supabase.table('users').select('*').eq('username', username).maybeSingle().execute()
-            if response.data:
+            response = supabase.table('users').select(USER_COLUMNS).eq('username', username).maybe_single().execute()
+            if response and response.data:
                 return User.from_dict(response.data)
             return None
         except Exception as e:
@@ -70,19 +135,13 @@ class UserManager:
     @staticmethod
     def register_user(username, password, email):
         """
-        Registra un nuevo usuario en Supabase.
+        Registra un nuevo usuario en Supabase con un solo insert.
+        Las restricciones UNIQUE de username y email detectan los duplicados
+        de forma atómica, sin consultas previas.
         """
         try:
             supabase = get_supabase_client()
 
-            existing_user = supabase.table('users').select('username').eq('username', username).maybeSingle().execute()
-            if existing_user.data:
-                return False, 'El usuario ya existe.'
-
-            existing_email = supabase.table('users').select('email').eq('email', email).maybeSingle().execute()
-            if existing_email.data:
-                return False, 'El email ya está registrado.'
-
             password_hash = UserManager._hash_password(password)
 
             new_user = {
@@ -91,85 +150,174 @@ class UserManager:
                 'email': email
             }
 
-            response = supabase.table('users').insert(new_user).execute()
-
-            if response.data:
-                return True, 'Usuario registrado exitosamente.'
-            return False, 'Error al registrar usuario.'
+            # Sin devolver la fila: un insert exitoso no lanza excepción
+            supabase.table('users').insert(new_user, returning='minimal').execute()
+            return True, 'Usuario registrado exitosamente.'
 
         except Exception as e:
+            duplicate_message = unique_violation_message(e)
+            if duplicate_message:
+                return False, duplicate_message
             print(f"Error en registro: {e}")
             return False, f'Error al registrar usuario: {str(e)}'
 
+class SessionManager:
+    """
+    Clase estática para gestionar sesiones con Supabase.
+    Guarda en memoria el usuario de la sesión para no consultarlo en cada
+    pantalla; se renueva al expirar CURRENT_USER_TTL o al invalidarlo.
+    La sesión también se guarda en la base local para retomarla al abrir la app.
+    """
+    _current_session = None
+    _current_user = None
+    _current_user_expires_at = 0
+
     @staticmethod
-    def authenticate_user(username, password):
+    def set_current_user(user):
         """
-        Autentica un usuario verificando su contraseña.
+        Guarda el usuario de la sesión en la caché.
         """
-        try:
-            supabase = get_supabase_client()
-            response = supabase.table('users').select('*').eq('username', username).maybeSingle().execute()
+        SessionManager._current_user = user
+        SessionManager._current_user_expires_at = time.monotonic() + CURRENT_USER_TTL if user else 0
 
-            if not response.data:
-                return False, 'Usuario no encontrado.'
+    @staticmethod
+    def invalidate_current_user():
+        """
+        Descarta el usuario en caché (por ejemplo tras editar el perfil).
+        """
+        SessionManager.set_current_user(None)
 
-            user_data = response.data
-            if UserManager._verify_password(password, user_data['password_hash']):
-                return True, User.from_dict(user_data)
-            else:
-                return False, 'Contraseña incorrecta.'
+    @staticmethod
+    def _cached_user():
+        """
+        Retorna el usuario en caché si pertenece a la sesión y no expiró.
+        """
+        user = SessionManager._current_user
+        session = SessionManager._current_session
+        if not user or not session or user.id != session['user_id']:
+            return None
+        if SessionManager._current_user_expires_at <= time.monotonic():
+            return None
+        return user
 
+    @staticmethod
+    def _persist_session(session, user):
+        """
+        Guarda la sesión y el perfil en la base local.
+        """
+        try:
+            get_local_store().save_session(session, user)
         except Exception as e:
-            print(f"Error en autenticación: {e}")
-            return False, f'Error al autenticar: {str(e)}'
+            print(f"Error al guardar la sesión local: {e}")
 
-class SessionManager:
-    """
-    Clase estática para gestionar sesiones con Supabase.
-    """
-    _current_session = None
+    @staticmethod
+    def _forget_session():
+        """
+        Olvida la sesión en memoria y en la base local.
+        """
+        SessionManager._current_session = None
+        SessionManager.invalidate_current_user()
+        try:
+            get_local_store().delete_session()
+        except Exception as e:
+            print(f"Error al eliminar la sesión local: {e}")
 
     @staticmethod
-    def create_session(user_id):
+    def restore_session():
         """
-        Crea una nueva sesión en Supabase.
+        Retoma la sesión guardada localmente sin consultar a Supabase.
+        Retorna True si había una sesión vigente según su expires_at.
+        La revocación se comprueba después con AsyncSessionManager.verify_session.
         """
         try:
-            supabase = get_supabase_client()
+            saved = get_local_store().load_session()
+        except Exception as e:
+            print(f"Error al leer la sesión local: {e}")
+            return False
 
-            SessionManager.clear_expired_sessions(user_id)
+        if not saved:
+            return False
 
-            expires_at = datetime.now() + timedelta(days=7)
+        if session_expired(saved['expires_at']):
+            SessionManager._forget_session()
+            return False
 
-            session_data = {
-                'user_id': user_id,
-                'expires_at': expires_at.isoformat()
-            }
+        SessionManager._current_session = {
+            'id': saved['id'],
+            'user_id': saved['user_id'],
+            'expires_at': saved['expires_at']
+        }
+        if saved['username']:
+            SessionManager.set_current_user(User(
+                id=saved['user_id'],
+                username=saved['username'],
+                email=saved['email'],
+                created_at=saved['user_created_at']
+            ))
+        return True
 
-            response = supabase.table('sessions').insert(session_data).execute()
+    @staticmethod
+    def _on_login_response(data, password):
+        """
+        Procesa la respuesta de la función login_user.
+        Con status 'ok' deja la sesión y el usuario listos y guardados localmente.
+        Retorna (éxito, User o mensaje de error).
+        """
+        status = data.get('status') if data else None
+        if status == 'not_found':
+            return False, 'Usuario no encontrado.'
+        if status == 'wrong_password':
+            return False, 'Contraseña incorrecta.'
+        if status != 'ok':
+            return False, 'Error al iniciar sesión.'
+
+        user = User.from_dict(data['user'])
+        SessionManager._current_session = data['session']
+        SessionManager.set_current_user(user)
+        SessionManager._persist_session(data['session'], user)
+        # Con el hash verificado, el rehash no pisa un cambio de contraseña simultáneo
+        UserManager._schedule_rehash(
+            user.id, password, data.get('password_cost'), data.get('password_hash')
+        )
+        return True, user
 
-            if response.data:
-                SessionManager._current_session = response.data[0]
-                return True
-            return False
+    @staticmethod
+    def login(username, password):
+        """
+        Autentica y crea la sesión en una sola llamada (función login_user).
+        Retorna (éxito, User o mensaje de error).
+        """
+        try:
+            supabase = get_supabase_client()
+            response = supabase.rpc('login_user', {
+                'p_username': username,
+                'p_password': password
+            }).execute()
+            return SessionManager._on_login_response(response.data, password)
 
         except Exception as e:
-            print(f"Error al crear sesión: {e}")
-            return False
+            print(f"Error en login: {e}")
+            return False, f'Error al autenticar: {str(e)}'
 
     @staticmethod
     def get_current_user():
         """
-        Obtiene el usuario de la sesión actual.
+        Obtiene el usuario de la sesión actual (desde la caché si está vigente).
         """
         try:
+            user = SessionManager._cached_user()
+            if user:
+                return user
+
             if SessionManager._current_session:
                 user_id = SessionManager._current_session['user_id']
                 supabase = get_supabase_client()
-                response = supabase.table('users').select('*').eq('id', user_id).maybeSingle().execute()
+                response = supabase.table('users').select(USER_COLUMNS).eq('id', user_id).maybe_single().execute()
 
-                if response.data:
-                    return User.from_dict(response.data)
+                if response and response.data:
+                    user = User.from_dict(response.data)
+                    SessionManager.set_current_user(user)
+                    return user
             return None
 
         except Exception as e:
@@ -186,30 +334,169 @@ class SessionManager:
                 supabase = get_supabase_client()
                 session_id = SessionManager._current_session['id']
                 supabase.table('sessions').delete().eq('id', session_id).execute()
-                SessionManager._current_session = None
+            SessionManager._forget_session()
             return True
 
         except Exception as e:
             print(f"Error al limpiar sesión: {e}")
+            # Sin conexión la sesión igual se cierra en este dispositivo
+            SessionManager._forget_session()
             return False
 
     @staticmethod
-    def clear_expired_sessions(user_id):
+    def get_session():
+        """
+        Obtiene el username de la sesión actual (compatibilidad).
+        """
+        user = SessionManager.get_current_user()
+        return user.username if user else None
+
+class AsyncUserManager:
+    """
+    Variante asíncrona de UserManager sobre el cliente asíncrono de Supabase.
+    bcrypt se ejecuta en el pool de PasswordHasher para no detener el loop de asyncio.
+    """
+    @staticmethod
+    async def get_user_by_username(username):
         """
-        Elimina sesiones expiradas del usuario.
+        Obtiene un usuario por su nombre de usuario.
         """
         try:
-            supabase = get_supabase_client()
-            now = datetime.now().isoformat()
-            supabase.table('sessions').delete().eq('user_id', user_id).lt('expires_at', now).execute()
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('users').select(USER_COLUMNS).eq('username', username).maybe_single().execute()
+            if response and response.data:
+                return User.from_dict(response.data)
+            return None
+        except Exception as e:
+            print(f"Error al obtener usuario: {e}")
+            return None
+
+    @staticmethod
+    async def register_user(username, password, email):
+        """
+        Registra un nuevo usuario en Supabase con un solo insert.
+        Las restricciones UNIQUE de username y email detectan los duplicados
+        de forma atómica, sin consultas previas.
+        """
+        try:
+            supabase = await get_async_supabase_client()
+
+            password_hash = await asyncio.wrap_future(PasswordHasher.submit_hash(password))
+
+            new_user = {
+                'username': username,
+                'password_hash': password_hash,
+                'email': email
+            }
+
+            # Sin devolver la fila: un insert exitoso no lanza excepción
+            await supabase.table('users').insert(new_user, returning='minimal').execute()
+            return True, 'Usuario registrado exitosamente.'
 
         except Exception as e:
-            print(f"Error al limpiar sesiones expiradas: {e}")
+            duplicate_message = unique_violation_message(e)
+            if duplicate_message:
+                return False, duplicate_message
+            print(f"Error en registro: {e}")
+            return False, f'Error al registrar usuario: {str(e)}'
 
+class AsyncSessionManager:
+    """
+    Variante asíncrona de SessionManager.
+    Comparte la sesión actual con SessionManager.
+    """
     @staticmethod
-    def get_session():
+    async def login(username, password):
+        """
+        Autentica y crea la sesión en una sola llamada (función login_user).
+        Retorna (éxito, User o mensaje de error).
+        """
+        try:
+            supabase = await get_async_supabase_client()
+            response = await supabase.rpc('login_user', {
+                'p_username': username,
+                'p_password': password
+            }).execute()
+            return SessionManager._on_login_response(response.data, password)
+
+        except Exception as e:
+            print(f"Error en login: {e}")
+            return False, f'Error al autenticar: {str(e)}'
+
+    @staticmethod
+    async def get_current_user():
+        """
+        Obtiene el usuario de la sesión actual (desde la caché si está vigente).
+        """
+        try:
+            user = SessionManager._cached_user()
+            if user:
+                return user
+
+            if SessionManager._current_session:
+                user_id = SessionManager._current_session['user_id']
+                supabase = await get_async_supabase_client()
+                response = await supabase.table('users').select(USER_COLUMNS).eq('id', user_id).maybe_single().execute()
+
+                if response and response.data:
+                    user = User.from_dict(response.data)
+                    SessionManager.set_current_user(user)
+                    return user
+            return None
+
+        except Exception as e:
+            print(f"Error al obtener usuario actual: {e}")
+            return None
+
+    @staticmethod
+    async def clear_session():
+        """
+        Elimina la sesión actual.
+        """
+        try:
+            if SessionManager._current_session:
+                supabase = await get_async_supabase_client()
+                session_id = SessionManager._current_session['id']
+                await supabase.table('sessions').delete().eq('id', session_id).execute()
+            SessionManager._forget_session()
+            return True
+
+        except Exception as e:
+            print(f"Error al limpiar sesión: {e}")
+            # Sin conexión la sesión igual se cierra en este dispositivo
+            SessionManager._forget_session()
+            return False
+
+    @staticmethod
+    async def verify_session():
+        """
+        Comprueba con Supabase que la sesión retomada sigue vigente.
+        Retorna False solo si el servidor confirma que fue revocada o expiró;
+        sin conexión se conserva la sesión local.
+        """
+        session = SessionManager._current_session
+        if not session:
+            return False
+
+        try:
+            supabase = await get_async_supabase_client()
+            response = await supabase.table('sessions').select('id, expires_at').eq('id', session['id']).maybe_single().execute()
+        except Exception as e:
+            print(f"Error al verificar sesión: {e}")
+            return True
+
+        if response and response.data and not session_expired(response.data['expires_at']):
+            return True
+
+        # Solo olvidar la sesión si sigue siendo la misma que se verificó
+        if SessionManager._current_session is session:
+            SessionManager._forget_session()
+        return False
+
+    @staticmethod
+    async def get_session():
         """
         Obtiene el username de la sesión actual (compatibilidad).
         """
-        user = SessionManager.get_current_user()
+        user = await AsyncSessionManager.get_current_user()
         return user.username if user else None
@@ -7,24 +7,48 @@ Permite buscar historias por categoría, autor o contenido.
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.textfield import MDTextField
-from kivymd.uix.button import MDRaisedButton, MDIconButton
+from kivymd.uix.button import MDIconButton
 from kivymd.uix.label import MDLabel
 from kivymd.uix.scrollview import MDScrollView
-from kivymd.uix.gridlayout import MDGridLayout
 from kivymd.uix.chip import MDChip
+from kivy.clock import Clock
 from kivy.metrics import dp
-from models.story import StoryManager
-from screens.home import StoryCard
+from models.story import AsyncStoryManager
+from models.story_realtime import StoryRealtime
+from screens.story_list import StoryList
+from utils.async_bridge import run_async, on_main_thread
+from utils.lazy_screens import after_first_paint
+
+# Pausa (segundos) sin escribir antes de lanzar la búsqueda
+SEARCH_DEBOUNCE = 0.3
+
+# Largo mínimo del texto para buscar mientras se escribe
+MIN_SEARCH_LENGTH = 2
+
+def normalize_query(text):
+    """
+    Normaliza el texto de búsqueda (espacios y mayúsculas) para que
+    variaciones equivalentes compartan la misma entrada de caché.
+    """
+    return ' '.join(text.split()).lower()
 
 class ExploreScreen(MDScreen):
     """
     Pantalla de exploración y búsqueda de historias.
-    Incluye filtros por categoría y búsqueda por texto.
+    Incluye filtros por categoría y búsqueda mientras se escribe.
     """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.current_filter = None
+        self.searching = False
+        self.last_query = None
+        self.next_cursor = None
+        self.loading_page = False
+        self.request_id = 0
+        self.pending_request = None
+        self.search_trigger = Clock.create_trigger(self.search_stories, SEARCH_DEBOUNCE)
         self.setup_ui()
+        StoryRealtime.add_listener(on_main_thread(self.on_story_change))
     
     def setup_ui(self):
         """
@@ -60,13 +84,16 @@ class ExploreScreen(MDScreen):
             size_hint_x=0.8,
             mode="round"
         )
+        # Buscar mientras se escribe (con pausa) o de inmediato con Enter
+        self.search_field.bind(text=self.on_search_text)
+        self.search_field.bind(on_text_validate=self.search_now)
         search_layout.add_widget(self.search_field)
         
         search_button = MDIconButton(
             icon="magnify",
             theme_icon_color="Custom",
             icon_color=[0.8, 0.1, 0.1, 1],
-            on_release=self.search_stories
+            on_release=self.search_now
         )
         search_layout.add_widget(search_button)
         
@@ -117,65 +144,172 @@ class ExploreScreen(MDScreen):
         categories_scroll.add_widget(self.categories_layout)
         main_layout.add_widget(categories_scroll)
         
-        # ScrollView para resultados
-        results_scroll = MDScrollView()
-        
-        self.results_grid = MDGridLayout(
-            cols=1,
-            spacing=dp(16),
-            size_hint_y=None,
-            height=dp(0)
-        )
-        self.results_grid.bind(minimum_height=self.results_grid.setter('height'))
-        
-        results_scroll.add_widget(self.results_grid)
-        main_layout.add_widget(results_scroll)
+        # Lista virtualizada de resultados (carga más páginas al llegar al final)
+        self.results_list = StoryList()
+        self.results_list.bind(on_end_reached=self.load_more_stories)
+        main_layout.add_widget(self.results_list)
         
         self.add_widget(main_layout)
         
-        # Cargar todas las historias inicialmente
-        self.load_all_stories()
+        # Cargar todas las historias después de mostrar la pantalla
+        after_first_paint(self.load_all_stories)
     
     def load_all_stories(self):
         """
-        Carga todas las historias disponibles.
+        Carga la primera página de todas las historias disponibles.
         """
-        stories = StoryManager.load_stories()
-        self.display_stories(stories)
+        self.load_first_page(None)
     
-    def display_stories(self, stories):
+    def request(self, coro, callback):
         """
-        Muestra las historias proporcionadas en el grid de resultados.
+        Ejecuta una consulta en segundo plano y entrega el resultado a callback
+        (None si falla). Si mientras tanto se inició otra consulta (otro filtro o búsqueda),
+        la anterior se cancela y, si ya había respondido, se descarta.
         """
-        self.results_grid.clear_widgets()
+        self.cancel_request()
+        request_id = self.request_id
         
-        if not stories:
-            no_results_label = MDLabel(
-                text="No se encontraron historias",
-                theme_text_color="Secondary",
-                halign="center",
-                size_hint_y=None,
-                height=dp(100)
-            )
-            self.results_grid.add_widget(no_results_label)
+        def deliver(result):
+            if request_id == self.request_id:
+                callback(result)
+        
+        self.pending_request = run_async(coro, on_success=deliver, on_error=lambda error: deliver(None))
+    
+    def cancel_request(self):
+        """
+        Cancela la consulta en curso; si ya respondió, su resultado se descarta.
+        """
+        self.request_id += 1
+        if self.pending_request:
+            self.pending_request.cancel()
+            self.pending_request = None
+    
+    def show_loading(self):
+        """
+        Muestra un aviso mientras llega la respuesta.
+        """
+        self.results_list.show_message("Cargando historias...")
+    
+    def load_first_page(self, category):
+        """
+        Carga la primera página del feed, opcionalmente filtrado por categoría.
+        """
+        self.searching = False
+        self.show_loading()
+        self.request(
+            AsyncStoryManager.get_stories_page(category=category),
+            self.display_first_page
+        )
+    
+    def display_first_page(self, page):
+        """
+        Muestra la primera página del filtro actual, o un aviso si falló.
+        """
+        if page is None:
+            self.next_cursor = None
+            self.loading_page = False
+            self.results_list.show_message("No se pudieron cargar las historias")
+            return
+        self.display_stories(*page)
+    
+    def load_more_stories(self, *args):
+        """
+        Carga la siguiente página del filtro actual a partir del cursor.
+        """
+        if self.loading_page or not self.next_cursor:
             return
         
-        for story in stories:
-            story_card = StoryCard(story)
-            self.results_grid.add_widget(story_card)
+        self.loading_page = True
+        self.request(
+            AsyncStoryManager.get_stories_page(cursor=self.next_cursor, category=self.current_category()),
+            self.show_next_page
+        )
     
-    def search_stories(self, *args):
+    def show_next_page(self, page):
+        """
+        Agrega la página recibida al final de los resultados. Si la consulta
+        falló se conservan el cursor y el botón para cargar más.
+        """
+        self.loading_page = False
+        if page is None:
+            return
+        stories, self.next_cursor = page
+        self.results_list.add_stories(stories, has_more=bool(self.next_cursor))
+    
+    def display_stories(self, stories, next_cursor=None):
+        """
+        Muestra las historias proporcionadas en la lista de resultados.
+        Si se entrega un cursor, el resto se carga con scroll infinito.
+        """
+        self.next_cursor = next_cursor
+        self.loading_page = False
+        self.results_list.set_stories(stories or [], has_more=bool(next_cursor))
+    
+    def current_category(self):
+        """
+        Retorna la categoría del filtro actual (None para todas).
+        """
+        return None if self.current_filter in (None, 'Todas') else self.current_filter
+    
+    def on_search_text(self, instance, text):
+        """
+        Reprograma la búsqueda en cada tecla: solo se lanza tras una pausa.
+        """
+        self.search_trigger.cancel()
+        self.search_trigger()
+    
+    def search_now(self, *args):
+        """
+        Busca de inmediato (Enter o botón de búsqueda).
+        """
+        self.search_trigger.cancel()
+        self.search_stories(force=True)
+    
+    def search_stories(self, *args, force=False):
         """
         Busca historias basándose en el texto ingresado usando Supabase.
+        Si no hay coincidencias exactas, recurre a la búsqueda difusa
+        para tolerar errores de ortografía. Las búsquedas repetidas salen
+        de la caché de búsquedas de StoryManager.
         """
-        search_text = self.search_field.text.strip()
+        query = normalize_query(self.search_field.text)
+
+        if not query:
+            if self.searching:
+                self.last_query = None
+                self.load_first_page(self.current_category())
+            return
 
-        if not search_text:
-            self.load_all_stories()
+        # Mientras se escribe se ignoran los textos muy cortos, pero se
+        # descarta la búsqueda en curso: sus resultados ya no corresponden
+        # al texto del campo, y al volver a escribirlo se busca de nuevo
+        if not force and len(query) < MIN_SEARCH_LENGTH:
+            if self.searching:
+                self.cancel_request()
+                self.last_query = None
             return
 
-        stories = StoryManager.search_stories(search_text)
-        self.display_stories(stories)
+        # Un texto que no cambió no se vuelve a buscar
+        if not force and self.searching and query == self.last_query:
+            return
+
+        # Al refinar una búsqueda se mantienen los resultados anteriores hasta
+        # que llegan los nuevos, así escribir no hace parpadear la lista
+        if not self.searching:
+            self.show_loading()
+        self.searching = True
+        self.last_query = query
+        self.request(self.find_stories(query), self.display_stories)
+    
+    @staticmethod
+    async def find_stories(search_text):
+        """
+        Búsqueda de texto completo con respaldo difuso, en segundo plano.
+        """
+        stories = await AsyncStoryManager.search_stories(search_text)
+        if not stories:
+            stories = await AsyncStoryManager.fuzzy_search_stories(search_text)
+        return stories
     
     def filter_by_category(self, category):
         """
@@ -189,15 +323,37 @@ class ExploreScreen(MDScreen):
         self.current_filter = category
 
         if category == 'Todas':
-            filtered_stories = StoryManager.load_stories()
+            self.load_first_page(None)
         else:
-            filtered_stories = StoryManager.get_stories_by_category(category)
-
-        self.display_stories(filtered_stories)
+            self.load_first_page(category)
+    
+    def shows_story(self, story):
+        """
+        Indica si una historia corresponde a lo que muestra la lista.
+        En una búsqueda solo se actualizan los resultados ya mostrados.
+        """
+        if self.searching:
+            return self.results_list.story_index(story['id']) is not None
+        return self.current_filter in (None, 'Todas') or story.get('category') == self.current_filter
+    
+    def on_story_change(self, kind, story):
+        """
+        Aplica un cambio en tiempo real a los resultados (solo la card afectada).
+        Tras una reconexión repite la consulta actual.
+        """
+        if kind != 'resync':
+            self.results_list.apply_change(kind, story, accepts=self.shows_story)
+        elif self.searching:
+            self.search_stories(force=True)
+        else:
+            self.load_first_page(self.current_category())
     
     def on_enter(self, *args):
         """
         Se ejecuta al entrar a la pantalla.
+        Con la suscripción en tiempo real activa los resultados ya están al día.
         """
+        if StoryRealtime.is_live():
+            return
         if not self.current_filter or self.current_filter == 'Todas':
             self.load_all_stories()
\ No newline at end of file
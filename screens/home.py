@@ -5,147 +5,29 @@ Muestra las historias más recientes y populares en formato de cards.
 """
 
 from kivymd.uix.screen import MDScreen
-from kivymd.uix.card import MDCard
 from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.label import MDLabel
 from kivymd.uix.button import MDIconButton
-from kivymd.uix.scrollview import MDScrollView
-from kivymd.uix.gridlayout import MDGridLayout
 from kivy.metrics import dp
-from kivy.app import App
-from models.story import StoryManager
-from models.user import SessionManager
-
-class StoryCard(MDCard):
-    """
-    Card personalizada para mostrar historias.
-    Incluye título, categoría, autor y preview del contenido.
-    """
-    def __init__(self, story_data, **kwargs):
-        super().__init__(**kwargs)
-        self.story_data = story_data
-        self.setup_card()
-    
-    def setup_card(self):
-        """
-        Configura el diseño y contenido de la card.
-        """
-        # Configuración de la card
-        self.orientation = 'vertical'
-        self.size_hint_y = None
-        self.height = dp(200)
-        self.md_bg_color = [0.1, 0.1, 0.1, 1]  # Fondo oscuro
-        self.elevation = 3
-        self.radius = [15, 15, 15, 15]
-        self.padding = dp(16)
-        self.spacing = dp(8)
-        self.ripple_behavior = True
-        
-        # Bind del evento de toque
-        self.bind(on_release=self.open_story_detail)
-        
-        # Header con categoría
-        header_layout = MDBoxLayout(
-            orientation='horizontal',
-            size_hint_y=None,
-            height=dp(30),
-            spacing=dp(8)
-        )
-        
-        # Etiqueta de categoría
-        category_label = MDLabel(
-            text=self.story_data.get('category', 'Sin categoría'),
-            theme_text_color="Custom",
-            text_color=[0.8, 0.1, 0.1, 1],  # Rojo
-            font_style="Caption",
-            size_hint_x=None,
-            width=self.texture_size[0] if hasattr(self, 'texture_size') else dp(100)
-        )
-        header_layout.add_widget(category_label)
-        
-        # Spacer
-        header_layout.add_widget(MDLabel())
-        
-        # Botón de favoritos (placeholder)
-        fav_button = MDIconButton(
-            icon="heart-outline",
-            theme_icon_color="Custom",
-            icon_color=[0.5, 0.5, 0.5, 1],
-            size_hint=(None, None),
-            size=(dp(30), dp(30))
-        )
-        header_layout.add_widget(fav_button)
-        
-        self.add_widget(header_layout)
-        
-        # Título de la historia
-        title_label = MDLabel(
-            text=self.story_data.get('title', 'Sin título'),
-            theme_text_color="Primary",
-            font_style="H6",
-            size_hint_y=None,
-            height=dp(40),
-            text_size=(None, None)
-        )
-        self.add_widget(title_label)
-        
-        # Preview del contenido
-        content_preview = self.story_data.get('content', '')[:100] + "..." if len(self.story_data.get('content', '')) > 100 else self.story_data.get('content', '')
-        
-        content_label = MDLabel(
-            text=content_preview,
-            theme_text_color="Secondary",
-            font_style="Body2",
-            size_hint_y=None,
-            height=dp(60),
-            text_size=(dp(300), None)
-        )
-        self.add_widget(content_label)
-        
-        # Footer con autor
-        footer_layout = MDBoxLayout(
-            orientation='horizontal',
-            size_hint_y=None,
-            height=dp(30)
-        )
-        
-        author_label = MDLabel(
-            text=f"Por: {self.story_data.get('author', 'Anónimo')}",
-            theme_text_color="Secondary",
-            font_style="Caption",
-            size_hint_x=0.7
-        )
-        footer_layout.add_widget(author_label)
-        
-        # Botón de compartir (placeholder)
-        share_button = MDIconButton(
-            icon="share-variant",
-            theme_icon_color="Custom",
-            icon_color=[0.5, 0.5, 0.5, 1],
-            size_hint=(None, None),
-            size=(dp(30), dp(30))
-        )
-        footer_layout.add_widget(share_button)
-        
-        self.add_widget(footer_layout)
-    
-    def open_story_detail(self, *args):
-        """
-        Abre la pantalla de detalle de la historia.
-        """
-        app = App.get_running_app()
-        detail_screen = app.screen_manager.get_screen('story_detail')
-        detail_screen.load_story(self.story_data)
-        app.screen_manager.current = 'story_detail'
+from models.story import AsyncStoryManager
+from models.user import AsyncSessionManager
+from models.story_realtime import StoryRealtime
+from screens.story_list import StoryList
+from utils.async_bridge import run_async, on_main_thread
+from utils.lazy_screens import after_first_paint
 
 class HomeScreen(MDScreen):
     """
     Pantalla principal de inicio.
-    Muestra historias destacadas y recientes en formato de cards.
+    Muestra historias destacadas y recientes en una lista virtualizada de cards.
     """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.next_cursor = None
+        self.loading_page = False
+        self.request_id = 0
         self.setup_ui()
+        StoryRealtime.add_listener(on_main_thread(self.on_story_change))
     
     def setup_ui(self):
         """
@@ -166,17 +48,14 @@ class HomeScreen(MDScreen):
             spacing=dp(16)
         )
         
-        # Saludo personalizado
-        username = SessionManager.get_session()
-        greeting_text = f"Hola, {username}" if username else "Bienvenido"
-        
-        greeting_label = MDLabel(
-            text=greeting_text,
+        # Saludo personalizado (el nombre llega en segundo plano)
+        self.greeting_label = MDLabel(
+            text="Bienvenido",
             theme_text_color="Primary",
             font_style="H5",
             size_hint_x=0.7
         )
-        header_layout.add_widget(greeting_label)
+        header_layout.add_widget(self.greeting_label)
         
         # Botón de notificaciones (placeholder)
         notif_button = MDIconButton(
@@ -200,43 +79,106 @@ class HomeScreen(MDScreen):
         )
         main_layout.add_widget(section_title)
         
-        # ScrollView para las historias
-        scroll_view = MDScrollView()
-        
-        # Grid layout para las cards
-        self.stories_grid = MDGridLayout(
-            cols=1,
-            spacing=dp(16),
-            size_hint_y=None,
-            height=dp(0)  # Se ajustará dinámicamente
-        )
-        self.stories_grid.bind(minimum_height=self.stories_grid.setter('height'))
-        
-        scroll_view.add_widget(self.stories_grid)
-        main_layout.add_widget(scroll_view)
+        # Lista virtualizada de historias (carga más páginas al llegar al final)
+        self.stories_list = StoryList()
+        self.stories_list.bind(on_end_reached=self.load_more_stories)
+        main_layout.add_widget(self.stories_list)
         
         self.add_widget(main_layout)
         
-        # Cargar historias
+        # Cargar saludo e historias después de mostrar la pantalla
+        after_first_paint(self.load_initial_data)
+    
+    def load_initial_data(self):
+        """
+        Consultas iniciales de la pantalla, lanzadas tras el primer frame.
+        """
+        run_async(AsyncSessionManager.get_session(), on_success=self.set_greeting)
         self.load_stories()
     
-    def load_stories(self):
+    def set_greeting(self, username):
         """
-        Carga las historias desde el modelo y las muestra en cards.
+        Actualiza el saludo con el nombre del usuario de la sesión.
         """
-        stories = StoryManager.load_stories()
+        self.greeting_label.text = f"Hola, {username}" if username else "Bienvenido"
+    
+    def request(self, coro, callback):
+        """
+        Ejecuta una consulta en segundo plano y entrega el resultado a callback
+        (None si falla). Si mientras tanto se inició otra consulta, la
+        respuesta antigua se descarta.
+        """
+        self.request_id += 1
+        request_id = self.request_id
         
-        # Limpiar grid existente
-        self.stories_grid.clear_widgets()
+        def deliver(result):
+            if request_id == self.request_id:
+                callback(result)
         
-        # Agregar cards para cada historia
-        for story in reversed(stories[-10:]):  # Mostrar las 10 más recientes
-            story_card = StoryCard(story)
-            self.stories_grid.add_widget(story_card)
+        run_async(coro, on_success=deliver, on_error=lambda error: deliver(None))
+    
+    def load_stories(self):
+        """
+        Carga la primera página del feed y la muestra en la lista.
+        """
+        self.loading_page = False
+        self.request(AsyncStoryManager.get_stories_page(), self.show_first_page)
+    
+    def show_first_page(self, page):
+        """
+        Reemplaza el contenido de la lista con la primera página del feed.
+        """
+        if page is None:
+            self.next_cursor = None
+            self.stories_list.show_message("No se pudieron cargar las historias")
+            return
+        stories, self.next_cursor = page
+        self.stories_list.set_stories(
+            stories,
+            has_more=bool(self.next_cursor),
+            empty_text="Aún no hay historias publicadas"
+        )
+    
+    def load_more_stories(self, *args):
+        """
+        Carga la siguiente página del feed a partir del cursor actual.
+        """
+        if self.loading_page or not self.next_cursor:
+            return
+        
+        self.loading_page = True
+        self.request(
+            AsyncStoryManager.get_stories_page(cursor=self.next_cursor),
+            self.show_next_page
+        )
+    
+    def show_next_page(self, page):
+        """
+        Agrega la página recibida al final de la lista. Si la consulta
+        falló se conservan el cursor y el botón para cargar más, así el
+        usuario puede reintentar.
+        """
+        self.loading_page = False
+        if page is None:
+            return
+        stories, self.next_cursor = page
+        self.stories_list.add_stories(stories, has_more=bool(self.next_cursor))
+    
+    def on_story_change(self, kind, story):
+        """
+        Aplica un cambio en tiempo real a la lista (solo la card afectada).
+        Tras una reconexión recarga la primera página.
+        """
+        if kind == 'resync':
+            self.load_stories()
+        else:
+            self.stories_list.apply_change(kind, story)
     
     def on_enter(self, *args):
         """
         Se ejecuta al entrar a la pantalla.
-        Recarga las historias para mostrar contenido actualizado.
+        Con la suscripción en tiempo real activa la lista ya está al día;
+        si no, recarga las historias para mostrar contenido actualizado.
         """
-        self.load_stories()
\ No newline at end of file
+        if not StoryRealtime.is_live():
+            self.load_stories()
\ No newline at end of file
@@ -6,7 +6,8 @@ Permite al usuario iniciar sesión con validación mejorada y gestiona la sesió
 
 from kivymd.uix.screen import MDScreen  # Pantalla base KivyMD
 from kivymd.uix.dialog import MDDialog  # Diálogo para mostrar mensajes
-from models.user import UserManager, SessionManager  # Gestores de usuario y sesión
+from models.user import AsyncSessionManager  # Gestor de sesión
+from utils.async_bridge import run_async  # Ejecuta la red fuera del hilo de la interfaz
 from kivy.app import App
 
 class LoginScreen(MDScreen):
@@ -17,6 +18,7 @@ class LoginScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.dialog = None  # Diálogo reutilizable
+        self.logging_in = False  # Evita enviar el formulario dos veces
 
     def show_dialog(self, text):
         """
@@ -32,7 +34,11 @@ class LoginScreen(MDScreen):
         """
         Obtiene los datos del formulario con validación mejorada.
         Si es correcto, guarda la sesión y navega a la pantalla principal.
+        La autenticación corre en segundo plano para no congelar la interfaz.
         """
+        if self.logging_in:
+            return
+
         username = self.ids.username.text.strip()
         password = self.ids.password.text
 
@@ -46,16 +52,31 @@ class LoginScreen(MDScreen):
             return
 
         # Autenticar usuario con Supabase
-        success, result = UserManager.authenticate_user(username, password)
+        self.set_loading(True)
+        # Una sola llamada: verifica la contraseña y crea la sesión en el servidor
+        run_async(AsyncSessionManager.login(username, password), on_success=self.on_login_result)
+
+    def on_login_result(self, outcome):
+        """
+        Recibe el resultado de la autenticación en el hilo de la interfaz.
+        """
+        self.set_loading(False)
+        success, result = outcome
 
         if success:
-            # Crear sesión con el ID del usuario
-            SessionManager.create_session(result.id)
             self.show_dialog('¡Login exitoso!')
             # Navegar a la pantalla principal con navegación
             App.get_running_app().screen_manager.current = 'main'
         else:
             self.show_dialog(result)
+
+    def set_loading(self, loading):
+        """
+        Muestra el estado de carga en el botón de login.
+        """
+        self.logging_in = loading
+        self.ids.login_button.disabled = loading
+        self.ids.login_button.text = 'INGRESANDO...' if loading else 'INICIAR SESIÓN'
     
     def on_enter(self, *args):
         """
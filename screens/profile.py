@@ -9,23 +9,26 @@ from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.label import MDLabel
 from kivymd.uix.button import MDRaisedButton, MDIconButton
 from kivymd.uix.card import MDCard
-from kivymd.uix.scrollview import MDScrollView
-from kivymd.uix.gridlayout import MDGridLayout
 from kivymd.uix.dialog import MDDialog
 from kivymd.uix.list import OneLineAvatarIconListItem, IconRightWidget
 from kivy.metrics import dp
 from kivy.app import App
-from models.user import SessionManager
-from models.story import StoryManager
-from screens.home import StoryCard
+from models.user import AsyncSessionManager
+from models.story import AsyncStoryManager
+from models.story_realtime import StoryRealtime
+from screens.story_list import StoryList
+from utils.async_bridge import run_async, on_main_thread
+from utils.lazy_screens import after_first_paint
 
 class ProfileCard(MDCard):
     """
     Card de perfil con información del usuario.
+    Las estadísticas se leen de author_stats en segundo plano.
     """
-    def __init__(self, username, **kwargs):
+    def __init__(self, user, **kwargs):
         super().__init__(**kwargs)
-        self.username = username
+        self.user = user
+        self.username = user.username
         self.setup_card()
     
     def setup_card(self):
@@ -82,17 +85,30 @@ class ProfileCard(MDCard):
         )
         info_layout.add_widget(username_label)
         
-        # Estadísticas básicas
-        stories_count = len([s for s in StoryManager.load_stories() if s.get('author') == self.username])
-        stats_label = MDLabel(
-            text=f"{stories_count} historias publicadas",
+        # Estadísticas básicas (se completan al llegar la respuesta)
+        self.stats_label = MDLabel(
+            text="Cargando estadísticas...",
             theme_text_color="Secondary",
             font_style="Caption"
         )
-        info_layout.add_widget(stats_label)
+        info_layout.add_widget(self.stats_label)
         
         avatar_layout.add_widget(info_layout)
         self.add_widget(avatar_layout)
+        
+        self.load_stats()
+    
+    def load_stats(self):
+        """
+        Pide las estadísticas del autor (una fila de author_stats).
+        """
+        run_async(AsyncStoryManager.get_author_stats(self.user.id), on_success=self.set_stats)
+    
+    def set_stats(self, stats):
+        """
+        Muestra las estadísticas recibidas.
+        """
+        self.stats_label.text = f"{stats['story_count']} historias publicadas"
 
 class ProfileScreen(MDScreen):
     """
@@ -102,7 +118,10 @@ class ProfileScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.dialog = None
+        self.profile_card = None
+        self.user = None
         self.setup_ui()
+        StoryRealtime.add_listener(on_main_thread(self.on_story_change))
     
     def setup_ui(self):
         """
@@ -141,22 +160,16 @@ class ProfileScreen(MDScreen):
         
         main_layout.add_widget(header_layout)
         
-        # ScrollView principal
-        scroll_view = MDScrollView()
-        content_layout = MDBoxLayout(
+        # Contenido superior (la lista de historias ocupa el espacio restante)
+        self.content_layout = MDBoxLayout(
             orientation='vertical',
             spacing=dp(16),
             size_hint_y=None,
             height=dp(0)
         )
+        content_layout = self.content_layout
         content_layout.bind(minimum_height=content_layout.setter('height'))
         
-        # Card de perfil
-        username = SessionManager.get_session()
-        if username:
-            profile_card = ProfileCard(username)
-            content_layout.add_widget(profile_card)
-        
         # Botones de acción
         actions_layout = MDBoxLayout(
             orientation='vertical',
@@ -199,61 +212,91 @@ class ProfileScreen(MDScreen):
         
         # Sección de mis historias
         my_stories_label = MDLabel(
-            text="Mis Historias Recientes",
+            text="Mis Historias",
             theme_text_color="Primary",
             font_style="H6",
             size_hint_y=None,
             height=dp(40)
         )
         content_layout.add_widget(my_stories_label)
+        main_layout.add_widget(content_layout)
         
-        # Grid para historias del usuario
-        self.user_stories_grid = MDGridLayout(
-            cols=1,
-            spacing=dp(12),
-            size_hint_y=None,
-            height=dp(0)
-        )
-        self.user_stories_grid.bind(minimum_height=self.user_stories_grid.setter('height'))
-        
-        content_layout.add_widget(self.user_stories_grid)
-        
-        scroll_view.add_widget(content_layout)
-        main_layout.add_widget(scroll_view)
+        # Lista virtualizada de historias del usuario
+        self.user_stories_list = StoryList(spacing=dp(12))
+        main_layout.add_widget(self.user_stories_list)
         
         self.add_widget(main_layout)
         
-        # Cargar historias del usuario
+        # Cargar perfil e historias del usuario después de mostrar la pantalla
+        after_first_paint(self.load_profile)
+    
+    def load_profile(self):
+        """
+        Obtiene el usuario de la sesión en segundo plano.
+        """
+        run_async(AsyncSessionManager.get_current_user(), on_success=self.on_user_loaded)
+    
+    def on_user_loaded(self, user):
+        """
+        Agrega la card de perfil (arriba del contenido) y carga las historias.
+        """
+        self.user = user
+        if not user:
+            self.user_stories_list.show_message("Inicia sesión para ver tus historias")
+            return
+        
+        if not self.profile_card:
+            self.profile_card = ProfileCard(user)
+            self.content_layout.add_widget(
+                self.profile_card,
+                index=len(self.content_layout.children)
+            )
         self.load_user_stories()
     
     def load_user_stories(self):
         """
-        Carga las historias del usuario actual.
+        Carga las historias del usuario actual (filtradas por autor en el servidor).
         """
-        username = SessionManager.get_session()
-        if not username:
+        if not self.user:
             return
         
-        stories = StoryManager.load_stories()
-        user_stories = [s for s in stories if s.get('author') == username]
-        
-        self.user_stories_grid.clear_widgets()
-        
-        if not user_stories:
-            no_stories_label = MDLabel(
-                text="Aún no has publicado historias",
-                theme_text_color="Secondary",
-                halign="center",
-                size_hint_y=None,
-                height=dp(60)
-            )
-            self.user_stories_grid.add_widget(no_stories_label)
+        run_async(
+            AsyncStoryManager.get_stories_by_author_id(self.user.id),
+            on_success=self.show_user_stories,
+            on_error=lambda error: self.show_user_stories(None)
+        )
+    
+    def show_user_stories(self, user_stories):
+        """
+        Muestra las historias recibidas en la lista (None si la consulta falló).
+        """
+        if user_stories is None:
+            self.user_stories_list.show_message("No se pudieron cargar tus historias")
+            return
+        # La lista es virtualizada, así que se pueden mostrar todas (más recientes primero)
+        self.user_stories_list.set_stories(
+            user_stories,
+            empty_text="Aún no has publicado historias"
+        )
+    
+    def on_story_change(self, kind, story):
+        """
+        Aplica un cambio en tiempo real a las historias del usuario y, si
+        alguna suya cambió, actualiza sus estadísticas.
+        """
+        if not self.user:
             return
         
-        # Mostrar las 3 más recientes
-        for story in user_stories[-3:]:
-            story_card = StoryCard(story)
-            self.user_stories_grid.add_widget(story_card)
+        if kind == 'resync':
+            changed = True
+            self.load_user_stories()
+        else:
+            changed = self.user_stories_list.apply_change(
+                kind, story,
+                accepts=lambda story: story.get('author_id') == self.user.id
+            )
+        if changed and self.profile_card:
+            self.profile_card.load_stats()
     
     def create_new_story(self, *args):
         """
@@ -269,6 +312,8 @@ class ProfileScreen(MDScreen):
         # Por ahora, simplemente recarga las historias
         # En una implementación más completa, podría abrir una pantalla dedicada
         self.load_user_stories()
+        if self.profile_card:
+            self.profile_card.load_stats()
         self.show_dialog("Mostrando tus historias más recientes")
     
     def open_settings(self, *args):
@@ -279,9 +324,27 @@ class ProfileScreen(MDScreen):
     
     def logout(self, *args):
         """
-        Cierra la sesión del usuario y regresa al menú principal.
+        Cierra la sesión del usuario en segundo plano y regresa al menú
+        principal al terminar.
         """
-        SessionManager.clear_session()
+        run_async(
+            AsyncSessionManager.clear_session(),
+            on_success=self.on_logged_out,
+            on_error=self.on_logged_out
+        )
+    
+    def on_logged_out(self, *args):
+        """
+        Limpia el perfil mostrado y vuelve al menú tras cerrar la sesión.
+        La sesión se olvida en este dispositivo aunque falle la red.
+        """
+        # Olvidar el perfil mostrado para que el próximo usuario vea el suyo
+        if self.profile_card:
+            self.content_layout.remove_widget(self.profile_card)
+            self.profile_card = None
+        self.user = None
+        self.user_stories_list.show_message("Inicia sesión para ver tus historias")
+        
         app = App.get_running_app()
         app.screen_manager.current = 'menu'
         self.show_dialog("Sesión cerrada exitosamente")
@@ -300,4 +363,7 @@ class ProfileScreen(MDScreen):
         """
         Se ejecuta al entrar a la pantalla.
         """
-        self.load_user_stories()
\ No newline at end of file
+        if not self.user:
+            self.load_profile()
+        elif not StoryRealtime.is_live():
+            self.load_user_stories()
\ No newline at end of file
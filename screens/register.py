@@ -6,7 +6,8 @@ Contiene la lógica para registrar nuevos usuarios con validación mejorada.
 
 from kivymd.uix.screen import MDScreen  # Pantalla base KivyMD
 from kivymd.uix.dialog import MDDialog  # Diálogo para mostrar mensajes
-from models.user import UserManager     # Gestor de usuarios
+from models.user import AsyncUserManager  # Gestor de usuarios
+from utils.async_bridge import run_async   # Ejecuta la red fuera del hilo de la interfaz
 import re  # Para validación de email
 
 class RegisterScreen(MDScreen):
@@ -17,6 +18,7 @@ class RegisterScreen(MDScreen):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.dialog = None  # Diálogo reutilizable
+        self.registering = False  # Evita enviar el formulario dos veces
 
     def show_dialog(self, text):
         """
@@ -32,7 +34,11 @@ class RegisterScreen(MDScreen):
         """
         Obtiene los datos del formulario con validación completa y registra el usuario.
         Incluye validaciones de formato y longitud.
+        El registro corre en segundo plano para no congelar la interfaz.
         """
+        if self.registering:
+            return
+        
         username = self.ids.username.text.strip()
         email = self.ids.email.text.strip()
         password = self.ids.password.text
@@ -65,13 +71,32 @@ class RegisterScreen(MDScreen):
             return
         
         # Registrar usuario
-        success, msg = UserManager.register_user(username, password, email)
+        self.set_loading(True)
+        run_async(
+            AsyncUserManager.register_user(username, password, email),
+            on_success=self.on_register_result
+        )
+    
+    def on_register_result(self, outcome):
+        """
+        Recibe el resultado del registro en el hilo de la interfaz.
+        """
+        self.set_loading(False)
+        success, msg = outcome
         self.show_dialog(msg)
         
         # Si el registro fue exitoso, limpiar formulario
         if success:
             self.clear_form()
     
+    def set_loading(self, loading):
+        """
+        Muestra el estado de carga en el botón de registro.
+        """
+        self.registering = loading
+        self.ids.register_button.disabled = loading
+        self.ids.register_button.text = 'CREANDO CUENTA...' if loading else 'CREAR CUENTA'
+    
     def clear_form(self):
         """
         Limpia todos los campos del formulario.
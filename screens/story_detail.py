@@ -9,15 +9,19 @@ from kivymd.uix.boxlayout import MDBoxLayout
 from kivymd.uix.label import MDLabel
 from kivymd.uix.button import MDIconButton, MDRaisedButton
 from kivymd.uix.card import MDCard
-from kivymd.uix.scrollview import MDScrollView
 from kivymd.uix.toolbar import MDTopAppBar
 from kivy.metrics import dp
 from kivy.app import App
+from models.story import AsyncStoryManager
+from screens.story_prefetch import StoryPrefetcher
+from screens.story_reader import StoryReader
+from utils.async_bridge import run_async
 
 class StoryDetailScreen(MDScreen):
     """
     Pantalla de detalle de historia.
     Muestra el contenido completo con opciones de interacción.
+    Sus widgets se crean una vez y se reutilizan al abrir cada historia.
     """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -43,35 +47,30 @@ class StoryDetailScreen(MDScreen):
         )
         main_layout.add_widget(toolbar)
         
-        # ScrollView para el contenido
-        scroll_view = MDScrollView(padding=dp(16))
-        
-        # Layout del contenido
+        # Layout del contenido: la card del título y las acciones quedan
+        # fijas y el texto se desplaza en el lector
         self.content_layout = MDBoxLayout(
             orientation='vertical',
             spacing=dp(16),
-            size_hint_y=None,
-            height=dp(0)
+            padding=dp(16)
         )
-        self.content_layout.bind(minimum_height=self.content_layout.setter('height'))
-        
-        scroll_view.add_widget(self.content_layout)
-        main_layout.add_widget(scroll_view)
+        main_layout.add_widget(self.content_layout)
         
         self.add_widget(main_layout)
+        
+        # Las cards se crean una sola vez y se reutilizan para cada historia
+        self.setup_story_card()
+        self.setup_reader()
+        self.setup_actions()
     
-    def load_story(self, story_data):
+    def setup_story_card(self):
         """
-        Carga los datos de la historia en la pantalla.
+        Crea la card con categoría, autor y título; load_story solo cambia sus textos.
         """
-        self.current_story = story_data
-        self.content_layout.clear_widgets()
-        
-        # Card principal de la historia
         story_card = MDCard(
             orientation='vertical',
             size_hint_y=None,
-            height=dp(0),  # Se ajustará automáticamente
+            height=dp(130),
             md_bg_color=[0.1, 0.1, 0.1, 1],
             elevation=3,
             radius=[15, 15, 15, 15],
@@ -88,61 +87,59 @@ class StoryDetailScreen(MDScreen):
         )
         
         # Etiqueta de categoría
-        category_label = MDLabel(
-            text=story_data.get('category', 'Sin categoría'),
+        self.category_label = MDLabel(
             theme_text_color="Custom",
             text_color=[0.8, 0.1, 0.1, 1],
             font_style="Caption",
             size_hint_x=None,
             width=dp(120)
         )
-        header_layout.add_widget(category_label)
+        header_layout.add_widget(self.category_label)
         
         # Spacer
         header_layout.add_widget(MDLabel())
         
         # Autor
-        author_label = MDLabel(
-            text=f"Por: {story_data.get('author', 'Anónimo')}",
+        self.author_label = MDLabel(
             theme_text_color="Secondary",
             font_style="Caption",
             halign="right"
         )
-        header_layout.add_widget(author_label)
+        header_layout.add_widget(self.author_label)
         
         story_card.add_widget(header_layout)
         
         # Título de la historia
-        title_label = MDLabel(
-            text=story_data.get('title', 'Sin título'),
+        self.title_label = MDLabel(
             theme_text_color="Primary",
             font_style="H5",
             size_hint_y=None,
             height=dp(60),
             text_size=(None, None)
         )
-        story_card.add_widget(title_label)
-        
-        # Contenido completo de la historia
-        content_label = MDLabel(
-            text=story_data.get('content', 'Sin contenido'),
-            theme_text_color="Primary",
-            font_style="Body1",
-            size_hint_y=None,
-            text_size=(dp(320), None),  # Ancho fijo para wrap
-            height=dp(0)  # Se calculará automáticamente
-        )
-        
-        # Calcular altura basada en el contenido
-        content_label.bind(texture_size=content_label.setter('size'))
-        story_card.add_widget(content_label)
-        
-        # Ajustar altura de la card
-        story_card.height = dp(150) + content_label.texture_size[1]
+        story_card.add_widget(self.title_label)
         
         self.content_layout.add_widget(story_card)
-        
-        # Card de acciones
+    
+    def setup_reader(self):
+        """
+        Crea el lector del contenido. Solo rasteriza los párrafos visibles,
+        así una historia larga no genera una única textura enorme.
+        """
+        reader_card = MDCard(
+            md_bg_color=[0.1, 0.1, 0.1, 1],
+            elevation=3,
+            radius=[15, 15, 15, 15],
+            padding=(0, dp(12))
+        )
+        self.reader = StoryReader()
+        reader_card.add_widget(self.reader)
+        self.content_layout.add_widget(reader_card)
+    
+    def setup_actions(self):
+        """
+        Crea la card de acciones con el botón para volver.
+        """
         actions_card = MDCard(
             orientation='horizontal',
             size_hint_y=None,
@@ -176,9 +173,6 @@ class StoryDetailScreen(MDScreen):
         )
         actions_card.add_widget(comment_button)
         
-        # Spacer
-        actions_card.add_widget(MDLabel())
-        
         # Botón de compartir
         share_button = MDIconButton(
             icon="share-variant",
@@ -190,17 +184,95 @@ class StoryDetailScreen(MDScreen):
         )
         actions_card.add_widget(share_button)
         
-        self.content_layout.add_widget(actions_card)
+        # Spacer
+        actions_card.add_widget(MDLabel())
+        
+        # Botón para reintentar la descarga del contenido (oculto salvo error)
+        self.retry_button = MDRaisedButton(
+            text="REINTENTAR",
+            md_bg_color=[0.8, 0.1, 0.1, 1],
+            pos_hint={'center_y': 0.5},
+            on_release=self.retry_load
+        )
+        self.show_retry(False)
+        actions_card.add_widget(self.retry_button)
         
         # Botón para volver (alternativo)
         back_button = MDRaisedButton(
             text="VOLVER",
             md_bg_color=[0.3, 0.3, 0.3, 1],
-            size_hint_y=None,
-            height=dp(45),
+            pos_hint={'center_y': 0.5},
             on_release=self.go_back
         )
-        self.content_layout.add_widget(back_button)
+        actions_card.add_widget(back_button)
+        
+        self.content_layout.add_widget(actions_card)
+    
+    def load_story(self, story_data):
+        """
+        Carga los datos de la historia en la pantalla.
+        Solo cambia los textos de los widgets existentes. Las listas traen
+        el extracto: el contenido completo sale del precargador o, si no
+        alcanzó a precargarse, se descarga aquí en segundo plano.
+        """
+        if story_data.get('content') is None and story_data.get('id'):
+            prefetched = StoryPrefetcher.get(story_data['id'], story_data.get('updated_at'))
+            if prefetched:
+                story_data = prefetched
+        
+        self.current_story = story_data
+        needs_content = story_data.get('content') is None and story_data.get('id')
+        
+        self.category_label.text = story_data.get('category', 'Sin categoría')
+        self.author_label.text = f"Por: {story_data.get('author', 'Anónimo')}"
+        self.title_label.text = story_data.get('title', 'Sin título')
+        self.show_retry(False)
+        if needs_content:
+            self.load_content(story_data['id'])
+        else:
+            self.reader.set_content(story_data.get('content') or 'Sin contenido')
+    
+    def load_content(self, story_id):
+        """
+        Descarga en segundo plano el contenido completo de la historia.
+        """
+        self.reader.set_content('Cargando historia...')
+        run_async(
+            AsyncStoryManager.get_story_by_id(story_id),
+            on_success=lambda story: self.on_full_story(story_id, story),
+            on_error=lambda error: self.on_full_story(story_id, None)
+        )
+    
+    def on_full_story(self, story_id, story):
+        """
+        Muestra el contenido completo cuando termina de descargarse,
+        si el usuario sigue viendo la misma historia. Si la descarga
+        falló, muestra el error y el botón para reintentar.
+        """
+        if not self.current_story or story_id != self.current_story.get('id'):
+            return
+        if not story:
+            self.reader.set_content('No se pudo cargar la historia. Revisa tu conexión e inténtalo de nuevo.')
+            self.show_retry(True)
+            return
+        self.current_story = story.to_dict()
+        self.reader.set_content(story.content or 'Sin contenido')
+    
+    def retry_load(self, *args):
+        """
+        Vuelve a pedir el contenido de la historia actual.
+        """
+        if not self.current_story or not self.current_story.get('id'):
+            return
+        self.show_retry(False)
+        self.load_content(self.current_story['id'])
+    
+    def show_retry(self, visible):
+        """
+        Muestra u oculta el botón para reintentar.
+        """
+        self.retry_button.opacity = 1 if visible else 0
+        self.retry_button.disabled = not visible
     
     def go_back(self, *args):
         """
@@ -16,8 +16,9 @@ from kivymd.uix.scrollview import MDScrollView
 from kivymd.uix.card import MDCard
 from kivy.metrics import dp
 from kivy.app import App
-from models.story import StoryManager
-from models.user import SessionManager
+from models.story import AsyncStoryManager
+from models.user import AsyncSessionManager
+from utils.async_bridge import run_async
 
 # Categorías actualizadas con temática de terror
 CATEGORIES = [
@@ -37,6 +38,7 @@ class StoryFormScreen(MDScreen):
         self.menu = None
         self.edit_mode = False
         self.edit_story_id = None
+        self.publishing = False
         self.setup_ui()
     
     def setup_ui(self):
@@ -236,12 +238,14 @@ class StoryFormScreen(MDScreen):
     def publish_story(self, *args):
         """
         Publica una nueva historia o edita una existente.
-        Incluye validación mejorada.
+        Incluye validación mejorada. El guardado corre en segundo plano.
         """
+        if self.publishing:
+            return
+
         title = self.title_field.text.strip()
         content = self.content_field.text.strip()
         category = self.category_field.text.strip()
-        current_user = SessionManager.get_current_user()
 
         # Validaciones
         if not title:
@@ -264,25 +268,53 @@ class StoryFormScreen(MDScreen):
             self.show_dialog('Por favor, selecciona una categoría.')
             return
 
+        # Publicar o editar historia
+        edit_story_id = self.edit_story_id if self.edit_mode else None
+        self.set_publishing(True)
+        run_async(
+            self.save_story(title, content, category, edit_story_id),
+            on_success=self.on_publish_result
+        )
+
+    @staticmethod
+    async def save_story(title, content, category, edit_story_id=None):
+        """
+        Guarda la historia en Supabase (se ejecuta en segundo plano).
+        """
+        current_user = await AsyncSessionManager.get_current_user()
         if not current_user:
-            self.show_dialog('Error de sesión. Por favor, inicia sesión nuevamente.')
-            return
+            return False, 'Error de sesión. Por favor, inicia sesión nuevamente.'
 
-        # Publicar o editar historia
-        if self.edit_mode and self.edit_story_id is not None:
-            success, msg = StoryManager.update_story(self.edit_story_id, title, content, category)
-            self.show_dialog(msg)
-            self.edit_mode = False
-            self.edit_story_id = None
-        else:
-            success, msg = StoryManager.add_story(title, content, category, current_user.id)
-            self.show_dialog(msg)
+        if edit_story_id is not None:
+            return await AsyncStoryManager.update_story(edit_story_id, title, content, category)
+        return await AsyncStoryManager.add_story(title, content, category, current_user.id)
+
+    def on_publish_result(self, outcome):
+        """
+        Recibe el resultado del guardado en el hilo de la interfaz.
+        """
+        self.set_publishing(False)
+        success, msg = outcome
+        self.show_dialog(msg)
 
         if success:
+            self.edit_mode = False
+            self.edit_story_id = None
             self.clear_form()
             # Regresar a la pantalla principal después de un breve delay
             from kivy.clock import Clock
             Clock.schedule_once(lambda dt: self.go_back(), 2)
+
+    def set_publishing(self, publishing):
+        """
+        Muestra el estado de carga en el botón de publicar.
+        """
+        self.publishing = publishing
+        self.publish_button.disabled = publishing
+        if publishing:
+            self.publish_button.text = "GUARDANDO..."
+        else:
+            self.publish_button.text = "GUARDAR CAMBIOS" if self.edit_mode else "PUBLICAR"
     
     def clear_form(self):
         """
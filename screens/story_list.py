@@ -0,0 +1,341 @@
+"""
+story_list.py
+Lista virtualizada de historias compartida por Inicio, Explorar y Perfil.
+Usa un RecycleView: solo se crean las cards visibles y se reutilizan al
+hacer scroll, por lo que el costo no depende de la cantidad de resultados.
+"""
+
+from kivymd.uix.card import MDCard
+from kivymd.uix.boxlayout import MDBoxLayout
+from kivymd.uix.label import MDLabel
+from kivymd.uix.button import MDIconButton, MDRaisedButton
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.properties import ObjectProperty
+from kivy.metrics import dp
+from kivy.app import App
+from screens.story_prefetch import StoryPrefetcher
+
+# Alto fijo de cada card (el RecycleView necesita conocerlo sin crearla)
+STORY_CARD_HEIGHT = dp(200)
+
+# Alto de las filas de aviso y del botón de cargar más
+MESSAGE_HEIGHT = dp(100)
+FOOTER_HEIGHT = dp(45)
+
+class StoryCard(RecycleDataViewBehavior, MDCard):
+    """
+    Card personalizada para mostrar historias.
+    Incluye título, categoría, autor y preview del contenido.
+    Los widgets se crean una sola vez; al reciclarse la card solo
+    se actualizan los textos a partir de story_data.
+    """
+    story_data = ObjectProperty(None, allownone=True)
+
+    def __init__(self, story_data=None, **kwargs):
+        super().__init__(**kwargs)
+        self.setup_card()
+        self.story_data = story_data
+
+    def setup_card(self):
+        """
+        Configura el diseño de la card.
+        """
+        # Configuración de la card
+        self.orientation = 'vertical'
+        self.size_hint_y = None
+        self.height = STORY_CARD_HEIGHT
+        self.md_bg_color = [0.1, 0.1, 0.1, 1]  # Fondo oscuro
+        self.elevation = 3
+        self.radius = [15, 15, 15, 15]
+        self.padding = dp(16)
+        self.spacing = dp(8)
+        self.ripple_behavior = True
+
+        # Bind del evento de toque
+        self.bind(on_release=self.open_story_detail)
+
+        # Header con categoría
+        header_layout = MDBoxLayout(
+            orientation='horizontal',
+            size_hint_y=None,
+            height=dp(30),
+            spacing=dp(8)
+        )
+
+        # Etiqueta de categoría
+        self.category_label = MDLabel(
+            theme_text_color="Custom",
+            text_color=[0.8, 0.1, 0.1, 1],  # Rojo
+            font_style="Caption",
+            size_hint_x=None,
+            width=dp(100)
+        )
+        header_layout.add_widget(self.category_label)
+
+        # Spacer
+        header_layout.add_widget(MDLabel())
+
+        # Botón de favoritos (placeholder)
+        fav_button = MDIconButton(
+            icon="heart-outline",
+            theme_icon_color="Custom",
+            icon_color=[0.5, 0.5, 0.5, 1],
+            size_hint=(None, None),
+            size=(dp(30), dp(30))
+        )
+        header_layout.add_widget(fav_button)
+
+        self.add_widget(header_layout)
+
+        # Título de la historia
+        self.title_label = MDLabel(
+            theme_text_color="Primary",
+            font_style="H6",
+            size_hint_y=None,
+            height=dp(40),
+            text_size=(None, None)
+        )
+        self.add_widget(self.title_label)
+
+        # Preview del contenido
+        self.content_label = MDLabel(
+            theme_text_color="Secondary",
+            font_style="Body2",
+            size_hint_y=None,
+            height=dp(60),
+            text_size=(dp(300), None)
+        )
+        self.add_widget(self.content_label)
+
+        # Footer con autor
+        footer_layout = MDBoxLayout(
+            orientation='horizontal',
+            size_hint_y=None,
+            height=dp(30)
+        )
+
+        self.author_label = MDLabel(
+            theme_text_color="Secondary",
+            font_style="Caption",
+            size_hint_x=0.7
+        )
+        footer_layout.add_widget(self.author_label)
+
+        # Botón de compartir (placeholder)
+        share_button = MDIconButton(
+            icon="share-variant",
+            theme_icon_color="Custom",
+            icon_color=[0.5, 0.5, 0.5, 1],
+            size_hint=(None, None),
+            size=(dp(30), dp(30))
+        )
+        footer_layout.add_widget(share_button)
+
+        self.add_widget(footer_layout)
+
+    def on_story_data(self, instance, story_data):
+        """
+        Actualiza los textos de la card con la historia asignada.
+        """
+        story_data = story_data or {}
+
+        self.category_label.text = story_data.get('category', 'Sin categoría')
+        self.title_label.text = story_data.get('title', 'Sin título')
+
+        # Preview del contenido (extracto precalculado en el servidor)
+        content_preview = story_data.get('excerpt')
+        if content_preview is None:
+            content = story_data.get('content') or ''
+            content_preview = content[:100] + "..." if len(content) > 100 else content
+        self.content_label.text = content_preview
+
+        author_text = f"Por: {story_data.get('author', 'Anónimo')}"
+        if story_data.get('word_count'):
+            author_text += f" · {story_data['word_count']} palabras"
+        self.author_label.text = author_text
+
+        # La card está en pantalla: precargar el contenido para el detalle
+        if story_data:
+            StoryPrefetcher.want(story_data)
+
+    def open_story_detail(self, *args):
+        """
+        Abre la pantalla de detalle de la historia.
+        """
+        if not self.story_data:
+            return
+        app = App.get_running_app()
+        detail_screen = app.screen_manager.get_screen('story_detail')
+        detail_screen.load_story(self.story_data)
+        app.screen_manager.current = 'story_detail'
+
+class StoryListMessage(RecycleDataViewBehavior, MDLabel):
+    """
+    Fila de aviso de la lista ("Cargando...", "No se encontraron historias").
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.theme_text_color = "Secondary"
+        self.halign = "center"
+
+class StoryListFooter(RecycleDataViewBehavior, MDBoxLayout):
+    """
+    Última fila de la lista con el botón para cargar la siguiente página.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.story_list = None
+        self.add_widget(MDRaisedButton(
+            text="CARGAR MÁS",
+            md_bg_color=[0.3, 0.3, 0.3, 1],
+            size_hint_y=None,
+            height=FOOTER_HEIGHT,
+            on_release=self.load_more
+        ))
+
+    def refresh_view_attrs(self, rv, index, data):
+        """
+        Guarda la lista dueña de la fila al reciclarla.
+        """
+        self.story_list = rv
+        return super().refresh_view_attrs(rv, index, data)
+
+    def load_more(self, *args):
+        """
+        Pide la siguiente página a la pantalla que usa la lista.
+        """
+        if self.story_list:
+            self.story_list.dispatch('on_end_reached')
+
+class StoryList(RecycleView):
+    """
+    Lista virtualizada de historias.
+    Cada fila de 'data' indica su viewclass, así la lista puede mezclar
+    cards, avisos y el botón de cargar más sin crear widgets de más.
+    Emite on_end_reached cuando el scroll llega al final.
+    Los cambios en tiempo real se aplican con apply_change, que solo
+    refresca la fila afectada.
+    """
+    __events__ = ('on_end_reached',)
+
+    def __init__(self, spacing=dp(16), **kwargs):
+        super().__init__(**kwargs)
+        self.key_viewclass = 'viewclass'
+        self.has_more = False
+        self.empty_text = "No se encontraron historias"
+
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            spacing=spacing,
+            size_hint_y=None,
+            default_size=(None, STORY_CARD_HEIGHT),
+            default_size_hint=(1, None)
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+
+        self.bind(scroll_y=self.on_scroll)
+
+    def story_rows(self, stories):
+        """
+        Convierte diccionarios de historias en filas del RecycleView.
+        """
+        return [{'viewclass': 'StoryCard', 'story_data': story} for story in stories]
+
+    def footer_rows(self):
+        """
+        Retorna la fila del botón de cargar más si quedan páginas.
+        """
+        if not self.has_more:
+            return []
+        return [{'viewclass': 'StoryListFooter', 'size': (None, FOOTER_HEIGHT)}]
+
+    def set_stories(self, stories, has_more=False, empty_text="No se encontraron historias"):
+        """
+        Reemplaza el contenido de la lista y vuelve al inicio.
+        """
+        self.empty_text = empty_text
+        if not stories:
+            self.show_message(empty_text)
+            return
+
+        self.has_more = has_more
+        self.data = self.story_rows(stories) + self.footer_rows()
+        self.scroll_y = 1
+
+    def add_stories(self, stories, has_more=False):
+        """
+        Agrega historias al final de la lista manteniendo la posición del scroll.
+        """
+        rows = [row for row in self.data if row['viewclass'] == 'StoryCard']
+        self.has_more = has_more
+        self.data = rows + self.story_rows(stories) + self.footer_rows()
+
+    def story_index(self, story_id):
+        """
+        Retorna la posición en 'data' de la card de la historia o None.
+        """
+        for index, row in enumerate(self.data):
+            if row['viewclass'] == 'StoryCard' and row['story_data'].get('id') == story_id:
+                return index
+        return None
+
+    def apply_change(self, kind, story, accepts=None):
+        """
+        Aplica un cambio en tiempo real ('insert', 'update' o 'delete').
+        accepts(historia) indica si la historia corresponde a lo que muestra
+        la lista (filtro, autor); por defecto todas. Retorna True si cambió.
+        """
+        index = self.story_index(story['id'])
+
+        if kind == 'delete' or (accepts and not accepts(story)):
+            if index is None:
+                return False
+            del self.data[index]
+            if not any(row['viewclass'] == 'StoryCard' for row in self.data):
+                self.show_message(self.empty_text)
+            return True
+
+        row = {'viewclass': 'StoryCard', 'story_data': story}
+        if index is not None:
+            self.data[index] = row
+            return True
+
+        # Historia nueva en la lista: se ubica por fecha (más recientes primero)
+        created_at = story.get('created_at') or ''
+        cards = [i for i, r in enumerate(self.data) if r['viewclass'] == 'StoryCard']
+        if not cards:
+            self.set_stories([story], empty_text=self.empty_text)
+            return True
+
+        position = next(
+            (i for i in cards if (self.data[i]['story_data'].get('created_at') or '') < created_at),
+            None
+        )
+        if position is None:
+            # Más antigua que todas: si quedan páginas aparecerá al cargarlas
+            if self.has_more:
+                return False
+            position = cards[-1] + 1
+        self.data.insert(position, row)
+        return True
+
+    def show_message(self, text):
+        """
+        Muestra un aviso en lugar de las historias.
+        """
+        self.has_more = False
+        self.data = [{'viewclass': 'StoryListMessage', 'text': text, 'size': (None, MESSAGE_HEIGHT)}]
+        self.scroll_y = 1
+
+    def on_scroll(self, instance, scroll_y):
+        """
+        Scroll infinito: al llegar al final del contenido pide otra página.
+        """
+        if self.has_more and scroll_y <= 0.05:
+            self.dispatch('on_end_reached')
+
+    def on_end_reached(self):
+        pass
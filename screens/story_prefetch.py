@@ -0,0 +1,223 @@
+"""
+story_prefetch.py
+Precarga en segundo plano el contenido completo de las historias cuyas
+cards aparecen en pantalla, para que el detalle se abra sin esperar la red.
+Respeta un presupuesto de memoria (contenido guardado) y uno de descarga
+(bytes por minuto y consultas simultáneas).
+"""
+
+import time
+from collections import OrderedDict
+from kivy.clock import Clock
+from models.story import AsyncStoryManager
+from models.story_realtime import StoryRealtime
+from utils.async_bridge import run_async, on_main_thread
+
+# Memoria máxima del contenido precargado (bytes de texto)
+MEMORY_BUDGET = 512 * 1024
+
+# Bytes que se pueden descargar para precargar en cada ventana
+BANDWIDTH_BUDGET = 1024 * 1024
+BANDWIDTH_WINDOW = 60
+
+# Las historias más largas no se precargan: se descargan al abrirlas
+MAX_STORY_BYTES = 64 * 1024
+
+# Historias por consulta, consultas simultáneas y pendientes que se recuerdan
+BATCH_SIZE = 10
+MAX_IN_FLIGHT = 1
+MAX_QUEUED = 2 * BATCH_SIZE
+
+# Pausa para juntar las cards que aparecen en un mismo scroll
+PREFETCH_DELAY = 0.15
+
+# Estimación del tamaño cuando solo se conoce el conteo de palabras
+BYTES_PER_WORD = 6
+UNKNOWN_STORY_BYTES = 4 * 1024
+
+def estimated_bytes(story_data):
+    """
+    Estima el tamaño del contenido de una historia de la lista.
+    """
+    if story_data.get('word_count'):
+        return story_data['word_count'] * BYTES_PER_WORD
+    return UNKNOWN_STORY_BYTES
+
+class StoryPrefetcher:
+    """
+    Clase estática usada desde el hilo de Kivy.
+    Las cards avisan con want() al mostrarse; las historias pendientes se
+    piden por lotes (las más recientes primero) y se guardan en un LRU por
+    bytes que StoryDetailScreen consulta con get().
+    """
+    _stories = OrderedDict()
+    _bytes = 0
+    _queue = OrderedDict()
+    _loading = set()
+    _in_flight = 0
+    _window_start = 0.0
+    _window_bytes = 0
+    _trigger = None
+
+    @staticmethod
+    def want(story_data):
+        """
+        Pide precargar una historia cuya card acaba de mostrarse.
+        """
+        story_id = story_data.get('id')
+        if not story_id or story_data.get('content') is not None:
+            return
+        if story_id in StoryPrefetcher._stories or story_id in StoryPrefetcher._loading:
+            return
+        size = estimated_bytes(story_data)
+        if size > MAX_STORY_BYTES:
+            return
+
+        queue = StoryPrefetcher._queue
+        queue[story_id] = size
+        queue.move_to_end(story_id)
+        # Las cards que ya pasaron de largo dejan de tener prioridad
+        while len(queue) > MAX_QUEUED:
+            queue.popitem(last=False)
+
+        if StoryPrefetcher._trigger is None:
+            StoryPrefetcher._trigger = Clock.create_trigger(StoryPrefetcher._flush, PREFETCH_DELAY)
+        StoryPrefetcher._trigger()
+
+    @staticmethod
+    def get(story_id, updated_at=None):
+        """
+        Retorna la historia precargada (diccionario con contenido) o None.
+        Si se indica updated_at, solo la retorna si es la misma versión.
+        """
+        story = StoryPrefetcher._stories.get(story_id)
+        if story is None:
+            return None
+        if updated_at and story.get('updated_at') and story['updated_at'] != updated_at:
+            StoryPrefetcher.forget(story_id)
+            return None
+        StoryPrefetcher._stories.move_to_end(story_id)
+        return story
+
+    @staticmethod
+    def forget(story_id):
+        """
+        Descarta la historia precargada (cambió o se eliminó).
+        """
+        story = StoryPrefetcher._stories.pop(story_id, None)
+        if story is not None:
+            StoryPrefetcher._bytes -= StoryPrefetcher._size(story)
+
+    @staticmethod
+    def clear():
+        """
+        Descarta todo el contenido precargado.
+        """
+        StoryPrefetcher._stories.clear()
+        StoryPrefetcher._bytes = 0
+
+    @staticmethod
+    def stats():
+        """
+        Retorna el uso de los presupuestos, para ajustarlos.
+        """
+        return {
+            'stories': len(StoryPrefetcher._stories),
+            'bytes': StoryPrefetcher._bytes,
+            'queued': len(StoryPrefetcher._queue),
+            'in_flight': StoryPrefetcher._in_flight,
+            'window_bytes': StoryPrefetcher._window_bytes
+        }
+
+    @staticmethod
+    def _size(story):
+        return len((story.get('content') or '').encode('utf-8'))
+
+    @staticmethod
+    def _bandwidth_left():
+        """
+        Bytes disponibles en la ventana de descarga actual.
+        """
+        now = time.monotonic()
+        if now - StoryPrefetcher._window_start >= BANDWIDTH_WINDOW:
+            StoryPrefetcher._window_start = now
+            StoryPrefetcher._window_bytes = 0
+        return BANDWIDTH_BUDGET - StoryPrefetcher._window_bytes
+
+    @staticmethod
+    def _flush(*args):
+        """
+        Envía el siguiente lote si hay cupo de consultas y de descarga.
+        """
+        queue = StoryPrefetcher._queue
+        if not queue or StoryPrefetcher._in_flight >= MAX_IN_FLIGHT:
+            return
+
+        left = StoryPrefetcher._bandwidth_left()
+        batch = []
+        for story_id in reversed(queue):
+            if len(batch) == BATCH_SIZE or queue[story_id] > left:
+                break
+            left -= queue[story_id]
+            batch.append(story_id)
+
+        if not batch:
+            # Sin cupo en esta ventana: reintentar cuando empiece la siguiente
+            wait = BANDWIDTH_WINDOW - (time.monotonic() - StoryPrefetcher._window_start)
+            Clock.schedule_once(StoryPrefetcher._flush, max(wait, PREFETCH_DELAY))
+            return
+
+        for story_id in batch:
+            StoryPrefetcher._window_bytes += queue.pop(story_id)
+        StoryPrefetcher._loading.update(batch)
+        StoryPrefetcher._in_flight += 1
+        run_async(
+            AsyncStoryManager.get_full_stories(batch),
+            on_success=lambda stories: StoryPrefetcher._on_loaded(batch, stories),
+            on_error=lambda error: StoryPrefetcher._on_error(batch, error)
+        )
+
+    @staticmethod
+    def _on_loaded(batch, stories):
+        """
+        Guarda las historias recibidas y desaloja las más antiguas si se
+        supera el presupuesto de memoria.
+        """
+        StoryPrefetcher._in_flight -= 1
+        StoryPrefetcher._loading.difference_update(batch)
+        for story in stories:
+            StoryPrefetcher.forget(story['id'])
+            StoryPrefetcher._stories[story['id']] = story
+            StoryPrefetcher._bytes += StoryPrefetcher._size(story)
+
+        while StoryPrefetcher._bytes > MEMORY_BUDGET and StoryPrefetcher._stories:
+            _, evicted = StoryPrefetcher._stories.popitem(last=False)
+            StoryPrefetcher._bytes -= StoryPrefetcher._size(evicted)
+
+        if StoryPrefetcher._queue:
+            StoryPrefetcher._trigger()
+
+    @staticmethod
+    def _on_error(batch, error):
+        """
+        Libera el cupo del lote fallido y sigue con los pendientes, para que
+        un error no detenga la precarga del resto de las cards.
+        """
+        StoryPrefetcher._in_flight -= 1
+        StoryPrefetcher._loading.difference_update(batch)
+        print(f"Error al precargar historias: {error}")
+
+        if StoryPrefetcher._queue:
+            StoryPrefetcher._trigger()
+
+    @staticmethod
+    def on_story_change(kind, story):
+        """
+        Descarta el contenido de las historias que cambian en tiempo real.
+        """
+        if story is None:
+            StoryPrefetcher.clear()
+        else:
+            StoryPrefetcher.forget(story['id'])
+
+StoryRealtime.add_listener(on_main_thread(StoryPrefetcher.on_story_change))
@@ -0,0 +1,190 @@
+"""
+story_reader.py
+Lector del contenido de una historia para StoryDetailScreen.
+Divide el texto en fragmentos por párrafo y los muestra en un RecycleView:
+solo se rasterizan los fragmentos cercanos a la vista, cada uno con una
+textura pequeña, así la memoria y el tiempo de layout no dependen del largo
+de la historia. La división y el cálculo de altos corren en segundo plano.
+"""
+
+import asyncio
+import math
+import re
+from kivymd.uix.label import MDLabel
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.clock import Clock
+from kivy.metrics import dp
+from utils.async_bridge import run_async
+
+# Máximo de caracteres por fragmento (cada uno es una textura; así ninguna
+# se acerca al tamaño máximo de textura de la GPU)
+CHUNK_CHARS = 1200
+
+# Textos más cortos se dividen en el hilo de la interfaz (no vale la pena esperar)
+INLINE_CHARS = 2 * CHUNK_CHARS
+
+# Texto para medir el ancho medio de un carácter y el alto de línea
+SAMPLE_TEXT = 'La Llorona aparece cerca del río cuando cae la noche'
+
+def split_paragraphs(content, max_chars=CHUNK_CHARS):
+    """
+    Divide el contenido en párrafos (separados por líneas en blanco) y los
+    párrafos largos en fragmentos de hasta max_chars, cortando de
+    preferencia al final de una oración y si no en un espacio.
+    """
+    chunks = []
+    for paragraph in re.split(r'\n\s*\n', content or ''):
+        paragraph = paragraph.strip()
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind('. ', 0, max_chars) + 1
+            if cut < max_chars // 2:
+                cut = paragraph.rfind(' ', 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            chunks.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        if paragraph:
+            chunks.append(paragraph)
+    return chunks
+
+def estimate_height(text, width, char_width, line_height):
+    """
+    Estima el alto de un fragmento ya envuelto al ancho dado.
+    """
+    chars_per_line = max(1, int(width // char_width))
+    lines = sum(max(1, math.ceil(len(line) / chars_per_line)) for line in text.split('\n'))
+    return lines * line_height
+
+def layout_rows(content, width, char_width, line_height):
+    """
+    Convierte el contenido en filas del RecycleView con su alto estimado.
+    No toca widgets, así que puede correr fuera del hilo de la interfaz.
+    """
+    return [
+        {
+            'viewclass': 'StoryParagraph',
+            'text': chunk,
+            'size': (None, estimate_height(chunk, width, char_width, line_height))
+        }
+        for chunk in split_paragraphs(content)
+    ]
+
+async def layout_rows_async(content, width, char_width, line_height):
+    """
+    Igual que layout_rows, en un hilo del pool para no ocupar el loop de red.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, layout_rows, content, width, char_width, line_height)
+
+class StoryParagraph(RecycleDataViewBehavior, MDLabel):
+    """
+    Fragmento del texto. Al rasterizarse corrige el alto estimado de su
+    fila si el real es distinto.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.reader = None
+        self.index = None
+        self.theme_text_color = "Primary"
+        self.font_style = "Body1"
+        self.size_hint_y = None
+        self.bind(width=self.update_text_size)
+        self.bind(texture_size=self.update_row_height)
+
+    def refresh_view_attrs(self, rv, index, data):
+        """
+        Guarda el lector y la fila al reciclar la vista.
+        """
+        self.reader = rv
+        self.index = index
+        return super().refresh_view_attrs(rv, index, data)
+
+    def update_text_size(self, *args):
+        self.text_size = (self.width, None)
+
+    def update_row_height(self, label, texture_size):
+        """
+        Ajusta el alto de la fila al de la textura real.
+        """
+        height = texture_size[1]
+        if not self.reader or self.index is None or self.index >= len(self.reader.data) or not height:
+            return
+        row = self.reader.data[self.index]
+        if row.get('text') == self.text and abs(row['size'][1] - height) > 1:
+            self.reader.data[self.index] = dict(row, size=(None, height))
+
+class StoryReader(RecycleView):
+    """
+    Lista virtualizada de fragmentos del texto de una historia.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.key_viewclass = 'viewclass'
+        self.content = ''
+        self.request_id = 0
+        self.metrics = None
+
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            spacing=dp(12),
+            padding=(dp(20), dp(8)),
+            size_hint_y=None,
+            default_size_hint=(1, None)
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+
+        # Al cambiar el ancho (rotación, ventana) se recalculan los altos
+        self.relayout_trigger = Clock.create_trigger(lambda dt: self.layout_content(), 0.2)
+        self.bind(width=lambda *args: self.relayout_trigger())
+
+    def text_width(self):
+        """
+        Ancho disponible para el texto (sin el padding del layout).
+        """
+        return max(self.width - dp(40), dp(100))
+
+    def measure(self):
+        """
+        Mide una vez, en el hilo de la interfaz, el ancho medio de un
+        carácter y el alto de línea de la fuente del lector.
+        """
+        if self.metrics is None:
+            sample = MDLabel(text=SAMPLE_TEXT, font_style="Body1")
+            sample.texture_update()
+            width, height = sample.texture_size
+            self.metrics = (max(width / len(SAMPLE_TEXT), 1), max(height, 1))
+        return self.metrics
+
+    def set_content(self, content):
+        """
+        Muestra un texto nuevo desde el inicio.
+        """
+        self.content = content or ''
+        self.scroll_y = 1
+        self.layout_content()
+
+    def layout_content(self):
+        """
+        Divide el texto actual en filas. Los textos largos se procesan en
+        segundo plano; si mientras tanto llega otro texto, el resultado
+        anterior se descarta.
+        """
+        self.request_id += 1
+        request_id = self.request_id
+        char_width, line_height = self.measure()
+
+        if len(self.content) <= INLINE_CHARS:
+            self.data = layout_rows(self.content, self.text_width(), char_width, line_height)
+            return
+
+        def show(rows):
+            if request_id == self.request_id:
+                self.data = rows
+
+        run_async(
+            layout_rows_async(self.content, self.text_width(), char_width, line_height),
+            on_success=show
+        )
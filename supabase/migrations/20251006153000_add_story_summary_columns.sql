@@ -0,0 +1,44 @@
+/*
+  # Columnas de resumen para las listas de historias
+
+  Las listas (inicio, explorar, perfil) solo muestran un preview del contenido,
+  pero hasta ahora descargaban el texto completo de cada historia.
+
+  ## Cambios
+
+  ### stories
+  - `excerpt` (text): Primeros 100 caracteres del contenido, con "..." si se corta
+  - `word_count` (integer): Cantidad de palabras del contenido
+
+  Ambas columnas se calculan en el servidor mediante un trigger al insertar
+  o al modificar `content`, por lo que el cliente nunca las escribe.
+*/
+
+-- Agregar columnas de resumen
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS excerpt text NOT NULL DEFAULT '';
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS word_count integer NOT NULL DEFAULT 0;
+
+-- Función para calcular el extracto y el conteo de palabras
+CREATE OR REPLACE FUNCTION update_story_summary_columns()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.excerpt = CASE
+    WHEN char_length(NEW.content) > 100 THEN left(NEW.content, 100) || '...'
+    ELSE NEW.content
+  END;
+  NEW.word_count = CASE
+    WHEN btrim(NEW.content) = '' THEN 0
+    ELSE array_length(regexp_split_to_array(btrim(NEW.content), '\s+'), 1)
+  END;
+  RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Trigger para mantener las columnas de resumen en stories
+CREATE TRIGGER update_stories_summary BEFORE INSERT OR UPDATE OF content ON stories
+  FOR EACH ROW EXECUTE FUNCTION update_story_summary_columns();
+
+-- Calcular el resumen de las historias existentes sin alterar updated_at
+ALTER TABLE stories DISABLE TRIGGER update_stories_updated_at;
+UPDATE stories SET content = content;
+ALTER TABLE stories ENABLE TRIGGER update_stories_updated_at;
@@ -0,0 +1,59 @@
+/*
+  # Soporte para sincronización incremental de historias
+
+  La app mantiene una réplica local (SQLite) de las historias y la sincroniza
+  descargando solo lo que cambió desde la última sincronización.
+
+  ## Cambios
+
+  ### 1. story_tombstones
+  Registra las historias eliminadas para que los clientes puedan borrarlas
+  de su réplica sin comparar la tabla completa.
+  - `story_id` (uuid, primary key): ID de la historia eliminada
+  - `deleted_at` (timestamptz): Fecha de eliminación
+
+  ### 2. Índices
+  - `(updated_at, id)` en stories para leer los cambios desde una marca
+  - `(deleted_at, story_id)` en story_tombstones con el mismo fin
+
+  ## Seguridad
+
+  - RLS habilitado; las lápidas son públicas para lectura como las historias
+  - Solo el trigger (SECURITY DEFINER) puede escribir en story_tombstones
+*/
+
+-- Crear tabla de historias eliminadas
+CREATE TABLE IF NOT EXISTS story_tombstones (
+  story_id uuid PRIMARY KEY,
+  deleted_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Índices para la sincronización incremental
+CREATE INDEX IF NOT EXISTS idx_stories_updated ON stories(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_story_tombstones_deleted ON story_tombstones(deleted_at, story_id);
+
+-- Habilitar RLS
+ALTER TABLE story_tombstones ENABLE ROW LEVEL SECURITY;
+
+-- Todos pueden leer las lápidas (igual que las historias)
+CREATE POLICY "Anyone can view story tombstones"
+  ON story_tombstones FOR SELECT
+  TO anon, authenticated
+  USING (true);
+
+-- Función para registrar la eliminación de una historia
+CREATE OR REPLACE FUNCTION record_story_tombstone()
+RETURNS TRIGGER
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO story_tombstones (story_id) VALUES (OLD.id)
+  ON CONFLICT (story_id) DO UPDATE SET deleted_at = now();
+  RETURN OLD;
+END;
+$$ language 'plpgsql';
+
+-- Trigger para registrar eliminaciones en stories
+CREATE TRIGGER record_stories_tombstone AFTER DELETE ON stories
+  FOR EACH ROW EXECUTE FUNCTION record_story_tombstone();
@@ -0,0 +1,72 @@
+/*
+  # Búsqueda de texto completo en historias
+
+  Reemplaza la búsqueda por `ilike '%texto%'`, que no puede usar índices,
+  por búsqueda de texto completo en español con ranking.
+
+  ## Cambios
+
+  ### 1. Configuración de búsqueda `es_unaccent`
+  Copia de la configuración `spanish` que además elimina acentos, para que
+  "aparición" encuentre "apariciones" y "aparicion".
+
+  ### 2. stories.search_vector
+  - `search_vector` (tsvector, generada): título (peso A) + contenido (peso B)
+  - Índice GIN `idx_stories_search`
+
+  ### 3. Función `search_stories(search_query, max_results)`
+  Retorna la proyección de listas con el autor, ordenada por `ts_rank`.
+  Acepta la sintaxis de búsqueda web: "frases entre comillas", -exclusión, or.
+*/
+
+-- Extensión para eliminar acentos
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- Configuración de búsqueda en español sin acentos
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'es_unaccent') THEN
+    CREATE TEXT SEARCH CONFIGURATION es_unaccent (COPY = spanish);
+    ALTER TEXT SEARCH CONFIGURATION es_unaccent
+      ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+  END IF;
+END
+$$;
+
+-- Columna generada con el documento de búsqueda
+ALTER TABLE stories ADD COLUMN IF NOT EXISTS search_vector tsvector
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('public.es_unaccent', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('public.es_unaccent', coalesce(content, '')), 'B')
+  ) STORED;
+
+-- Índice GIN para la búsqueda
+CREATE INDEX IF NOT EXISTS idx_stories_search ON stories USING gin(search_vector);
+
+-- Función de búsqueda con ranking
+CREATE OR REPLACE FUNCTION search_stories(search_query text, max_results integer DEFAULT 50)
+RETURNS TABLE (
+  id uuid,
+  title text,
+  category text,
+  author_id uuid,
+  excerpt text,
+  word_count integer,
+  created_at timestamptz,
+  updated_at timestamptz,
+  author text,
+  rank real
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT s.id, s.title, s.category, s.author_id, s.excerpt, s.word_count,
+         s.created_at, s.updated_at, u.username AS author,
+         ts_rank(s.search_vector, q.query) AS rank
+  FROM stories s
+  CROSS JOIN websearch_to_tsquery('public.es_unaccent', search_query) AS q(query)
+  LEFT JOIN users u ON u.id = s.author_id
+  WHERE s.search_vector @@ q.query
+  ORDER BY rank DESC, s.created_at DESC
+  LIMIT max_results;
+$$;
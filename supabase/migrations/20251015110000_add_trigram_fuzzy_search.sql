@@ -0,0 +1,73 @@
+/*
+  # Búsqueda difusa por trigramas
+
+  Las leyendas se escriben de muchas formas ("la llorona" / "yorona",
+  "caleuche" / "calcuchi"). La búsqueda de texto completo no tolera errores
+  de ortografía, así que se agrega una búsqueda por similitud de trigramas.
+
+  ## Cambios
+
+  ### 1. Índices GIN de trigramas
+  - `idx_stories_title_trgm` en stories.title
+  - `idx_users_username_trgm` en users.username
+
+  ### 2. Función `fuzzy_search_stories(search_query, min_similarity, max_results)`
+  Retorna la proyección de listas con el autor, para historias cuyo título
+  o autor se parecen a la búsqueda (`word_similarity` >= min_similarity),
+  ordenadas por similitud.
+*/
+
+-- Extensión de trigramas
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Índices de trigramas
+CREATE INDEX IF NOT EXISTS idx_stories_title_trgm ON stories USING gin(title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_users_username_trgm ON users USING gin(username gin_trgm_ops);
+
+-- Función de búsqueda difusa
+CREATE OR REPLACE FUNCTION fuzzy_search_stories(
+  search_query text,
+  min_similarity real DEFAULT 0.3,
+  max_results integer DEFAULT 50
+)
+RETURNS TABLE (
+  id uuid,
+  title text,
+  category text,
+  author_id uuid,
+  excerpt text,
+  word_count integer,
+  created_at timestamptz,
+  updated_at timestamptz,
+  author text,
+  score real
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+BEGIN
+  -- Umbral del operador <% solo para esta transacción
+  PERFORM set_config('pg_trgm.word_similarity_threshold', min_similarity::text, true);
+
+  RETURN QUERY
+  WITH matches AS (
+    -- Cada rama usa su propio índice de trigramas
+    SELECT s.id AS story_id FROM stories s
+    WHERE search_query <% s.title
+    UNION
+    SELECT s.id FROM users u JOIN stories s ON s.author_id = u.id
+    WHERE search_query <% u.username
+  )
+  SELECT s.id, s.title, s.category, s.author_id, s.excerpt, s.word_count,
+         s.created_at, s.updated_at, u.username,
+         greatest(
+           word_similarity(search_query, s.title),
+           coalesce(word_similarity(search_query, u.username), 0)
+         )::real
+  FROM matches m
+  JOIN stories s ON s.id = m.story_id
+  LEFT JOIN users u ON u.id = s.author_id
+  ORDER BY 10 DESC, s.created_at DESC
+  LIMIT max_results;
+END;
+$$;
@@ -0,0 +1,75 @@
+/*
+  # Login en una sola llamada
+
+  Iniciar sesión requería cuatro consultas seguidas desde la app: leer el
+  usuario, borrar sus sesiones expiradas, insertar la sesión y volver a
+  leer el usuario en la siguiente pantalla. Esta función hace todo en el
+  servidor y se llama con un solo RPC.
+
+  ## Cambios
+
+  ### 1. Extensión `pgcrypto`
+  Para verificar el hash bcrypt con `crypt()`. pgcrypto solo reconoce el
+  prefijo `$2a$`; los hashes de la app (`$2b$`, `$2y$`) usan el mismo
+  algoritmo, así que se normaliza el prefijo antes de comparar.
+
+  ### 2. Función `login_user(p_username, p_password)`
+  Retorna un JSON con `status`:
+  - `ok`: incluye `user` (perfil sin el hash), `session` (fila nueva de
+    sessions) y `password_cost` (costo bcrypt del hash guardado, para que
+    la app decida si rehashear)
+  - `not_found`: el usuario no existe
+  - `wrong_password`: la contraseña no coincide
+
+  Es SECURITY DEFINER porque necesita leer `password_hash`, que nunca
+  sale del servidor.
+*/
+
+-- Extensión para verificar hashes bcrypt
+CREATE EXTENSION IF NOT EXISTS pgcrypto WITH SCHEMA extensions;
+
+CREATE OR REPLACE FUNCTION login_user(p_username text, p_password text)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, extensions
+AS $$
+DECLARE
+  found_user users%ROWTYPE;
+  normalized_hash text;
+  new_session sessions%ROWTYPE;
+BEGIN
+  SELECT * INTO found_user FROM users WHERE username = p_username;
+
+  IF NOT FOUND THEN
+    RETURN jsonb_build_object('status', 'not_found');
+  END IF;
+
+  -- pgcrypto solo acepta el prefijo $2a$ (mismo algoritmo que $2b$ y $2y$)
+  normalized_hash := regexp_replace(found_user.password_hash, '^\$2[by]\$', '$2a$');
+
+  IF crypt(p_password, normalized_hash) <> normalized_hash THEN
+    RETURN jsonb_build_object('status', 'wrong_password');
+  END IF;
+
+  -- Limpiar sesiones expiradas y crear la nueva
+  DELETE FROM sessions WHERE user_id = found_user.id AND expires_at < now();
+
+  INSERT INTO sessions (user_id) VALUES (found_user.id)
+  RETURNING * INTO new_session;
+
+  RETURN jsonb_build_object(
+    'status', 'ok',
+    'user', jsonb_build_object(
+      'id', found_user.id,
+      'username', found_user.username,
+      'email', found_user.email,
+      'created_at', found_user.created_at
+    ),
+    'session', to_jsonb(new_session),
+    'password_cost', substr(normalized_hash, 5, 2)::integer
+  );
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION login_user(text, text) TO anon, authenticated;
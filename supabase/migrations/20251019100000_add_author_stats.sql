@@ -0,0 +1,137 @@
+/*
+  # Estadísticas por autor
+
+  El perfil mostraba "N historias publicadas" descargando todas las
+  historias y contándolas en la app. Ahora las estadísticas de cada autor
+  se guardan en una tabla que mantienen triggers sobre stories, así el
+  perfil las lee con una consulta por clave primaria.
+
+  ## Cambios
+
+  ### 1. author_stats
+  - `author_id` (uuid, primary key): Autor (users.id)
+  - `story_count` (integer): Historias publicadas
+  - `last_published_at` (timestamptz): Fecha de la historia más reciente
+  - `category_counts` (jsonb): Historias por categoría, p. ej. {"Apariciones": 3}
+  - `updated_at` (timestamptz): Última actualización de la fila
+
+  ### 2. Trigger `maintain_author_stats`
+  Después de cada insert, update (de autor o categoría) o delete en
+  stories ajusta los contadores de los autores afectados.
+
+  ### 3. Carga inicial
+  Calcula las estadísticas de las historias existentes.
+
+  ## Seguridad
+
+  - RLS habilitado; las estadísticas son públicas para lectura
+  - Solo el trigger (SECURITY DEFINER) puede escribir en author_stats
+*/
+
+-- Crear tabla de estadísticas por autor
+CREATE TABLE IF NOT EXISTS author_stats (
+  author_id uuid PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+  story_count integer NOT NULL DEFAULT 0,
+  last_published_at timestamptz,
+  category_counts jsonb NOT NULL DEFAULT '{}'::jsonb,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Habilitar RLS
+ALTER TABLE author_stats ENABLE ROW LEVEL SECURITY;
+
+-- Todos pueden leer las estadísticas (igual que las historias)
+CREATE POLICY "Anyone can view author stats"
+  ON author_stats FOR SELECT
+  TO anon, authenticated
+  USING (true);
+
+-- Suma 'delta' historias de 'category' a un autor.
+-- Las categorías que llegan a cero se quitan del JSON.
+CREATE OR REPLACE FUNCTION bump_author_stats(p_author_id uuid, p_category text, p_delta integer)
+RETURNS void
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO author_stats (author_id, story_count, category_counts)
+  VALUES (p_author_id, greatest(p_delta, 0), jsonb_build_object(p_category, greatest(p_delta, 0)))
+  ON CONFLICT (author_id) DO UPDATE SET
+    story_count = greatest(author_stats.story_count + p_delta, 0),
+    category_counts = CASE
+      WHEN coalesce((author_stats.category_counts ->> p_category)::integer, 0) + p_delta <= 0
+        THEN author_stats.category_counts - p_category
+      ELSE jsonb_set(
+        author_stats.category_counts,
+        ARRAY[p_category],
+        to_jsonb(coalesce((author_stats.category_counts ->> p_category)::integer, 0) + p_delta)
+      )
+    END,
+    updated_at = now();
+END;
+$$ language 'plpgsql';
+
+-- Recalcula la fecha de la historia más reciente de un autor
+-- (usa el índice por autor; solo se llama al eliminar o mover historias)
+CREATE OR REPLACE FUNCTION refresh_author_last_published(p_author_id uuid)
+RETURNS void
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE author_stats
+  SET last_published_at = (
+    SELECT max(created_at) FROM stories WHERE author_id = p_author_id
+  )
+  WHERE author_id = p_author_id;
+END;
+$$ language 'plpgsql';
+
+-- Función del trigger sobre stories
+CREATE OR REPLACE FUNCTION maintain_author_stats()
+RETURNS TRIGGER
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM bump_author_stats(NEW.author_id, NEW.category, 1);
+    UPDATE author_stats
+    SET last_published_at = greatest(last_published_at, NEW.created_at)
+    WHERE author_id = NEW.author_id;
+    RETURN NEW;
+  END IF;
+
+  IF TG_OP = 'DELETE' THEN
+    PERFORM bump_author_stats(OLD.author_id, OLD.category, -1);
+    PERFORM refresh_author_last_published(OLD.author_id);
+    RETURN OLD;
+  END IF;
+
+  -- UPDATE: solo importa si cambió el autor o la categoría
+  IF NEW.author_id IS DISTINCT FROM OLD.author_id OR NEW.category IS DISTINCT FROM OLD.category THEN
+    PERFORM bump_author_stats(OLD.author_id, OLD.category, -1);
+    PERFORM bump_author_stats(NEW.author_id, NEW.category, 1);
+    IF NEW.author_id IS DISTINCT FROM OLD.author_id THEN
+      PERFORM refresh_author_last_published(OLD.author_id);
+      PERFORM refresh_author_last_published(NEW.author_id);
+    END IF;
+  END IF;
+  RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- Trigger para mantener las estadísticas
+CREATE TRIGGER maintain_stories_author_stats AFTER INSERT OR UPDATE OR DELETE ON stories
+  FOR EACH ROW EXECUTE FUNCTION maintain_author_stats();
+
+-- Carga inicial con las historias existentes
+INSERT INTO author_stats (author_id, story_count, last_published_at, category_counts)
+SELECT author_id, sum(n)::integer, max(last_created), jsonb_object_agg(category, n)
+FROM (
+  SELECT author_id, category, count(*) AS n, max(created_at) AS last_created
+  FROM stories
+  GROUP BY author_id, category
+) per_category
+GROUP BY author_id
+ON CONFLICT (author_id) DO NOTHING;
@@ -0,0 +1,37 @@
+/*
+  # Índices compuestos para el feed, las categorías y los autores
+
+  Todas las consultas de listas de StoryManager ordenan por created_at
+  descendente (el feed paginado además por id para desempatar). Con los
+  índices de una sola columna Postgres debía leer todas las filas que
+  cumplen el filtro y ordenarlas. Con estos índices las recorre ya
+  ordenadas y se detiene al completar la página.
+
+  ## Cambios
+
+  ### 1. Índices nuevos
+  - `idx_stories_feed` en (created_at DESC, id DESC): feed y su cursor
+  - `idx_stories_category_feed` en (category, created_at DESC, id DESC):
+    feed filtrado por categoría y listas de una categoría
+  - `idx_stories_author_feed` en (author_id, created_at DESC): historias de
+    un autor y el recálculo de author_stats.last_published_at
+
+  ### 2. Índices eliminados
+  - `idx_stories_author` y `idx_stories_category`: quedan cubiertos por los
+    índices compuestos (son su prefijo), incluida la clave foránea author_id
+
+  Las consultas se verifican con `python tools/check_query_plans.py`.
+*/
+
+-- Feed paginado por cursor (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_stories_feed ON stories(created_at DESC, id DESC);
+
+-- Feed y listas por categoría
+CREATE INDEX IF NOT EXISTS idx_stories_category_feed ON stories(category, created_at DESC, id DESC);
+
+-- Historias por autor
+CREATE INDEX IF NOT EXISTS idx_stories_author_feed ON stories(author_id, created_at DESC);
+
+-- Índices de una columna reemplazados por los compuestos
+DROP INDEX IF EXISTS idx_stories_author;
+DROP INDEX IF EXISTS idx_stories_category;
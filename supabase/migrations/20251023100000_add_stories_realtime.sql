@@ -0,0 +1,32 @@
+/*
+  # Cambios de historias en tiempo real
+
+  Las pantallas descargaban la lista completa de historias cada vez que se
+  mostraban. Ahora la app se suscribe a los cambios de stories por el canal
+  de Supabase Realtime y actualiza solo las cards afectadas.
+
+  ## Cambios
+
+  ### 1. Publicación `supabase_realtime`
+  - Se agrega la tabla `stories` para que Realtime emita sus INSERT, UPDATE
+    y DELETE (postgres_changes)
+  - Los DELETE solo traen la clave primaria (REPLICA IDENTITY por defecto),
+    que es todo lo que la app necesita para quitar la card
+
+  ## Seguridad
+
+  - Realtime aplica las políticas RLS de stories: cada cliente recibe solo
+    las filas que puede leer (hoy todas, igual que por PostgREST)
+*/
+
+-- Publicar los cambios de stories (idempotente)
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_publication_tables
+    WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = 'stories'
+  ) THEN
+    ALTER PUBLICATION supabase_realtime ADD TABLE stories;
+  END IF;
+END
+$$;
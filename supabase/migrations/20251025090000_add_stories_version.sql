@@ -0,0 +1,60 @@
+/*
+  # Token de cambios de historias
+
+  Cuando vence la caché de una consulta, la app pregunta primero por este
+  contador (una fila) y solo vuelve a descargar la lista si cambió desde
+  que la leyó. Así cambiar de pestaña sin cambios cuesta una consulta mínima.
+
+  ## Cambios
+
+  ### 1. stories_version
+  - `id` (smallint, primary key): Siempre 1 (tabla de una sola fila)
+  - `version` (bigint): Se incrementa con cada cambio en stories
+  - `updated_at` (timestamptz): Fecha del último cambio
+
+  ### 2. Trigger `bump_stories_version`
+  Por sentencia (no por fila) después de insert, update o delete en stories,
+  y al cambiar un nombre de usuario, que aparece junto a sus historias.
+
+  ## Seguridad
+
+  - RLS habilitado; el contador es público para lectura
+  - Solo el trigger (SECURITY DEFINER) puede escribirlo
+*/
+
+-- Crear tabla de una sola fila con el contador
+CREATE TABLE IF NOT EXISTS stories_version (
+  id smallint PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+  version bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+INSERT INTO stories_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+
+-- Habilitar RLS
+ALTER TABLE stories_version ENABLE ROW LEVEL SECURITY;
+
+-- Todos pueden leer el contador (igual que las historias)
+CREATE POLICY "Anyone can view stories version"
+  ON stories_version FOR SELECT
+  TO anon, authenticated
+  USING (true);
+
+-- Incrementa el contador una vez por sentencia
+CREATE OR REPLACE FUNCTION bump_stories_version()
+RETURNS TRIGGER
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  UPDATE stories_version SET version = version + 1, updated_at = now() WHERE id = 1;
+  RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+-- Triggers para mantener el contador
+CREATE TRIGGER bump_stories_version AFTER INSERT OR UPDATE OR DELETE ON stories
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_stories_version();
+
+CREATE TRIGGER bump_stories_version_on_username AFTER UPDATE OF username ON users
+  FOR EACH STATEMENT EXECUTE FUNCTION bump_stories_version();
@@ -0,0 +1,62 @@
+/*
+  # Hash verificado en la respuesta de login_user
+
+  Tras un login exitoso la app rehashea la contraseña si su costo no es el
+  de la política del servidor. El update solo se aplica si el hash sigue
+  siendo el que se verificó (compare-and-swap), para no pisar un cambio de
+  contraseña hecho mientras tanto; para eso la app necesita ese hash.
+
+  ## Cambios
+
+  ### 1. Función `login_user(p_username, p_password)`
+  - Con `status = 'ok'` incluye además `password_hash`: el hash que se
+    acaba de verificar. Solo lo recibe quien demostró conocer la contraseña;
+    las respuestas `not_found` y `wrong_password` no cambian.
+*/
+
+CREATE OR REPLACE FUNCTION login_user(p_username text, p_password text)
+RETURNS jsonb
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, extensions
+AS $$
+DECLARE
+  found_user users%ROWTYPE;
+  normalized_hash text;
+  new_session sessions%ROWTYPE;
+BEGIN
+  SELECT * INTO found_user FROM users WHERE username = p_username;
+
+  IF NOT FOUND THEN
+    RETURN jsonb_build_object('status', 'not_found');
+  END IF;
+
+  -- pgcrypto solo acepta el prefijo $2a$ (mismo algoritmo que $2b$ y $2y$)
+  normalized_hash := regexp_replace(found_user.password_hash, '^\$2[by]\$', '$2a$');
+
+  IF crypt(p_password, normalized_hash) <> normalized_hash THEN
+    RETURN jsonb_build_object('status', 'wrong_password');
+  END IF;
+
+  -- Limpiar sesiones expiradas y crear la nueva
+  DELETE FROM sessions WHERE user_id = found_user.id AND expires_at < now();
+
+  INSERT INTO sessions (user_id) VALUES (found_user.id)
+  RETURNING * INTO new_session;
+
+  RETURN jsonb_build_object(
+    'status', 'ok',
+    'user', jsonb_build_object(
+      'id', found_user.id,
+      'username', found_user.username,
+      'email', found_user.email,
+      'created_at', found_user.created_at
+    ),
+    'session', to_jsonb(new_session),
+    'password_cost', substr(normalized_hash, 5, 2)::integer,
+    'password_hash', found_user.password_hash
+  );
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION login_user(text, text) TO anon, authenticated;
@@ -0,0 +1,70 @@
+/*
+  # Corrección de estadísticas por autor en cero
+
+  Al eliminar una historia de un autor sin fila en author_stats,
+  `bump_author_stats` insertaba `story_count = 0` y `{categoría: 0}`,
+  aunque su propio comentario dice que las categorías en cero se quitan.
+
+  ## Cambios
+
+  ### 1. Función `positive_counts(jsonb)`
+  Retorna el JSON de conteos sin las claves en cero o negativas.
+
+  ### 2. Función `bump_author_stats`
+  - Con delta negativo solo actualiza una fila existente: si el autor no
+    tiene fila no hay nada que restar
+  - Quita las categorías en cero tanto al insertar como al actualizar
+
+  ### 3. Limpieza
+  Quita las categorías en cero que dejó la versión anterior.
+*/
+
+-- Conteos por categoría sin las claves que llegaron a cero
+CREATE OR REPLACE FUNCTION positive_counts(p_counts jsonb)
+RETURNS jsonb
+IMMUTABLE
+AS $$
+  SELECT coalesce(jsonb_object_agg(key, value), '{}'::jsonb)
+  FROM jsonb_each(p_counts)
+  WHERE (value #>> '{}')::integer > 0;
+$$ language 'sql';
+
+-- Suma 'delta' historias de 'category' a un autor.
+-- Las categorías que llegan a cero se quitan del JSON.
+CREATE OR REPLACE FUNCTION bump_author_stats(p_author_id uuid, p_category text, p_delta integer)
+RETURNS void
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  IF p_delta < 0 THEN
+    -- Sin fila no hay nada que restar: no se crean contadores en cero
+    UPDATE author_stats SET
+      story_count = greatest(story_count + p_delta, 0),
+      category_counts = positive_counts(jsonb_set(
+        category_counts,
+        ARRAY[p_category],
+        to_jsonb(coalesce((category_counts ->> p_category)::integer, 0) + p_delta)
+      )),
+      updated_at = now()
+    WHERE author_id = p_author_id;
+    RETURN;
+  END IF;
+
+  INSERT INTO author_stats (author_id, story_count, category_counts)
+  VALUES (p_author_id, p_delta, positive_counts(jsonb_build_object(p_category, p_delta)))
+  ON CONFLICT (author_id) DO UPDATE SET
+    story_count = author_stats.story_count + p_delta,
+    category_counts = positive_counts(jsonb_set(
+      author_stats.category_counts,
+      ARRAY[p_category],
+      to_jsonb(coalesce((author_stats.category_counts ->> p_category)::integer, 0) + p_delta)
+    )),
+    updated_at = now();
+END;
+$$ language 'plpgsql';
+
+-- Quitar las categorías en cero que quedaron guardadas
+UPDATE author_stats
+SET category_counts = positive_counts(category_counts)
+WHERE category_counts <> positive_counts(category_counts);
@@ -0,0 +1,64 @@
+"""
+test_query_plans.py
+Verifica con EXPLAIN que las consultas de listas de historias usan los
+índices compuestos y no ordenan en memoria.
+
+- SQLite: siempre; usa el SQL de LocalStoryStore.
+- Postgres: solo si SOMBRAS_PLAN_DSN apunta a una base de pruebas (y están
+  instalados psycopg y supabase); las consultas salen de los builders de
+  StoryManager. Crea y borra el esquema plan_check.
+"""
+
+import os
+import sys
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.local_store import LocalStoryStore
+from tools.check_query_plans import (
+    sqlite_rows, sqlite_checks, sqlite_problems,
+    postgres_plan_schema, postgres_checks, postgres_problems, explain_postgres, plan_lines
+)
+
+PLAN_DSN = os.getenv('SOMBRAS_PLAN_DSN')
+
+# Datos sintéticos: suficientes para que el planificador prefiera los índices
+STORIES = 50000
+USERS = 500
+
+def failures_of(checks, explain, problems_of):
+    """
+    Retorna {consulta: problemas y plan} de las consultas que fallan.
+    """
+    failures = {}
+    for check in checks:
+        plan = explain(check)
+        problems = problems_of(check, plan)
+        if problems:
+            failures[check.name] = problems + plan_lines(plan)
+    return failures
+
+def test_sqlite_plans(tmp_path):
+    store = LocalStoryStore(str(tmp_path / 'plan_check.db'))
+    rows = sqlite_rows(STORIES, USERS)
+    store.apply_changes(rows)
+
+    failures = failures_of(
+        sqlite_checks(rows),
+        lambda check: store.explain(check.sql, check.params),
+        sqlite_problems
+    )
+    assert not failures
+
+@pytest.mark.skipif(not PLAN_DSN, reason="indica SOMBRAS_PLAN_DSN para verificar los planes en Postgres")
+def test_postgres_plans():
+    psycopg = pytest.importorskip('psycopg')
+    pytest.importorskip('supabase')
+
+    with psycopg.connect(PLAN_DSN, cursor_factory=psycopg.ClientCursor) as conn:
+        with postgres_plan_schema(conn, STORIES, USERS) as params:
+            failures = failures_of(
+                postgres_checks(params),
+                lambda check: explain_postgres(conn, check),
+                postgres_problems
+            )
+    assert not failures
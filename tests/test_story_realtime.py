@@ -0,0 +1,217 @@
+"""
+test_story_realtime.py
+Prueba StoryRealtime contra tools/realtime_standin.py corriendo en el mismo
+proceso: los INSERT, UPDATE y DELETE que envía el servidor deben llegar a la
+réplica local y a la caché, y al cortarse la conexión el cliente debe
+reconectarse y sincronizar.
+Requiere websockets, realtime y supabase (se omite si no están instalados).
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+websockets = pytest.importorskip('websockets')
+pytest.importorskip('realtime')
+pytest.importorskip('supabase')
+
+from models import local_store, story_realtime
+from models.local_store import LocalStoryStore
+from models.story import StoryManager
+from models.story_cache import MISSING
+from models.story_realtime import StoryRealtime, SupabaseRealtimeTransport
+from models.story_sync import StorySync
+from tools.realtime_standin import RealtimeStandin
+
+AUTHOR_ID = 'a0000000-0000-0000-0000-000000000001'
+
+# Segundos máximos de espera para que un cambio llegue al cliente
+TIMEOUT = 10
+
+def story_record(story_id, title, created_at='2025-01-01T00:00:00+00:00'):
+    """
+    Registro completo de stories, como lo envía Realtime.
+    """
+    return {
+        'id': story_id,
+        'title': title,
+        'content': f'Contenido de {title}',
+        'excerpt': f'Contenido de {title}',
+        'word_count': 3,
+        'category': 'Leyendas',
+        'author_id': AUTHOR_ID,
+        'created_at': created_at,
+        'updated_at': created_at
+    }
+
+async def wait_for(condition):
+    """
+    Espera a que condition() sea verdadero o falla al pasar TIMEOUT.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + TIMEOUT
+    while not condition():
+        assert loop.time() < deadline, "el cambio no llegó a tiempo"
+        await asyncio.sleep(0.05)
+
+def titles():
+    return [story['title'] for story in StoryManager.load_stories()]
+
+def supabase_row(story_id, title, created_at='2025-01-01T00:00:00+00:00'):
+    """
+    Fila como la retorna la consulta de SYNC_COLUMNS.
+    """
+    return dict(story_record(story_id, title, created_at), users={'username': 'narrador'})
+
+class GatedStories:
+    """
+    Cliente falso para la consulta de _fetch_pending: la primera consulta
+    espera a que se abra 'gate', para enviar cambios mientras está en curso.
+    Responde con las filas de 'rows' tal como estaban al empezar la consulta.
+    """
+    def __init__(self, rows):
+        self.rows = rows
+        self.requested = []
+        self.gate = asyncio.Event()
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        return self
+
+    def in_(self, column, ids):
+        self.ids = list(ids)
+        return self
+
+    async def execute(self):
+        ids = self.ids
+        data = [self.rows[story_id] for story_id in ids if story_id in self.rows]
+        self.requested.append(ids)
+        await self.gate.wait()
+        return SimpleNamespace(data=data)
+
+@pytest.fixture
+def realtime(monkeypatch):
+    """
+    Estado de StoryRealtime aislado, sin espera para agrupar consultas.
+    Retorna la lista de avisos a las pantallas.
+    """
+    events = []
+    monkeypatch.setattr(StoryRealtime, '_listeners', [lambda kind, story: events.append(kind)])
+    monkeypatch.setattr(StoryRealtime, '_pending', {})
+    monkeypatch.setattr(StoryRealtime, '_fetch_task', None)
+    monkeypatch.setattr(story_realtime, 'FETCH_DELAY', 0)
+    return events
+
+def use_client(monkeypatch, client):
+    async def get_client():
+        return client
+    monkeypatch.setattr(story_realtime, 'get_async_supabase_client', get_client)
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """
+    Réplica local temporal, ya sincronizada, con una historia del autor.
+    """
+    store = LocalStoryStore(str(tmp_path / 'realtime.db'))
+    row = story_record('s1', 'La Llorona')
+    row['users'] = {'username': 'narrador'}
+    store.apply_changes([row])
+    store.set_state('initial_sync_done', '1')
+    monkeypatch.setattr(local_store, '_local_store', store)
+    StoryManager._invalidate()
+    yield store
+    StoryManager._invalidate()
+
+def test_changes_and_resync(store, monkeypatch):
+    syncs = []
+    events = []
+    monkeypatch.setattr(StorySync, 'sync', staticmethod(lambda: syncs.append(True)))
+    monkeypatch.setattr(StoryRealtime, '_listeners', [lambda kind, story: events.append(kind)])
+
+    async def scenario():
+        standin = RealtimeStandin()
+        async with websockets.serve(standin.handle, 'localhost', 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            transport = SupabaseRealtimeTransport(url=f'ws://localhost:{port}/realtime/v1', key='anon')
+            assert await StoryRealtime.start(transport)
+            try:
+                await wait_for(StoryRealtime.is_live)
+
+                # La lista queda en caché antes de cada cambio
+                assert titles() == ['La Llorona']
+
+                await standin.broadcast({
+                    'type': 'INSERT',
+                    'record': story_record('s2', 'El Charro Negro', '2025-02-01T00:00:00+00:00')
+                })
+                await wait_for(lambda: 'insert' in events)
+                assert store.get_story('s2')['author'] == 'narrador'
+                assert titles() == ['El Charro Negro', 'La Llorona']
+
+                StoryManager.get_story_by_id('s1')
+                await standin.broadcast({
+                    'type': 'UPDATE',
+                    'record': story_record('s1', 'La Llorona del río')
+                })
+                await wait_for(lambda: 'update' in events)
+                assert store.get_story('s1')['title'] == 'La Llorona del río'
+                assert StoryManager.get_story_by_id('s1').title == 'La Llorona del río'
+
+                await standin.broadcast({'type': 'DELETE', 'old_record': {'id': 's2'}})
+                await wait_for(lambda: 'delete' in events)
+                assert store.get_story('s2') is None
+                assert titles() == ['La Llorona del río']
+
+                # Al reconectarse sincroniza y vacía la caché
+                assert not syncs
+                await standin.drop()
+                await wait_for(lambda: 'resync' in events)
+                assert syncs
+                assert StoryManager._cache.get(('all',)) is MISSING
+                assert StoryRealtime.is_live()
+            finally:
+                await StoryRealtime.stop()
+
+    asyncio.run(scenario())
+
+def test_changes_during_fetch_are_fetched(store, realtime, monkeypatch):
+    client = GatedStories({
+        's1': supabase_row('s1', 'La Llorona del río'),
+        's2': supabase_row('s2', 'El Charro Negro', '2025-02-01T00:00:00+00:00')
+    })
+    use_client(monkeypatch, client)
+
+    async def scenario():
+        # Registros incompletos (Realtime omitió columnas): se consultan
+        StoryRealtime._on_change({'type': 'UPDATE', 'record': {'id': 's1'}})
+        await wait_for(lambda: client.requested)
+        StoryRealtime._on_change({'type': 'INSERT', 'record': {'id': 's2'}})
+        client.gate.set()
+        await wait_for(lambda: StoryRealtime._fetch_task.done())
+
+    asyncio.run(scenario())
+    assert client.requested == [['s1'], ['s2']]
+    assert realtime == ['update', 'insert']
+    assert titles() == ['El Charro Negro', 'La Llorona del río']
+
+def test_delete_during_fetch_is_not_undone(store, realtime, monkeypatch):
+    client = GatedStories({'s1': supabase_row('s1', 'La Llorona del río')})
+    use_client(monkeypatch, client)
+
+    async def scenario():
+        StoryRealtime._on_change({'type': 'UPDATE', 'record': {'id': 's1'}})
+        await wait_for(lambda: client.requested)
+        # La respuesta en curso ya trae la fila que se elimina ahora
+        StoryRealtime._on_change({'type': 'DELETE', 'old_record': {'id': 's1'}})
+        client.gate.set()
+        await wait_for(lambda: StoryRealtime._fetch_task.done())
+
+    asyncio.run(scenario())
+    assert realtime == ['delete']
+    assert store.get_story('s1') is None
+    assert titles() == []
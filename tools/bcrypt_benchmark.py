@@ -0,0 +1,73 @@
+"""
+bcrypt_benchmark.py
+Benchmark del pool de hash de PasswordHasher en el cliente: mide la latencia
+y el throughput de hashes simultáneos (registros y rehash tras un login) con
+distintas cantidades de hilos, para elegir MAX_WORKERS. El importador de
+JSON heredados paga el mismo costo por hash en su pool de procesos.
+No mide el login: login_user verifica la contraseña en Postgres (pgcrypto).
+
+Uso:
+    python tools/bcrypt_benchmark.py
+    python tools/bcrypt_benchmark.py --hashes 200 --workers 1 2 4 8 --rounds 12
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.password_hasher import MAX_WORKERS, SERVER_ROUNDS
+
+def timed_hash(password, rounds, submitted_at):
+    """
+    Hashea una contraseña como PasswordHasher.hash_sync y retorna la latencia
+    en ms desde que se pidió (incluye la espera en la cola del pool).
+    """
+    bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds))
+    return (time.perf_counter() - submitted_at) * 1000
+
+def run(hashes, workers, password, rounds):
+    """
+    Ejecuta 'hashes' hashes simultáneos con 'workers' hilos.
+    Retorna (segundos totales, latencias en ms).
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(timed_hash, password, rounds, time.perf_counter())
+            for _ in range(hashes)
+        ]
+        latencies = [future.result() for future in futures]
+    return time.perf_counter() - start, latencies
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pool de hash de bcrypt del cliente")
+    parser.add_argument('--hashes', type=int, default=64, help="Hashes simultáneos por corrida")
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, MAX_WORKERS}),
+                        help="Cantidades de hilos a comparar")
+    parser.add_argument('--rounds', type=int, default=None,
+                        help=f"Costo de bcrypt (por defecto el del servidor, {SERVER_ROUNDS})")
+    args = parser.parse_args()
+
+    rounds = args.rounds or SERVER_ROUNDS
+    password = 'contraseña-de-prueba'
+    print(f"Costo usado: {rounds} | hashes por corrida: {args.hashes}\n")
+
+    print(f"{'hilos':>6} {'hashes/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for workers in args.workers:
+        elapsed, latencies = run(args.hashes, workers, password, rounds)
+        print(
+            f"{workers:>6} {args.hashes / elapsed:>10.1f} "
+            f"{statistics.median(latencies):>9.1f} {percentile(latencies, 0.95):>9.1f} "
+            f"{max(latencies):>9.1f}"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,515 @@
+"""
+check_query_plans.py
+Verifica con EXPLAIN que las consultas de listas de StoryManager usan los
+índices compuestos y no ordenan en memoria (sin nodos Sort).
+
+Revisa dos bases:
+- La réplica local en SQLite (siempre; usa las consultas de LocalStoryStore).
+- Un Postgres local (si se indica un DSN): crea un esquema temporal con las
+  tablas y los índices de supabase/migrations, carga datos sintéticos y
+  explica cada consulta de StoryManager: se construye con sus propios
+  builders (postgrest-py) y la petición resultante se traduce a SQL.
+  Requiere psycopg (pip install "psycopg[binary]") y supabase.
+
+Las mismas verificaciones corren como pruebas en tests/test_query_plans.py.
+
+Retorna código 1 si alguna consulta no usa el índice esperado.
+
+Uso:
+    python tools/check_query_plans.py
+    python tools/check_query_plans.py --dsn postgresql://postgres@localhost/postgres
+    SOMBRAS_PLAN_DSN=postgresql://... python tools/check_query_plans.py --stories 100000
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.local_store import LocalStoryStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS_DIR = os.path.join(ROOT, 'supabase', 'migrations')
+
+# Esquema temporal en Postgres (se borra al terminar)
+PLAN_SCHEMA = 'plan_check'
+
+# PostgREST en Supabase limita las respuestas a 1000 filas (max_rows),
+# así que las listas sin .limit() igual llevan LIMIT en el SQL
+POSTGREST_MAX_ROWS = 1000
+
+# Tamaño de página del feed (igual que HomeScreen)
+PAGE_SIZE = 10
+
+# Mismas categorías que StoryFormScreen
+CATEGORIES = [
+    'Apariciones', 'Casas Embrujadas', 'Cementerios', 'Posesiones',
+    'Rituales', 'Leyendas Urbanas', 'Hospitales/Sanatorios', 'Carreteras',
+    'Bosques/Montañas', 'Entidades Demoníacas'
+]
+
+# Índices de las migraciones que aplican a las tablas copiadas (solo btree)
+INDEX_STATEMENT = re.compile(
+    r'^(CREATE INDEX IF NOT EXISTS \w+ ON (?:stories|users)\([^)]*\)|DROP INDEX IF EXISTS \w+);',
+    re.MULTILINE
+)
+
+class PlanCheck:
+    """
+    Una consulta a verificar: el índice que debe usar y si el orden debe
+    salir del índice (sin Sort).
+    """
+    def __init__(self, name, sql, params, index, ordered=True):
+        self.name = name
+        self.sql = sql
+        self.params = params
+        self.index = index
+        self.ordered = ordered
+
+def report(label, checks, explain, problems_of):
+    """
+    Explica cada consulta, imprime el resultado y retorna cuántas fallaron.
+    """
+    print(f"\n{label}")
+    failures = 0
+    for check in checks:
+        plan = explain(check)
+        problems = problems_of(check, plan)
+        print(f"  [{'OK' if not problems else 'FALLA'}] {check.name}")
+        for problem in problems:
+            print(f"      - {problem}")
+        if problems:
+            failures += 1
+            for line in plan_lines(plan):
+                print(f"        {line}")
+    return failures
+
+def plan_lines(plan):
+    """
+    Retorna el plan como líneas de texto (SQLite ya viene en líneas).
+    """
+    if isinstance(plan, list) and plan and isinstance(plan[0], str):
+        return plan
+    lines = []
+
+    def walk(node, depth):
+        detail = node['Node Type']
+        if node.get('Index Name'):
+            detail += f" using {node['Index Name']}"
+        if node.get('Relation Name'):
+            detail += f" on {node['Relation Name']}"
+        lines.append('  ' * depth + detail)
+        for child in node.get('Plans', []):
+            walk(child, depth + 1)
+
+    walk(plan, 0)
+    return lines
+
+# --- SQLite (réplica local) ---
+
+def sqlite_rows(stories, users):
+    """
+    Genera historias sintéticas en el formato de Supabase (con users(username)).
+    Las fechas avanzan con la inserción y se repiten de a pares para que el
+    desempate por id también cuente.
+    """
+    authors = [(str(uuid.uuid4()), f'autor_{n}') for n in range(users)]
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for n in range(stories):
+        author_id, username = authors[n % users]
+        created_at = (start + timedelta(minutes=7 * (n // 2))).isoformat()
+        rows.append({
+            'id': str(uuid.uuid4()),
+            'title': f'Historia {n}',
+            'content': 'Contenido de prueba',
+            'excerpt': 'Contenido de prueba',
+            'word_count': 3,
+            'category': CATEGORIES[n % len(CATEGORIES)],
+            'author_id': author_id,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'users': {'username': username}
+        })
+    return rows
+
+def sqlite_checks(rows):
+    """
+    Consultas de LocalStoryStore con valores tomados de los datos cargados.
+    """
+    newest = sorted(rows, key=lambda row: (row['created_at'], row['id']), reverse=True)
+    cursor_row = newest[PAGE_SIZE * 3]
+    cursor = (cursor_row['created_at'], cursor_row['id'])
+    category = CATEGORIES[0]
+    author = rows[0]
+
+    return [
+        PlanCheck('feed (primera página)', *LocalStoryStore.page_sql(None, PAGE_SIZE), 'idx_local_stories_feed'),
+        PlanCheck('feed (con cursor)', *LocalStoryStore.page_sql(cursor, PAGE_SIZE), 'idx_local_stories_feed'),
+        PlanCheck('feed por categoría', *LocalStoryStore.page_sql(cursor, PAGE_SIZE, category),
+                  'idx_local_stories_category_feed'),
+        PlanCheck('todas las historias', *LocalStoryStore.stories_sql(), 'idx_local_stories_feed'),
+        PlanCheck('historias por categoría', *LocalStoryStore.stories_sql(category=category),
+                  'idx_local_stories_category_feed'),
+        PlanCheck('historias por autor (id)', *LocalStoryStore.stories_sql(author_id=author['author_id']),
+                  'idx_local_stories_author_feed'),
+    ]
+
+def sqlite_problems(check, plan):
+    problems = []
+    if not any(check.index in line for line in plan):
+        problems.append(f"no usa {check.index}")
+    if check.ordered and any('TEMP B-TREE' in line for line in plan):
+        problems.append("ordena en memoria (USE TEMP B-TREE)")
+    return problems
+
+def check_sqlite(stories, users):
+    """
+    Carga la réplica local en un archivo temporal y verifica sus planes.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        store = LocalStoryStore(os.path.join(directory, 'plan_check.db'))
+        rows = sqlite_rows(stories, users)
+        store.apply_changes(rows)
+        return report(
+            f"SQLite local ({stories} historias)",
+            sqlite_checks(rows),
+            lambda check: store.explain(check.sql, check.params),
+            sqlite_problems
+        )
+
+# --- Postgres (Supabase) ---
+
+# Embeds de PostgREST que usan las consultas: alias y columna de enlace
+EMBEDS = {'users': ('u', 'author_id')}
+
+# Operadores de filtro de PostgREST y su equivalente en SQL
+FILTER_OPERATORS = {'eq': '=', 'neq': '<>', 'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>='}
+
+def split_top_level(text):
+    """
+    Separa por comas que no estén dentro de paréntesis ni comillas.
+    """
+    parts = []
+    current = ''
+    depth = 0
+    quoted = False
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        if char == ',' and depth == 0 and not quoted:
+            parts.append(current)
+            current = ''
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+def postgrest_sql(builder, max_rows=POSTGREST_MAX_ROWS):
+    """
+    Traduce a SQL la petición armada por un builder de postgrest-py.
+    Retorna (sql, valores) con marcadores %s.
+    Solo cubre lo que usan las consultas de listas (select con embeds,
+    filtros de comparación, or/and, order y limit): cualquier otra cosa
+    lanza ValueError, así un cambio en las consultas hace fallar la
+    verificación en vez de explicar otra consulta. PostgREST genera SQL
+    con otra forma (CTE, json_agg), pero las partes que deciden el plan
+    (WHERE, ORDER BY, LIMIT) son las mismas.
+    """
+    # postgrest-py guarda la petición en builder.request (antes, en el builder)
+    request = getattr(builder, 'request', builder)
+    params = request.params
+    table = str(request.path).rstrip('/').split('/')[-1]
+    values = []
+    columns = []
+    joins = []
+    inner_embeds = {}
+
+    for item in split_top_level(params.get('select', '*')):
+        match = re.fullmatch(r'(\w+)(!inner)?\((.*)\)', item)
+        if not match:
+            columns.append(f's.{item}')
+            continue
+        name, inner, embedded = match.groups()
+        if name not in EMBEDS:
+            raise ValueError(f"Embed no soportado: {item}")
+        alias, link = EMBEDS[name]
+        embedded_columns = split_top_level(embedded)
+        columns.extend(f'{alias}.{column}' for column in embedded_columns)
+        if inner:
+            inner_embeds[name] = alias
+            joins.append(f'JOIN {name} {alias} ON {alias}.id = s.{link}')
+        else:
+            joins.append(
+                f'LEFT JOIN LATERAL (SELECT {", ".join(embedded_columns)} FROM {name} '
+                f'WHERE {name}.id = s.{link}) {alias} ON true'
+            )
+
+    def qualify(column):
+        if '.' not in column:
+            return f's.{column}'
+        embed, column = column.split('.', 1)
+        # Sin !inner, PostgREST filtra el embed y no la fila principal
+        if embed not in inner_embeds:
+            raise ValueError(f"Filtro sobre un embed sin !inner: {embed}.{column}")
+        return f'{inner_embeds[embed]}.{column}'
+
+    def condition(column, expression):
+        operator, _, value = expression.partition('.')
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Operador no soportado: {operator}")
+        values.append(value[1:-1] if value.startswith('"') else value)
+        return f'{qualify(column)} {FILTER_OPERATORS[operator]} %s'
+
+    def logic(operator, expressions):
+        terms = []
+        for expression in split_top_level(expressions):
+            nested = re.fullmatch(r'(and|or)\((.*)\)', expression)
+            if nested:
+                terms.append(logic(*nested.groups()))
+            else:
+                column, rest = expression.split('.', 1)
+                terms.append(condition(column, rest))
+        return '(' + f' {operator.upper()} '.join(terms) + ')'
+
+    conditions = []
+    order = []
+    limit = max_rows
+    for key, value in params.multi_items():
+        if key == 'select':
+            continue
+        if key == 'order':
+            for term in value.split(','):
+                column, direction = term.split('.')[:2]
+                order.append(f'{qualify(column)} {direction.upper()}')
+        elif key == 'limit':
+            limit = min(int(value), max_rows)
+        elif key in ('or', 'and'):
+            conditions.append(logic(key, value[1:-1]))
+        elif '.' not in key or key.split('.', 1)[0] in EMBEDS:
+            conditions.append(condition(key, value))
+        else:
+            raise ValueError(f"Parámetro no soportado: {key}")
+
+    sql = f'SELECT {", ".join(columns)} FROM {table} s'
+    if joins:
+        sql += ' ' + ' '.join(joins)
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    if order:
+        sql += ' ORDER BY ' + ', '.join(order)
+    sql += f' LIMIT {limit}'
+    return sql, values
+
+def migration_index_statements():
+    """
+    Retorna, en orden, los CREATE/DROP INDEX de las migraciones sobre
+    stories y users (sin los GIN de búsqueda, que no cambian estos planes).
+    """
+    statements = []
+    for name in sorted(os.listdir(MIGRATIONS_DIR)):
+        if name.endswith('.sql'):
+            with open(os.path.join(MIGRATIONS_DIR, name), encoding='utf-8') as migration:
+                statements.extend(INDEX_STATEMENT.findall(migration.read()))
+    return statements
+
+def load_postgres(conn, stories, users):
+    """
+    Crea el esquema temporal con las tablas de stories y users, aplica los
+    índices de las migraciones y carga datos sintéticos.
+    El search_path queda solo en el esquema temporal: los DROP INDEX de las
+    migraciones no pueden tocar los índices reales de public.
+    """
+    with conn.cursor() as cur:
+        cur.execute(f'DROP SCHEMA IF EXISTS {PLAN_SCHEMA} CASCADE')
+        cur.execute(f'CREATE SCHEMA {PLAN_SCHEMA}')
+        cur.execute(f'SET search_path = {PLAN_SCHEMA}')
+        cur.execute("""
+            CREATE TABLE users (
+              id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+              username text UNIQUE NOT NULL,
+              password_hash text NOT NULL,
+              email text UNIQUE NOT NULL,
+              created_at timestamptz DEFAULT now()
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE stories (
+              id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+              title text NOT NULL,
+              content text NOT NULL,
+              category text NOT NULL,
+              author_id uuid NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+              created_at timestamptz DEFAULT now(),
+              updated_at timestamptz DEFAULT now(),
+              excerpt text NOT NULL DEFAULT '',
+              word_count integer NOT NULL DEFAULT 0
+            )
+        """)
+        for statement in migration_index_statements():
+            cur.execute(statement)
+
+        cur.execute("""
+            INSERT INTO users (username, password_hash, email)
+            SELECT 'autor_' || n, 'x', 'autor_' || n || '@example.com'
+            FROM generate_series(1, %(users)s) n
+        """, {'users': users})
+        # Fechas crecientes con la inserción (como en producción) y repetidas
+        # de a pares para ejercitar el desempate por id
+        cur.execute("""
+            INSERT INTO stories (title, content, excerpt, word_count, category, author_id, created_at)
+            SELECT 'Historia ' || n, 'Contenido de prueba', 'Contenido de prueba', 3,
+                   (%(categories)s::text[])[1 + n %% cardinality(%(categories)s::text[])],
+                   authors.ids[1 + n %% cardinality(authors.ids)],
+                   timestamptz '2024-01-01' + (n / 2) * interval '7 minutes'
+            FROM generate_series(0, %(stories)s - 1) n,
+                 (SELECT array_agg(id ORDER BY username) AS ids FROM users) authors
+        """, {'stories': stories, 'categories': CATEGORIES})
+        cur.execute('ANALYZE users')
+        cur.execute('ANALYZE stories')
+
+        cur.execute(f"""
+            SELECT created_at, id FROM stories
+            ORDER BY created_at DESC, id DESC OFFSET {PAGE_SIZE * 3} LIMIT 1
+        """)
+        created_at, story_id = cur.fetchone()
+        cur.execute("""
+            SELECT u.id, u.username FROM users u
+            ORDER BY u.username LIMIT 1
+        """)
+        author_id, username = cur.fetchone()
+    return {
+        'created_at': created_at,
+        'id': story_id,
+        'category': CATEGORIES[0],
+        'author_id': author_id,
+        'username': username
+    }
+
+def postgres_checks(params):
+    """
+    Consultas de StoryManager, construidas con sus propios builders sobre
+    un cliente de PostgREST que nunca se conecta, y traducidas a SQL.
+    """
+    from postgrest import SyncPostgrestClient
+    from models.story import StoryManager
+
+    client = SyncPostgrestClient('http://localhost/rest/v1')
+    # Las fechas del cursor llegan de PostgREST en formato ISO
+    cursor = (params['created_at'].isoformat(), str(params['id']))
+    author_id = str(params['author_id'])
+    queries = [
+        ('_page_query (primera página)', StoryManager._page_query(None, PAGE_SIZE, None),
+         'idx_stories_feed', True),
+        ('_page_query (con cursor)', StoryManager._page_query(cursor, PAGE_SIZE, None),
+         'idx_stories_feed', True),
+        ('_page_query (categoría, con cursor)', StoryManager._page_query(cursor, PAGE_SIZE, params['category']),
+         'idx_stories_category_feed', True),
+        ('_all_query', StoryManager._all_query(), 'idx_stories_feed', True),
+        ('_category_query', StoryManager._category_query(params['category']),
+         'idx_stories_category_feed', True),
+        # Trae todas las historias del autor (pocas, bajo max_rows): Postgres
+        # prefiere un Bitmap Scan y ordenarlas, así que solo se exige el índice
+        ('_author_id_query', StoryManager._author_id_query(author_id), 'idx_stories_author_feed', False),
+        # users!inner filtra por nombre: el orden no puede venir del índice
+        # porque el autor se resuelve en el join, pero sí debe buscar por él
+        ('_author_query (users!inner)', StoryManager._author_query(params['username']),
+         'idx_stories_author_feed', False),
+    ]
+    return [
+        PlanCheck(name, *postgrest_sql(query.remote(client)), index, ordered)
+        for name, query, index, ordered in queries
+    ]
+
+def postgres_nodes(plan):
+    """
+    Recorre el árbol del plan (EXPLAIN FORMAT JSON) nodo por nodo.
+    """
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from postgres_nodes(child)
+
+def postgres_problems(check, plan):
+    nodes = list(postgres_nodes(plan))
+    problems = []
+    if not any(node.get('Index Name') == check.index for node in nodes):
+        problems.append(f"no usa {check.index}")
+    if any(node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == 'stories' for node in nodes):
+        problems.append("recorre stories completa (Seq Scan)")
+    if check.ordered:
+        sorts = [node['Node Type'] for node in nodes if node['Node Type'].endswith('Sort')]
+        if sorts:
+            problems.append(f"ordena en memoria ({', '.join(sorts)})")
+    return problems
+
+@contextmanager
+def postgres_plan_schema(conn, stories, users):
+    """
+    Carga el esquema temporal, entrega los parámetros de las consultas y lo
+    borra al salir. La conexión debe usar psycopg.ClientCursor.
+    """
+    try:
+        yield load_postgres(conn, stories, users)
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(f'DROP SCHEMA IF EXISTS {PLAN_SCHEMA} CASCADE')
+        conn.commit()
+
+def explain_postgres(conn, check):
+    """
+    Retorna el plan (nodo raíz de EXPLAIN FORMAT JSON) de una consulta.
+    """
+    with conn.cursor() as cur:
+        cur.execute('EXPLAIN (FORMAT JSON) ' + check.sql, check.params)
+        return cur.fetchone()[0][0]['Plan']
+
+def check_postgres(dsn, stories, users):
+    """
+    Verifica los planes en Postgres y borra el esquema temporal al terminar.
+    """
+    try:
+        import psycopg
+        import postgrest
+    except ImportError as e:
+        print(f'\nPostgres: falta {e.name} (pip install "psycopg[binary]" supabase)')
+        return 1
+
+    # ClientCursor interpola los parámetros en el cliente: EXPLAIN no acepta $1
+    with psycopg.connect(dsn, cursor_factory=psycopg.ClientCursor) as conn:
+        with postgres_plan_schema(conn, stories, users) as params:
+            return report(
+                f"Postgres ({stories} historias)",
+                postgres_checks(params),
+                lambda check: explain_postgres(conn, check),
+                postgres_problems
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica que las consultas de historias usen los índices")
+    parser.add_argument('--dsn', default=os.getenv('SOMBRAS_PLAN_DSN'),
+                        help="Postgres local de pruebas (o variable SOMBRAS_PLAN_DSN)")
+    parser.add_argument('--stories', type=int, default=50000, help="Historias sintéticas a cargar")
+    parser.add_argument('--users', type=int, default=500, help="Autores sintéticos")
+    args = parser.parse_args()
+
+    failures = check_sqlite(args.stories, args.users)
+    if args.dsn:
+        failures += check_postgres(args.dsn, args.stories, args.users)
+    else:
+        print("\nPostgres: omitido (indica --dsn o SOMBRAS_PLAN_DSN)")
+
+    print(f"\n{'Todo OK' if not failures else f'{failures} consulta(s) con problemas'}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,450 @@
+"""
+import_legacy_json.py
+Importa a Supabase los datos de los JSON heredados (models/users.json,
+models/stories.json y, con --session, el session.json de una instalación
+antigua) o de exportaciones más grandes con el mismo formato.
+
+- Lee los archivos por partes, sin cargarlos completos en memoria.
+- Quita los espacios y tabs sobrantes de los nombres de usuario.
+- Hashea las contraseñas en texto plano con bcrypt en un pool de procesos,
+  mientras se sube el lote anterior.
+- Resuelve el nombre del autor de cada historia a su author_id.
+- Escribe por lotes con upserts idempotentes: los usuarios se identifican
+  por username y las historias por un id uuid5 derivado de su contenido,
+  así volver a importar no duplica ni sobrescribe nada.
+- Guarda un checkpoint por archivo después de cada lote para retomar una
+  importación interrumpida, e informa el throughput.
+
+Necesita la clave service_role (las políticas RLS no permiten a la clave
+anónima leer usuarios ni crear historias a nombre de otros):
+
+Uso:
+    SUPABASE_SERVICE_ROLE_KEY=... python tools/import_legacy_json.py
+    python tools/import_legacy_json.py --users export/users.json --stories export/stories.json --batch 1000
+    python tools/import_legacy_json.py --dry-run
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.password_hasher import MIN_ROUNDS, SERVER_ROUNDS, hash_rounds
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODELS_DIR = os.path.join(ROOT, 'models')
+DEFAULT_CHECKPOINT = os.path.join(ROOT, '.legacy_import_checkpoint.json')
+
+# Bytes leídos del archivo en cada lectura
+READ_SIZE = 64 * 1024
+
+# Filas por upsert (y por consulta de autores)
+BATCH_SIZE = 500
+
+# Espacio de nombres de los ids de historias importadas: el mismo autor,
+# título y contenido siempre generan el mismo id
+STORY_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_DNS, 'legacy-stories.historyparanormal')
+
+def iter_json_array(path, start=0):
+    """
+    Recorre los elementos de un arreglo JSON leyendo el archivo por partes.
+    Retorna pares (posición, elemento) desde la posición 'start'.
+    Un archivo con un solo objeto (como session.json) se trata como un
+    arreglo de un elemento.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        index = 0
+        in_array = False
+        while True:
+            # Espacios y comas entre elementos
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+
+            if pos == len(buffer):
+                chunk = f.read(READ_SIZE)
+                if not chunk:
+                    if in_array:
+                        raise ValueError(f"{path}: el arreglo termina sin ']'")
+                    return
+                buffer, pos = chunk, 0
+                continue
+
+            if not in_array:
+                if buffer[pos] == '{':
+                    if start == 0:
+                        yield 0, json.loads(buffer[pos:] + f.read())
+                    return
+                if buffer[pos] != '[':
+                    raise ValueError(f"{path}: se esperaba un arreglo JSON")
+                in_array = True
+                pos += 1
+                continue
+
+            if buffer[pos] == ']':
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Elemento incompleto: leer más (al menos lo que ya hay, para
+                # no decodificar un elemento enorme una vez por lectura)
+                chunk = f.read(max(READ_SIZE, len(buffer) - pos))
+                if not chunk:
+                    raise
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+
+            if index >= start:
+                yield index, item
+            index += 1
+            pos = end
+
+def batches(items, size):
+    """
+    Agrupa un iterable en listas de hasta 'size' elementos.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def normalize_username(username):
+    """
+    Quita los espacios y tabs sobrantes ("torres\\t\\t" -> "torres").
+    """
+    return (username or '').strip()
+
+def hash_password(password, rounds):
+    """
+    Hashea una contraseña en texto plano. Las que ya son hashes bcrypt
+    (exportaciones más nuevas) se conservan. Corre en el pool de procesos.
+    """
+    if password.startswith('$2') and hash_rounds(password):
+        return password
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+def story_id(author, title, content):
+    """
+    Id estable de una historia importada.
+    """
+    return str(uuid.uuid5(STORY_NAMESPACE, '\x1f'.join((author, title, content))))
+
+class Checkpoint:
+    """
+    Cantidad de elementos ya importados de cada archivo. Si el archivo
+    cambió de tamaño desde el checkpoint, se importa desde el inicio
+    (los upserts idempotentes hacen que repetir filas sea seguro).
+    """
+    def __init__(self, path):
+        self.path = path
+        self.data = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def position(self, source):
+        entry = self.data.get(os.path.abspath(source))
+        if not entry:
+            return 0
+        if entry['size'] != os.path.getsize(source):
+            print(f"{source} cambió desde el último checkpoint: se importa desde el inicio")
+            return 0
+        return entry['records']
+
+    def save(self, source, records):
+        """
+        Guarda el avance de un archivo (escritura atómica).
+        """
+        if not self.path:
+            return
+        self.data[os.path.abspath(source)] = {'records': records, 'size': os.path.getsize(source)}
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(temp_path, self.path)
+
+class Progress:
+    """
+    Contadores y throughput de la importación de un archivo.
+    """
+    def __init__(self, label):
+        self.label = label
+        self.started = time.perf_counter()
+        self.read = 0
+        self.inserted = 0
+        self.existing = 0
+        self.skipped = 0
+
+    def rate(self):
+        return self.read / max(time.perf_counter() - self.started, 1e-6)
+
+    def report(self):
+        print(
+            f"{self.label}: {self.read} leídos, {self.inserted} nuevos, "
+            f"{self.existing} ya existían, {self.skipped} omitidos ({self.rate():.0f}/s)"
+        )
+
+class LegacyImporter:
+    """
+    Importa usuarios, historias y la sesión heredada.
+    Con dry_run no se conecta a Supabase: solo lee, normaliza y hashea,
+    para revisar los datos y medir el throughput.
+    """
+    def __init__(self, checkpoint, batch_size=BATCH_SIZE, workers=None, rounds=SERVER_ROUNDS, dry_run=False):
+        self.checkpoint = checkpoint
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.rounds = rounds
+        self.dry_run = dry_run
+        self.client = None if dry_run else self.connect()
+        # username -> id de los autores ya resueltos
+        self.authors = {}
+        self.seen_usernames = set()
+        self.seen_emails = set()
+
+    @staticmethod
+    def connect():
+        """
+        Crea un cliente de Supabase con la clave service_role.
+        """
+        from dotenv import load_dotenv
+        from supabase import create_client
+        load_dotenv()
+        url = os.getenv('VITE_SUPABASE_URL')
+        key = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+        if not url or not key:
+            raise ValueError("Se necesitan VITE_SUPABASE_URL y SUPABASE_SERVICE_ROLE_KEY")
+        return create_client(url, key)
+
+    def user_rows(self, batch, progress):
+        """
+        Normaliza un lote de usuarios. Retorna (filas, contraseñas); omite
+        los incompletos y los repetidos (mismo username ya normalizado o
+        mismo email), conservando el primero.
+        """
+        rows = []
+        passwords = []
+        for index, record in batch:
+            username = normalize_username(record.get('username'))
+            email = (record.get('email') or '').strip()
+            password = record.get('password') or ''
+            if not username or not email or not password:
+                print(f"Usuario {index} omitido: faltan username, email o password")
+                progress.skipped += 1
+                continue
+            if username in self.seen_usernames or email in self.seen_emails:
+                print(f"Usuario {index} ({username}) omitido: repetido")
+                progress.skipped += 1
+                continue
+            self.seen_usernames.add(username)
+            self.seen_emails.add(email)
+            rows.append({'username': username, 'email': email})
+            passwords.append(password)
+        return rows, passwords
+
+    def upsert(self, table, rows, on_conflict, progress):
+        """
+        Inserta las filas que no existen (ON CONFLICT DO NOTHING).
+        Si el lote falla (p. ej. un email que ya usa otra cuenta), se
+        reintenta fila por fila para no perder el resto.
+        """
+        if not rows:
+            return
+        if self.dry_run:
+            progress.inserted += len(rows)
+            return
+
+        def write(chunk):
+            response = self.client.table(table).upsert(
+                chunk, on_conflict=on_conflict, ignore_duplicates=True,
+                returning='minimal', count='exact'
+            ).execute()
+            inserted = response.count or 0
+            progress.inserted += inserted
+            progress.existing += len(chunk) - inserted
+
+        try:
+            write(rows)
+        except Exception as e:
+            print(f"Error en el lote de {table}, se reintenta fila por fila: {e}")
+            for row in rows:
+                try:
+                    write([row])
+                except Exception as row_error:
+                    progress.skipped += 1
+                    print(f"Fila de {table} omitida ({row.get(on_conflict)}): {row_error}")
+
+    def resolve_authors(self, usernames):
+        """
+        Busca el id de los usernames que aún no se conocen.
+        """
+        missing = sorted({u for u in usernames if u and u not in self.authors})
+        if not missing:
+            return
+        if self.dry_run:
+            # Sin conexión solo se conocen los usuarios del mismo archivo
+            return
+        for chunk in batches(missing, self.batch_size):
+            try:
+                response = self.client.table('users').select('id, username').in_('username', chunk).execute()
+                for user in response.data or []:
+                    self.authors[user['username']] = user['id']
+            except Exception as e:
+                print(f"Error al buscar autores: {e}")
+
+    def write_users(self, source, end, rows, futures, progress):
+        """
+        Completa el lote con los hashes, lo sube y guarda el checkpoint.
+        """
+        for row, future in zip(rows, futures):
+            row['password_hash'] = future.result()
+        self.upsert('users', rows, 'username', progress)
+
+        usernames = [row['username'] for row in rows]
+        if self.dry_run:
+            self.authors.update({username: None for username in usernames})
+        else:
+            self.resolve_authors(usernames)
+        self.checkpoint.save(source, end)
+        progress.report()
+
+    def import_users(self, source):
+        """
+        Importa los usuarios. Mientras se sube un lote, el pool ya hashea
+        las contraseñas del siguiente.
+        """
+        progress = Progress('usuarios')
+        start = self.checkpoint.position(source)
+        if start:
+            print(f"Retomando {source} desde el usuario {start}")
+
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for batch in batches(iter_json_array(source, start), self.batch_size):
+                progress.read += len(batch)
+                rows, passwords = self.user_rows(batch, progress)
+                futures = [pool.submit(hash_password, password, self.rounds) for password in passwords]
+                pending.append((batch[-1][0] + 1, rows, futures))
+                if len(pending) > 1:
+                    self.write_users(source, *pending.popleft(), progress)
+            while pending:
+                self.write_users(source, *pending.popleft(), progress)
+        return progress
+
+    def import_stories(self, source):
+        """
+        Importa las historias, resolviendo el autor de cada lote con una
+        sola consulta.
+        """
+        progress = Progress('historias')
+        start = self.checkpoint.position(source)
+        if start:
+            print(f"Retomando {source} desde la historia {start}")
+
+        for batch in batches(iter_json_array(source, start), self.batch_size):
+            progress.read += len(batch)
+            self.resolve_authors(normalize_username(record.get('author')) for _, record in batch)
+
+            rows = {}
+            for index, record in batch:
+                author = normalize_username(record.get('author'))
+                title = (record.get('title') or '').strip()
+                content = record.get('content') or ''
+                category = (record.get('category') or '').strip()
+                if not title or not content.strip() or not category:
+                    print(f"Historia {index} omitida: faltan título, contenido o categoría")
+                    progress.skipped += 1
+                    continue
+                if author not in self.authors:
+                    print(f"Historia {index} ({title}) omitida: el autor '{author}' no existe")
+                    progress.skipped += 1
+                    continue
+                row_id = story_id(author, title, content)
+                if row_id in rows:
+                    progress.skipped += 1
+                    continue
+                rows[row_id] = {
+                    'id': row_id,
+                    'title': title,
+                    'content': content,
+                    'category': category,
+                    'author_id': self.authors[author]
+                }
+
+            # excerpt y word_count los calcula el trigger del servidor
+            self.upsert('stories', list(rows.values()), 'id', progress)
+            self.checkpoint.save(source, batch[-1][0] + 1)
+            progress.report()
+        return progress
+
+    def import_session(self, source):
+        """
+        La sesión heredada solo guardaba el usuario conectado en este equipo.
+        Las sesiones ahora se crean al iniciar sesión y viven en la base
+        local de cada dispositivo, así que no se sube: solo se verifica que
+        el usuario quedó importado.
+        """
+        for _, record in iter_json_array(source):
+            username = normalize_username(record.get('username'))
+            if not username:
+                continue
+            self.resolve_authors([username])
+            if username in self.authors:
+                print(f"Sesión heredada de {username}: el usuario existe; debe iniciar sesión en la app")
+            else:
+                print(f"Sesión heredada de {username}: el usuario no existe en Supabase")
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa los JSON heredados a Supabase")
+    parser.add_argument('--users', default=os.path.join(MODELS_DIR, 'users.json'))
+    parser.add_argument('--stories', default=os.path.join(MODELS_DIR, 'stories.json'))
+    parser.add_argument('--session', default=None,
+                        help="session.json de una instalación antigua (opcional)")
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help="Filas por upsert")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Procesos para bcrypt (por defecto uno por CPU)")
+    parser.add_argument('--rounds', type=int, default=SERVER_ROUNDS,
+                        help="Costo de bcrypt; si difiere del servidor, la app rehashea en el primer login")
+    parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                        help="Archivo de checkpoint ('' para no usarlo)")
+    parser.add_argument('--restart', action='store_true', help="Ignora el checkpoint existente")
+    parser.add_argument('--dry-run', action='store_true', help="Lee y hashea sin escribir en Supabase")
+    args = parser.parse_args()
+
+    if args.rounds < MIN_ROUNDS:
+        parser.error(f"--rounds no puede ser menor que {MIN_ROUNDS}")
+    if args.restart and args.checkpoint and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    checkpoint = Checkpoint(None if args.dry_run else args.checkpoint)
+    importer = LegacyImporter(checkpoint, args.batch, args.workers, args.rounds, args.dry_run)
+
+    started = time.perf_counter()
+    results = []
+    if args.users and os.path.exists(args.users):
+        results.append(importer.import_users(args.users))
+    if args.stories and os.path.exists(args.stories):
+        results.append(importer.import_stories(args.stories))
+    if args.session and os.path.exists(args.session):
+        importer.import_session(args.session)
+
+    elapsed = time.perf_counter() - started
+    total = sum(progress.read for progress in results)
+    print(f"\nTotal: {total} registros en {elapsed:.1f} s ({total / max(elapsed, 1e-6):.0f}/s)")
+    for progress in results:
+        progress.report()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+realtime_standin.py
+Servidor local que imita el canal postgres_changes de Supabase Realtime
+(protocolo Phoenix sobre websocket) para probar la app sin el proyecto real.
+Los cambios se escriben como líneas JSON en la entrada estándar:
+
+    {"type": "INSERT", "record": {"id": "...", "title": "...", ...}}
+    {"type": "UPDATE", "record": {...}}
+    {"type": "DELETE", "old_record": {"id": "..."}}
+    {"drop": true}     # corta las conexiones para probar la reconexión
+
+Uso:
+    python tools/realtime_standin.py --port 4000
+    SOMBRAS_REALTIME_URL=ws://localhost:4000/realtime/v1 python main.py
+
+Requiere websockets (ya lo instala el cliente realtime de supabase).
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+from datetime import datetime, timezone
+import websockets
+
+class Subscription:
+    """
+    Canal unido por un cliente: el tema y los ids de sus filtros postgres_changes.
+    """
+    def __init__(self, websocket, topic, join_ref, ids, array_format):
+        self.websocket = websocket
+        self.topic = topic
+        self.join_ref = join_ref
+        self.ids = ids
+        self.array_format = array_format
+
+class RealtimeStandin:
+    """
+    Responde joins y heartbeats, y reenvía a los canales unidos los cambios
+    leídos de la entrada estándar.
+    """
+    def __init__(self):
+        self.subscriptions = []
+        self.binding_ids = itertools.count(1)
+
+    @staticmethod
+    def encode(array_format, join_ref, ref, topic, event, payload):
+        """
+        Serializa un mensaje en el formato que usó el cliente
+        (objeto en vsn 1.0.0, arreglo en vsn 2.0.0).
+        """
+        if array_format:
+            return json.dumps([join_ref, ref, topic, event, payload])
+        return json.dumps({'join_ref': join_ref, 'ref': ref, 'topic': topic, 'event': event, 'payload': payload})
+
+    @staticmethod
+    def decode(raw):
+        """
+        Retorna (formato_arreglo, join_ref, ref, tema, evento, payload).
+        """
+        message = json.loads(raw)
+        if isinstance(message, list):
+            return (True, *message)
+        return (False, message.get('join_ref'), message.get('ref'), message['topic'],
+                message['event'], message.get('payload') or {})
+
+    async def handle(self, websocket, path=None):
+        """
+        Atiende una conexión hasta que el cliente la cierre.
+        """
+        try:
+            async for raw in websocket:
+                array_format, join_ref, ref, topic, event, payload = self.decode(raw)
+                response = {}
+
+                if event == 'phx_join':
+                    # Se devuelven los mismos filtros con un id, como el servidor real
+                    bindings = payload.get('config', {}).get('postgres_changes', [])
+                    response['postgres_changes'] = [
+                        dict(binding, id=next(self.binding_ids)) for binding in bindings
+                    ]
+                    self.subscriptions.append(Subscription(
+                        websocket, topic, join_ref or ref,
+                        [binding['id'] for binding in response['postgres_changes']],
+                        array_format
+                    ))
+                    print(f"Cliente unido a {topic}")
+                elif event == 'phx_leave':
+                    self.forget(websocket, topic)
+
+                await websocket.send(self.encode(
+                    array_format, join_ref, ref, topic, 'phx_reply',
+                    {'status': 'ok', 'response': response}
+                ))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.forget(websocket)
+
+    def forget(self, websocket, topic=None):
+        self.subscriptions = [
+            s for s in self.subscriptions
+            if s.websocket is not websocket or (topic is not None and s.topic != topic)
+        ]
+
+    async def broadcast(self, change):
+        """
+        Envía un cambio (INSERT, UPDATE o DELETE) a todos los canales unidos.
+        """
+        data = {
+            'schema': 'public',
+            'table': 'stories',
+            'commit_timestamp': datetime.now(timezone.utc).isoformat(),
+            'type': change['type'],
+            'record': change.get('record', {}),
+            'old_record': change.get('old_record', {}),
+            'columns': [],
+            'errors': None
+        }
+        for subscription in list(self.subscriptions):
+            message = self.encode(
+                subscription.array_format, subscription.join_ref, None,
+                subscription.topic, 'postgres_changes', {'ids': subscription.ids, 'data': data}
+            )
+            try:
+                await subscription.websocket.send(message)
+            except websockets.ConnectionClosed:
+                self.forget(subscription.websocket)
+        print(f"{change['type']} enviado a {len(self.subscriptions)} canal(es)")
+
+    async def drop(self):
+        """
+        Cierra todas las conexiones; el cliente debe reconectarse y sincronizar.
+        Se cierran con un código de error (1012, reinicio del servidor): con
+        un cierre normal el cliente realtime da la conexión por terminada.
+        """
+        for websocket in {s.websocket for s in self.subscriptions}:
+            await websocket.close(code=1012, reason='reinicio')
+        self.subscriptions = []
+        print("Conexiones cerradas")
+
+    async def read_commands(self):
+        """
+        Lee cambios de la entrada estándar (una línea JSON por cambio).
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                return
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                command = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"JSON inválido: {e}")
+                continue
+
+            if command.get('drop'):
+                await self.drop()
+            elif command.get('type') in ('INSERT', 'UPDATE', 'DELETE'):
+                await self.broadcast(command)
+            else:
+                print("Se esperaba 'type' (INSERT, UPDATE o DELETE) o 'drop'")
+
+async def serve(host, port):
+    standin = RealtimeStandin()
+    async with websockets.serve(standin.handle, host, port):
+        print(f"Realtime local en ws://{host}:{port}/realtime/v1")
+        await standin.read_commands()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor Realtime local para pruebas")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=4000)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+if __name__ == '__main__':
+    main()
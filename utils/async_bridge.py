@@ -0,0 +1,85 @@
+"""
+async_bridge.py
+Puente entre asyncio y el ciclo de eventos de Kivy.
+Ejecuta corrutinas en un loop de asyncio que vive en un hilo aparte y
+entrega los resultados en el hilo de la interfaz mediante Clock.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import CancelledError
+from kivy.clock import Clock
+
+class AsyncBridge:
+    """
+    Clase estática que administra el loop de asyncio en segundo plano.
+    La interfaz nunca espera: las corrutinas corren en el otro hilo y los
+    callbacks se programan en el Clock de Kivy para el siguiente frame.
+    """
+    _loop = None
+    _thread = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def loop():
+        """
+        Retorna el loop de asyncio, iniciándolo la primera vez.
+        """
+        with AsyncBridge._lock:
+            if AsyncBridge._loop is None:
+                loop = asyncio.new_event_loop()
+                AsyncBridge._thread = threading.Thread(target=loop.run_forever, daemon=True)
+                AsyncBridge._thread.start()
+                AsyncBridge._loop = loop
+            return AsyncBridge._loop
+
+    @staticmethod
+    def submit(coro, on_success=None, on_error=None):
+        """
+        Ejecuta la corrutina en segundo plano.
+        on_success(resultado) y on_error(excepción) se llaman en el hilo de Kivy.
+        Retorna un concurrent.futures.Future que puede cancelarse.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, AsyncBridge.loop())
+
+        def on_done(done_future):
+            try:
+                result = done_future.result()
+            except CancelledError:
+                return
+            except Exception as e:
+                if on_error:
+                    Clock.schedule_once(lambda dt, error=e: on_error(error))
+                else:
+                    print(f"Error en tarea asíncrona: {e}")
+                return
+            if on_success:
+                Clock.schedule_once(lambda dt: on_success(result))
+
+        future.add_done_callback(on_done)
+        return future
+
+    @staticmethod
+    def stop():
+        """
+        Detiene el loop en segundo plano (al cerrar la aplicación).
+        """
+        with AsyncBridge._lock:
+            if AsyncBridge._loop is not None:
+                AsyncBridge._loop.call_soon_threadsafe(AsyncBridge._loop.stop)
+                AsyncBridge._loop = None
+
+def run_async(coro, on_success=None, on_error=None):
+    """
+    Función helper para ejecutar una corrutina sin bloquear la interfaz.
+    """
+    return AsyncBridge.submit(coro, on_success, on_error)
+
+def on_main_thread(callback):
+    """
+    Envuelve callback para que, llamado desde cualquier hilo, se ejecute
+    en el hilo de Kivy en el siguiente frame.
+    """
+    def scheduled(*args):
+        Clock.schedule_once(lambda dt: callback(*args))
+    return scheduled
@@ -0,0 +1,76 @@
+"""
+lazy_screens.py
+Construcción diferida de pantallas y de cargas iniciales de datos.
+Las pantallas se registran como fábricas que se importan y construyen
+la primera vez que se navega a ellas; las consultas iniciales se lanzan
+después de que la ventana dibuja su primer frame.
+"""
+
+import importlib
+from kivy.clock import Clock
+from kivymd.uix.screenmanager import MDScreenManager
+from utils.startup_trace import StartupTrace
+
+class LazyScreenManager(MDScreenManager):
+    """
+    Gestor de pantallas que construye cada pantalla al pedirla por primera vez.
+    ScreenManager resuelve 'current' mediante get_screen, así que navegar
+    con screen_manager.current = 'nombre' basta para construirla.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._factories = {}
+
+    def register_screen(self, name, factory):
+        """
+        Registra una pantalla sin construirla todavía.
+        factory(name=nombre) debe retornar la pantalla.
+        """
+        self._factories[name] = factory
+
+    def build_screen(self, name):
+        """
+        Construye una pantalla registrada y la agrega al gestor.
+        """
+        factory = self._factories.pop(name)
+        with StartupTrace.phase(f'screen:{name}'):
+            screen = factory(name=name)
+            self.add_widget(screen)
+        return screen
+
+    def get_screen(self, name):
+        """
+        Retorna la pantalla con el nombre dado, construyéndola si hace falta.
+        """
+        if name in self._factories:
+            return self.build_screen(name)
+        return super().get_screen(name)
+
+    def has_screen(self, name):
+        """
+        Indica si la pantalla existe o está registrada para construirse.
+        """
+        return name in self._factories or super().has_screen(name)
+
+def import_screen(module_path, class_name):
+    """
+    Retorna una fábrica que importa el módulo de la pantalla solo al construirla.
+    """
+    def factory(**kwargs):
+        screen_class = getattr(importlib.import_module(module_path), class_name)
+        return screen_class(**kwargs)
+    return factory
+
+def after_first_paint(callback):
+    """
+    Ejecuta callback() en cuanto la ventana termine de dibujar el próximo frame.
+    Si la ventana aún no existe se espera a su primer frame; si ya está
+    mostrando la app, el callback corre tras el frame en curso.
+    """
+    from kivy.core.window import Window
+
+    def on_flip(*args):
+        Window.unbind(on_flip=on_flip)
+        Clock.schedule_once(lambda dt: callback())
+
+    Window.bind(on_flip=on_flip)
@@ -0,0 +1,212 @@
+"""
+startup_trace.py
+Medición del arranque de la aplicación.
+Se activa con la variable de entorno SOMBRAS_STARTUP_TRACE ("1" para la ruta
+por defecto o la ruta del reporte) y registra la duración de cada fase
+(imports, cliente de Supabase, construcción de pantallas, carga de KV,
+primer frame) y el tiempo de import de cada módulo en un reporte JSON.
+Solo usa la biblioteca estándar para poder importarse antes que Kivy.
+"""
+
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+TRACE_ENV = 'SOMBRAS_STARTUP_TRACE'
+
+# Ruta del reporte cuando la variable vale "1"
+DEFAULT_REPORT_PATH = os.path.join(
+    os.path.expanduser('~'), '.sombras_de_chile', 'startup_trace.json'
+)
+
+# Módulos con un import más corto que esto (en ms) no se incluyen en el reporte
+MIN_IMPORT_MS = 1.0
+
+def _elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 3)
+
+class _TimedLoader:
+    """
+    Envuelve el loader de un módulo para medir su ejecución.
+    El resto de los atributos se delegan al loader original.
+    """
+    def __init__(self, loader, fullname, timer):
+        self._loader = loader
+        self._fullname = fullname
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def exec_module(self, module):
+        self._timer.enter(self._fullname)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer.exit(self._fullname)
+
+class _ImportTimer:
+    """
+    Finder de sys.meta_path que mide el tiempo de import de cada módulo.
+    'total_ms' incluye los imports anidados y 'self_ms' los descuenta.
+    """
+    def __init__(self):
+        self.imports = {}
+        self._stack = []
+        self._lock = threading.Lock()
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                spec.loader = _TimedLoader(spec.loader, fullname, self)
+            return spec
+        return None
+
+    def enter(self, fullname):
+        # Solo se mide el hilo principal; los imports en segundo plano no suman al arranque
+        if threading.current_thread() is not threading.main_thread():
+            return
+        self._stack.append([fullname, time.perf_counter(), 0.0])
+
+    def exit(self, fullname):
+        if threading.current_thread() is not threading.main_thread():
+            return
+        if not self._stack or self._stack[-1][0] != fullname:
+            return
+        _, start, children = self._stack.pop()
+        total = (time.perf_counter() - start) * 1000
+        if self._stack:
+            self._stack[-1][2] += total
+        with self._lock:
+            self.imports[fullname] = {
+                'total_ms': round(total, 3),
+                'self_ms': round(total - children, 3)
+            }
+
+class StartupTrace:
+    """
+    Clase estática que acumula las mediciones del arranque.
+    Si la variable de entorno no está definida, todas las llamadas son no-ops.
+    """
+    enabled = False
+    report_path = None
+    _start = time.perf_counter()
+    _phases = []
+    _marks = {}
+    _import_timer = None
+
+    @staticmethod
+    def start():
+        """
+        Activa la medición si la variable de entorno lo indica.
+        Debe llamarse antes de importar Kivy para medir sus imports.
+        """
+        value = os.getenv(TRACE_ENV)
+        if not value or StartupTrace.enabled:
+            return
+        StartupTrace.enabled = True
+        StartupTrace.report_path = DEFAULT_REPORT_PATH if value == '1' else value
+        StartupTrace._import_timer = _ImportTimer()
+        sys.meta_path.insert(0, StartupTrace._import_timer)
+
+    @staticmethod
+    @contextmanager
+    def phase(name):
+        """
+        Mide la duración del bloque como una fase del arranque.
+        """
+        if not StartupTrace.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            StartupTrace._phases.append({
+                'name': name,
+                'start_ms': round((start - StartupTrace._start) * 1000, 3),
+                'duration_ms': _elapsed_ms(start)
+            })
+
+    @staticmethod
+    def mark(name):
+        """
+        Registra un instante del arranque (por ejemplo el primer frame).
+        """
+        if StartupTrace.enabled and name not in StartupTrace._marks:
+            StartupTrace._marks[name] = _elapsed_ms(StartupTrace._start)
+
+    @staticmethod
+    def report():
+        """
+        Retorna el reporte como diccionario.
+        """
+        imports = {}
+        if StartupTrace._import_timer:
+            imports = {
+                module: timing
+                for module, timing in sorted(StartupTrace._import_timer.imports.items())
+                if timing['total_ms'] >= MIN_IMPORT_MS
+            }
+        return {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'marks': StartupTrace._marks,
+            'phases': StartupTrace._phases,
+            'imports': imports
+        }
+
+    @staticmethod
+    def write_report():
+        """
+        Escribe el reporte JSON. Retorna la ruta o None si está desactivado.
+        """
+        if not StartupTrace.enabled:
+            return None
+        try:
+            directory = os.path.dirname(StartupTrace.report_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(StartupTrace.report_path, 'w', encoding='utf-8') as f:
+                json.dump(StartupTrace.report(), f, indent=2, ensure_ascii=False)
+            return StartupTrace.report_path
+        except Exception as e:
+            print(f"Error al escribir el reporte de arranque: {e}")
+            return None
+
+    @staticmethod
+    def watch_first_frame(window):
+        """
+        Marca el primer frame en cuanto la ventana lo dibuja y escribe el reporte.
+        """
+        if not StartupTrace.enabled:
+            return
+
+        def on_flip(*args):
+            window.unbind(on_flip=on_flip)
+            StartupTrace.first_frame()
+
+        window.bind(on_flip=on_flip)
+
+    @staticmethod
+    def first_frame():
+        """
+        Marca el primer frame dibujado y escribe el reporte.
+        """
+        if not StartupTrace.enabled:
+            return
+        StartupTrace.mark('first_frame')
+        path = StartupTrace.write_report()
+        if path:
+            print(f"Reporte de arranque: {path} (primer frame a los {StartupTrace._marks['first_frame']} ms)")